@@ -0,0 +1,207 @@
+import argparse
+import io
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from copy import deepcopy
+from expressions import ASSUMED_OPEN_INTERVAL_0_TO_1, ASSUMED_0_OR_1
+from contradiction import Contradiction
+from proof import NULL_PROOF
+import classification
+import polynomial_factors
+import rules
+
+# (deg P, deg Q) cases timed as a whole, a mix of quick ones and the slowest ones up to n=25
+CASES = [(6, 14), (7, 13), (8, 14), (9, 13), (7, 17), (8, 16), (7, 18), (10, 15)]
+# case and smallest a_i in (0,1) branch the single rules are measured on
+RULES_CASE = (8, 16, 1)
+
+
+def _reset():
+    # repeated runs must not profit from states remembered by the previous ones
+    if rules.transpositions is not None:
+        rules.transpositions.clear()
+    if rules.probe_fixpoints is not None:
+        rules.probe_fixpoints.clear()
+    if rules.nogoods is not None:
+        rules.nogoods.clear()
+
+
+def check_case(deg_p, deg_q):
+    # whole check_factorization of one case, without its output
+    polynomial_factors.counterexamples = io.StringIO()
+    with redirect_stdout(io.StringIO()):
+        polynomial_factors.check_factorization(deg_p, deg_q)
+
+
+def branch_assumptions(deg_p, deg_q, i):
+    # assumptions at the start of the smallest a_i in (0,1) branch, after the initial propagation
+    assumption_type = polynomial_factors.PackedPolynomialProductAssumptions if polynomial_factors.packed \
+        else polynomial_factors.PolynomialProductAssumptions
+    assumptions = assumption_type(deg_p, deg_q, report=False)
+    rules.propagate(assumptions, level=2, proof=NULL_PROOF, recursive=False)
+    for smaller in range(1, i):
+        assumptions.assumed_a[smaller].adjust(ASSUMED_0_OR_1, 2, NULL_PROOF)
+        assumptions.assumed_b[smaller].adjust(ASSUMED_0_OR_1, 2, NULL_PROOF)
+    assumptions.assumed_a[i].adjust(ASSUMED_OPEN_INTERVAL_0_TO_1, 3, NULL_PROOF)
+    return assumptions
+
+
+def undone(rule):
+    # run rule on the assumptions and undo its changes, so that it can be repeated on the same state
+    # without the states it remembered
+    def run(assumptions):
+        _reset()
+        checkpoint = assumptions.checkpoint()
+        try:
+            rule(assumptions)
+        except Contradiction:
+            pass
+        finally:
+            assumptions.rollback(checkpoint)
+    return run
+
+
+def micro_benchmarks():
+    # name -> (function, argument), the argument is prepared outside of the measured time
+    deg_p, deg_q, i = RULES_CASE
+    assumptions = branch_assumptions(deg_p, deg_q, i)
+    # on assumptions of their own, so that deepcopy_assumptions does not copy all of them
+    products_assumptions = branch_assumptions(deg_p, deg_q, i)
+    products = [products_assumptions.product(a, b) for a in range(deg_p + 1) for b in range(deg_q + 1)]
+    return {
+        "basic_rules": (undone(lambda state: rules.basic_rules(state, 3, NULL_PROOF)), assumptions),
+        "basic_rules_nonrecursive": (undone(lambda state: rules.basic_rules(state, 3, NULL_PROOF, recursive=False)),
+                                     assumptions),
+        "propagate": (undone(lambda state: rules.propagate(state, 3, NULL_PROOF)), assumptions),
+        "check_remaining_coeffs": (undone(lambda state: rules.check_remaining_coeffs(state, i, NULL_PROOF)),
+                                   assumptions),
+        "check_01_coeffs": (undone(lambda state: rules.check_01_coeffs(state, NULL_PROOF)), assumptions),
+        "check_terms": (undone(lambda state: rules.check_terms(state, NULL_PROOF)), assumptions),
+        "check_inequalities": (undone(lambda state: rules.check_inequalities(state, NULL_PROOF)), assumptions),
+        "multiplication_assumed_type": (lambda items: [product.assumed_type for product in items], products),
+        "deepcopy_assumptions": (deepcopy, assumptions),
+    }
+
+
+def measure(function, argument, repeat, number):
+    # best time per call out of repeat rounds of number calls each
+    best = None
+    for _ in range(repeat):
+        _reset()
+        start = time.perf_counter()
+        for _ in range(number):
+            function(argument)
+        elapsed = (time.perf_counter() - start) / number
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def peak_memory(deg_p, deg_q):
+    _reset()
+    tracemalloc.start()
+    try:
+        check_case(deg_p, deg_q)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_benchmarks(repeat, number, memory=True):
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "settings": {"packed": polynomial_factors.packed, "incremental": rules.incremental,
+                     "transpositions": rules.transpositions.size if rules.transpositions is not None else 0,
+                     "probe_fixpoints": rules.probe_fixpoints.size if rules.probe_fixpoints is not None else 0,
+                     "nogoods": rules.nogoods.size if rules.nogoods is not None else 0,
+                     "classification": next(name for name, term_counts in classification.BACKENDS.items()
+                                            if term_counts is rules.term_counts),
+                     "symmetry": polynomial_factors.symmetry},
+        "seconds": {},
+        "peak_memory": {},
+    }
+    for deg_p, deg_q in CASES:
+        report["seconds"][f"check_factorization_{deg_p}_{deg_q}"] = measure(lambda case: check_case(*case),
+                                                                            (deg_p, deg_q), repeat, 1)
+    for name, (function, argument) in micro_benchmarks().items():
+        report["seconds"][name] = measure(function, argument, repeat, number)
+    if memory:
+        for deg_p, deg_q in CASES:
+            report["peak_memory"][f"check_factorization_{deg_p}_{deg_q}"] = peak_memory(deg_p, deg_q)
+    return report
+
+
+def compare(report, baseline, threshold):
+    # returns names of the benchmarks more than threshold (relative) slower or bigger than in baseline
+    # (settings differing from the ones of baseline are printed first, the numbers are not comparable then)
+    baseline_settings = baseline.get("settings", {})
+    for name in sorted(set(report["settings"]) | set(baseline_settings)):
+        if report["settings"].get(name) != baseline_settings.get(name):
+            print(f"{'settings':12} {name:40} {baseline_settings.get(name)!s:>12} -> "
+                  f"{report['settings'].get(name)!s:>12}  DIFFERENT")
+    regressions = []
+    for section in ("seconds", "peak_memory"):
+        for name, value in report[section].items():
+            base = baseline.get(section, {}).get(name)
+            if not base:
+                continue
+            ratio = value / base
+            flag = ""
+            if ratio > 1 + threshold:
+                regressions.append(name)
+                flag = "  REGRESSION"
+            print(f"{section:12} {name:40} {base:12.6g} -> {value:12.6g} ({ratio - 1:+.1%}){flag}")
+    return regressions
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Benchmark the contradiction search.')
+    parser.add_argument('-o', '--output', help='write the JSON report to this file')
+    parser.add_argument('--baseline', help='JSON report to compare against')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='relative slowdown (or memory growth) against baseline reported as regression')
+    parser.add_argument('--repeat', type=int, default=3, help='rounds of each benchmark, the best one counts')
+    parser.add_argument('--number', type=int, default=20, help='calls of each micro-benchmark in a round')
+    parser.add_argument('--no-memory', action='store_true', default=False, help='skip peak memory measurement')
+    parser.add_argument('--packed', action='store_true', default=False,
+                        help='keep coefficient domains in packed byte buffers')
+    parser.add_argument('--incremental', action='store_true', default=False,
+                        help='after a pass of basic rules re-check only the coefficients of R(x) whose variables '
+                             'changed instead of rescanning all of them')
+    parser.add_argument('--transpositions', type=int, default=65536,
+                        help='number of propagated states remembered to skip repeated propagation, 0 to disable')
+    parser.add_argument('--probe-fixpoints', type=int, default=65536,
+                        help='number of states reached by viable probes remembered, 0 to disable')
+    parser.add_argument('--classification', choices=classification.available_backends(), default='python',
+                        help='how terms of the coefficients are classified')
+    parser.add_argument('--symmetry', action='store_true', default=False,
+                        help='break the symmetry of reversing the polynomials')
+    parser.add_argument('--nogoods', type=int, default=0,
+                        help='number of contradictory coefficient domain combinations learned from probes, 0 to disable')
+    args = parser.parse_args()
+
+    polynomial_factors.configure(packed_assumptions=args.packed, incremental=args.incremental,
+                                 transpositions=args.transpositions, nogoods=args.nogoods,
+                                 probe_fixpoints=args.probe_fixpoints, symmetric=args.symmetry,
+                                 classification_backend=args.classification)
+    report = run_benchmarks(args.repeat, args.number, memory=not args.no_memory)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
@@ -0,0 +1,36 @@
+from time import perf_counter
+
+
+class BudgetExceeded(Exception):
+    # not a Contradiction, what was being checked is left undecided
+    def __init__(self, budget, resource):
+        super().__init__(f"{budget.name} budget of {resource} exceeded")
+        self.budget = budget
+        self.resource = resource
+
+
+class Budget:
+    # limits of wall time, probes and basic rules fixpoints of a case or a branch, 0 or None for no limit
+    # limits is a (seconds, probes, fixpoints) tuple
+
+    def __init__(self, name, limits):
+        self.name = name
+        self.seconds, self.max_probes, self.max_fixpoints = limits
+        self.deadline = perf_counter() + self.seconds if self.seconds else None
+        self.probes = 0
+        self.fixpoints = 0
+
+    def charge(self, probes=0, fixpoints=0):
+        self.probes += probes
+        self.fixpoints += fixpoints
+        if self.max_probes and self.probes > self.max_probes:
+            raise BudgetExceeded(self, f"{self.max_probes} probes")
+        if self.max_fixpoints and self.fixpoints > self.max_fixpoints:
+            raise BudgetExceeded(self, f"{self.max_fixpoints} fixpoints")
+        if self.deadline is not None and perf_counter() > self.deadline:
+            raise BudgetExceeded(self, f"{self.seconds} seconds")
+
+
+def limited(limits):
+    # whether (seconds, probes, fixpoints) limits anything
+    return limits is not None and any(limits)
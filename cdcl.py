@@ -0,0 +1,194 @@
+class CdclSolver:
+    # conflict driven clause learning over a CNF formula in DIMACS convention, variables are 1..num_vars and
+    # literals are +v / -v; two watched literals, first UIP learning with backjumping, activity based decisions
+    # with phase saving and geometric restarts
+
+    def __init__(self, num_vars, clauses):
+        self.num_vars = num_vars
+        self.clauses = []
+        # literal -> clauses watching it, indexed by 2*v + (literal < 0)
+        self.watches = [[] for _ in range(2 * num_vars + 2)]
+        self.values = [None] * (num_vars + 1)
+        self.levels = [0] * (num_vars + 1)
+        self.reasons = [None] * (num_vars + 1)
+        self.phases = [False] * (num_vars + 1)
+        self.activity = [0.0] * (num_vars + 1)
+        self.increment = 1.0
+        self.trail = []
+        # trail position where each decision level starts
+        self.level_starts = []
+        self.head = 0
+        self.conflicts = 0
+        self.decisions = 0
+        self.unsatisfiable = False
+        for clause in clauses:
+            self.add_clause(clause)
+
+    def add_clause(self, clause):
+        # only at decision level 0, before solving
+        clause = list(dict.fromkeys(clause))
+        if any(-literal in clause for literal in clause):
+            return
+        clause = [literal for literal in clause if self._value(literal) is not False]
+        if any(self._value(literal) for literal in clause):
+            return
+        if not clause:
+            self.unsatisfiable = True
+        elif len(clause) == 1:
+            self._assign(clause[0], None)
+            if self._propagate() is not None:
+                self.unsatisfiable = True
+        else:
+            self._watch(clause)
+
+    def _watch(self, clause):
+        self.clauses.append(clause)
+        self.watches[self._index(clause[0])].append(clause)
+        self.watches[self._index(clause[1])].append(clause)
+
+    @staticmethod
+    def _index(literal):
+        return 2 * literal if literal > 0 else -2 * literal + 1
+
+    def _value(self, literal):
+        value = self.values[abs(literal)]
+        if value is None or literal > 0:
+            return value
+        return not value
+
+    def _assign(self, literal, reason):
+        variable = abs(literal)
+        self.values[variable] = literal > 0
+        self.levels[variable] = len(self.level_starts)
+        self.reasons[variable] = reason
+        self.trail.append(literal)
+
+    def _propagate(self):
+        # unit propagation of the assignments not propagated yet, returns a conflicting clause or None
+        trail = self.trail
+        values = self.values
+        while self.head < len(trail):
+            false_literal = -trail[self.head]
+            self.head += 1
+            watching = self.watches[self._index(false_literal)]
+            kept = []
+            for n, clause in enumerate(watching):
+                if clause[0] == false_literal:
+                    clause[0], clause[1] = clause[1], clause[0]
+                first = clause[0]
+                first_value = values[abs(first)]
+                if first_value is not None and first_value == (first > 0):
+                    kept.append(clause)
+                    continue
+                for m in range(2, len(clause)):
+                    other = clause[m]
+                    other_value = values[abs(other)]
+                    if other_value is None or other_value == (other > 0):
+                        clause[1], clause[m] = other, false_literal
+                        self.watches[self._index(other)].append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if first_value is not None:
+                        kept.extend(watching[n + 1:])
+                        self.watches[self._index(false_literal)] = kept
+                        return clause
+                    self._assign(first, clause)
+            self.watches[self._index(false_literal)] = kept
+        return None
+
+    def _bump(self, variable):
+        self.activity[variable] += self.increment
+        if self.activity[variable] > 1e100:
+            self.activity = [activity * 1e-100 for activity in self.activity]
+            self.increment *= 1e-100
+
+    def _analyze(self, conflict):
+        # first unique implication point clause of the conflict and the level to jump back to
+        level = len(self.level_starts)
+        seen = set()
+        learned = [None]
+        pending = 0
+        literal = None
+        position = len(self.trail) - 1
+        clause = conflict
+        while True:
+            for other in (clause if literal is None else clause[1:]):
+                variable = abs(other)
+                if variable in seen or self.levels[variable] == 0:
+                    continue
+                seen.add(variable)
+                self._bump(variable)
+                if self.levels[variable] == level:
+                    pending += 1
+                else:
+                    learned.append(other)
+            while abs(self.trail[position]) not in seen:
+                position -= 1
+            literal = self.trail[position]
+            position -= 1
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.reasons[abs(literal)]
+        learned[0] = -literal
+        if len(learned) == 1:
+            return learned, 0
+        # the literal of the highest level among the others is watched, it becomes unit after the jump
+        second = max(range(1, len(learned)), key=lambda n: self.levels[abs(learned[n])])
+        learned[1], learned[second] = learned[second], learned[1]
+        return learned, self.levels[abs(learned[1])]
+
+    def _backjump(self, level):
+        start = self.level_starts[level]
+        for literal in self.trail[start:]:
+            variable = abs(literal)
+            self.phases[variable] = self.values[variable]
+            self.values[variable] = None
+            self.reasons[variable] = None
+        del self.trail[start:]
+        del self.level_starts[level:]
+        self.head = start
+
+    def _decide(self):
+        values = self.values
+        activity = self.activity
+        best = None
+        for variable in range(1, self.num_vars + 1):
+            if values[variable] is None and (best is None or activity[variable] > activity[best]):
+                best = variable
+        return best
+
+    def solve(self):
+        # model as a list of values of the variables (index 0 unused), None when unsatisfiable
+        if self.unsatisfiable:
+            return None
+        restart = 100
+        conflicts = 0
+        while True:
+            conflict = self._propagate()
+            if conflict is not None:
+                self.conflicts += 1
+                conflicts += 1
+                if not self.level_starts:
+                    self.unsatisfiable = True
+                    return None
+                learned, level = self._analyze(conflict)
+                self._backjump(level)
+                if len(learned) == 1:
+                    self._assign(learned[0], None)
+                else:
+                    self._watch(learned)
+                    self._assign(learned[0], learned)
+                self.increment /= 0.95
+                continue
+            if conflicts >= restart and self.level_starts:
+                self._backjump(0)
+                conflicts = 0
+                restart = int(restart * 1.5)
+            variable = self._decide()
+            if variable is None:
+                return list(self.values)
+            self.decisions += 1
+            self.level_starts.append(len(self.trail))
+            self._assign(variable if self.phases[variable] else -variable, None)
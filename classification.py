@@ -0,0 +1,119 @@
+from functools import lru_cache
+from expressions import PRODUCT_TYPE, DOMAIN_TO_ASSUMED
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+# backends classifying the terms a_i*b_j of all the coefficients of R(x) at once, term_counts(assumptions)
+# gives counts[t][k], the number of terms of [x^k]R(x) of assumed type t (index 0 unused, as in PRODUCT_TYPE)
+
+
+def reference_term_counts(assumptions):
+    # term by term, as the rules classify the terms of a single coefficient
+    counts = [[0] * (assumptions.deg_r + 1) for _ in range(len(PRODUCT_TYPE))]
+    for k, terms in enumerate(assumptions.index.terms):
+        for i, j in terms:
+            counts[PRODUCT_TYPE[assumptions.assumed_a[i].assumed_type][assumptions.assumed_b[j].assumed_type]][k] += 1
+    return counts
+
+
+@lru_cache(maxsize=None)
+def _numpy_tables(deg_p, deg_q):
+    # assumed type of each domain, product type table and [x^k]R(x) of each a_i*b_j, shifted so that
+    # the type and k of a term make a single index into the flattened counts
+    to_assumed = numpy.array([assumed or 0 for assumed in DOMAIN_TO_ASSUMED], dtype=numpy.intp)
+    product_type = numpy.array([[product or 0 for product in row] for row in PRODUCT_TYPE],
+                               dtype=numpy.intp) * (deg_p + deg_q + 1)
+    k = numpy.add.outer(numpy.arange(deg_p + 1), numpy.arange(deg_q + 1))
+    return to_assumed, product_type, k
+
+
+def numpy_term_counts(assumptions):
+    deg_p = assumptions.deg_p
+    deg_q = assumptions.deg_q
+    to_assumed, product_type, k = _numpy_tables(deg_p, deg_q)
+    types = to_assumed[numpy.frombuffer(assumptions.state(), dtype=numpy.uint8)]
+    types_a = types[:deg_p + 1]
+    types_b = types[deg_p + 2:deg_p + 2 + deg_q + 1]
+    # type of each a_i*b_j from the outer product, then summed along the anti-diagonals i+j=k
+    terms = product_type[types_a[:, None], types_b[None, :]] + k
+    counts = numpy.bincount(terms.ravel(), minlength=len(PRODUCT_TYPE) * (deg_p + deg_q + 1))
+    return counts.reshape(len(PRODUCT_TYPE), deg_p + deg_q + 1).tolist()
+
+
+# bytes.translate tables marking the positions of the domains of each assumed type by 1
+_TYPE_LANES = [bytes(int(assumed == assumed_type) for assumed in DOMAIN_TO_ASSUMED) + bytes(256 - len(DOMAIN_TO_ASSUMED))
+               for assumed_type in range(len(PRODUCT_TYPE))]
+
+
+@lru_cache(maxsize=None)
+def _bitset_products(deg_p, deg_q):
+    # for each product type, the a types and for each the b types whose terms a_i*b_j have it, and bytes per lane
+    # so that the lanes hold the largest count, min(deg P, deg Q) + 1
+    products = []
+    for product in range(len(PRODUCT_TYPE)):
+        pairs = []
+        for a_type in range(1, len(PRODUCT_TYPE)):
+            b_types = tuple(b_type for b_type in range(1, len(PRODUCT_TYPE)) if PRODUCT_TYPE[a_type][b_type] == product)
+            if b_types:
+                pairs.append((a_type, b_types))
+        products.append(pairs)
+    width = 1
+    while min(deg_p, deg_q) + 1 >= 256 ** width:
+        width += 1
+    return products, width
+
+
+def _lanes(domains, width):
+    # for each assumed type an integer with lane i (width bytes) set to 1 where domains[i] is of that type
+    lanes = [0]
+    for table in _TYPE_LANES[1:]:
+        marks = domains.translate(table)
+        if width > 1:
+            widened = bytearray(width * len(marks))
+            widened[::width] = marks
+            marks = widened
+        lanes.append(int.from_bytes(marks, "little"))
+    return lanes
+
+
+def bitset_term_counts(assumptions):
+    # one lane per coefficient in an integer for each assumed type, the product of the a lanes and the b lanes
+    # is the convolution counting the terms a_i*b_j of each [x^k]R(x), computed by a single big integer
+    # multiplication instead of going over the terms
+    deg_p = assumptions.deg_p
+    deg_q = assumptions.deg_q
+    products, width = _bitset_products(deg_p, deg_q)
+    state = assumptions.state()
+    lanes_a = _lanes(state[:deg_p + 1], width)
+    lanes_b = _lanes(state[deg_p + 2:deg_p + 2 + deg_q + 1], width)
+    size = width * (deg_p + deg_q + 1)
+    counts = []
+    for pairs in products:
+        total = 0
+        for a_type, b_types in pairs:
+            lanes = lanes_a[a_type]
+            if lanes:
+                for b_type in b_types:
+                    total += lanes * lanes_b[b_type]
+        counts_bytes = total.to_bytes(size, "little")
+        if width == 1:
+            counts.append(list(counts_bytes))
+        else:
+            counts.append([int.from_bytes(counts_bytes[k:k + width], "little") for k in range(0, size, width)])
+    return counts
+
+
+# name -> term_counts, None for classifying coefficient by coefficient in the rules
+BACKENDS = {
+    "python": None,
+    "numpy": numpy_term_counts,
+    "bitset": bitset_term_counts,
+}
+
+
+def available_backends():
+    return [name for name in BACKENDS if name != "numpy" or numpy is not None]
@@ -1,3 +1,5 @@
 class Contradiction(Exception):
-    def __init__(self):
-        pass
+    def __init__(self, explanation=None):
+        # positions (see ConvolutionIndex.positions) of the coefficients whose domains alone imply the
+        # contradiction, None if not known
+        self.explanation = explanation
@@ -0,0 +1,32 @@
+from functools import lru_cache
+
+
+class ConvolutionIndex:
+    # which products a_i*b_j contribute to which coefficient of R(x)=P(x)Q(x), and back
+    # instances are immutable and shared by all assumptions with the same degrees
+
+    def __init__(self, deg_p, deg_q):
+        self.deg_p = deg_p
+        self.deg_q = deg_q
+        self.deg_r = deg_p + deg_q
+        # terms[k] are the (i, j) pairs with a_i*b_j in [x^k]R(x), ordered by i
+        self.terms = tuple(tuple((i, k - i) for i in range(max(0, k - deg_q), min(deg_p, k) + 1))
+                           for k in range(self.deg_r + 1))
+        # coeffs_a[i] / coeffs_b[j] are the k's where a_i / b_j appear, assumptions keep one extra
+        # coefficient past the degree which appears nowhere
+        self.coeffs_a = tuple(tuple(range(i, i + deg_q + 1)) for i in range(deg_p + 1)) + ((),)
+        self.coeffs_b = tuple(tuple(range(j, j + deg_p + 1)) for j in range(deg_q + 1)) + ((),)
+        # positions[k] are the positions of the coefficients in [x^k]R(x) in assumed_a + assumed_b
+        self.positions = tuple(tuple(position for i, j in terms_k for position in (i, deg_p + 2 + j))
+                               for terms_k in self.terms)
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return convolution_index, (self.deg_p, self.deg_q)
+
+
+@lru_cache(maxsize=None)
+def convolution_index(deg_p, deg_q):
+    return ConvolutionIndex(deg_p, deg_q)
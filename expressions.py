@@ -7,6 +7,29 @@ ASSUMED_0 = 3
 ASSUMED_1 = 4
 ASSUMED_0_OR_1 = 5
 
+# packed representation: domain is a subset of {0, (0,1), 1}, one bit per possibility
+DOMAIN_0 = 0b001
+DOMAIN_OPEN_INTERVAL_0_TO_1 = 0b010
+DOMAIN_1 = 0b100
+
+# indexed by assumption type
+ASSUMED_TO_DOMAIN = (0,
+                     DOMAIN_0 | DOMAIN_OPEN_INTERVAL_0_TO_1 | DOMAIN_1,
+                     DOMAIN_OPEN_INTERVAL_0_TO_1,
+                     DOMAIN_0,
+                     DOMAIN_1,
+                     DOMAIN_0 | DOMAIN_1)
+
+# indexed by domain bitmask, intersections of the domains above never leave this set
+DOMAIN_TO_ASSUMED = (None,
+                     ASSUMED_0,
+                     ASSUMED_OPEN_INTERVAL_0_TO_1,
+                     None,
+                     ASSUMED_1,
+                     ASSUMED_0_OR_1,
+                     None,
+                     ASSUMED_CLOSED_INTERVAL_0_TO_1)
+
 
 def assumed_type_str(assumed_type):
     if assumed_type == ASSUMED_OPEN_INTERVAL_0_TO_1:
@@ -20,13 +43,36 @@ def assumed_type_str(assumed_type):
     elif assumed_type == ASSUMED_CLOSED_INTERVAL_0_TO_1:
         return "in [0,1]"
 
+def reference_product_assumed_type(a_type, b_type):
+    # assumed type of a*b given assumed types of a and b, PRODUCT_TYPE is generated from this
+    if ASSUMED_0 in (a_type, b_type):
+        return ASSUMED_0
+    if a_type == ASSUMED_1:
+        return b_type
+    if b_type == ASSUMED_1:
+        return a_type
+    if ASSUMED_CLOSED_INTERVAL_0_TO_1 in (a_type, b_type):
+        return ASSUMED_CLOSED_INTERVAL_0_TO_1
+    if a_type == ASSUMED_OPEN_INTERVAL_0_TO_1 and b_type == ASSUMED_OPEN_INTERVAL_0_TO_1:
+        return ASSUMED_OPEN_INTERVAL_0_TO_1
+    if a_type == ASSUMED_0_OR_1 and b_type == ASSUMED_0_OR_1:
+        return ASSUMED_0_OR_1
+    # only remaining case is {0,1} * (0,1), which can be anything in [0,1), we abuse [0,1] for it
+    return ASSUMED_CLOSED_INTERVAL_0_TO_1
+
+
 class AssumedExpression:
-    pass
+    # no __dict__, so that __slots__ of the subclasses take effect
+    __slots__ = ()
 
 class Variable(AssumedExpression):
-    def __init__(self, assumed_type, name):
+    def __init__(self, assumed_type, name, trail=None, coeffs=()):
         self.assumed_type = assumed_type
         self.name = name
+        # undo log shared by all variables of one state, receives (variable, previous type) on each change
+        self.trail = trail
+        # coefficients of R(x) this variable appears in
+        self.coeffs = coeffs
 
     def adjust(self, new_assumed_type, level, proof):
         if self.assumed_type == new_assumed_type:
@@ -40,180 +86,308 @@ class Variable(AssumedExpression):
                 # already compatible, do nothing
                 return False
             if self.assumed_type in (ASSUMED_OPEN_INTERVAL_0_TO_1, ):
-                proof.report(level, f"Since {self} = > contradiction")
+                proof.report(level, lambda: f"Since {self} = > contradiction")
                 raise Contradiction()
         elif new_assumed_type == ASSUMED_0:
             if self.assumed_type not in (ASSUMED_0, ASSUMED_0_OR_1, ASSUMED_CLOSED_INTERVAL_0_TO_1):
-                proof.report(level, f"Since {self} = > contradiction")
+                proof.report(level, lambda: f"Since {self} = > contradiction")
                 raise Contradiction()
         elif new_assumed_type == ASSUMED_1:
             if self.assumed_type not in (ASSUMED_1, ASSUMED_0_OR_1, ASSUMED_CLOSED_INTERVAL_0_TO_1):
-                proof.report(level, f"Since {self} = > contradiction")
+                proof.report(level, lambda: f"Since {self} = > contradiction")
                 raise Contradiction()
         elif new_assumed_type == ASSUMED_OPEN_INTERVAL_0_TO_1:
             if self.assumed_type not in (ASSUMED_OPEN_INTERVAL_0_TO_1, ASSUMED_CLOSED_INTERVAL_0_TO_1):
-                proof.report(level, f"Since {self} = > contradiction")
+                proof.report(level, lambda: f"Since {self} = > contradiction")
                 raise Contradiction()
         else:
             raise Exception("Unknown new assumption type")
 
+        if self.trail is not None:
+            self.trail.append((self, self.assumed_type))
         self.assumed_type = new_assumed_type
-        proof.report(level, f"Then {self.name} {assumed_type_str(new_assumed_type)}")
+        proof.report(level, lambda: f"Then {self.name} {assumed_type_str(new_assumed_type)}")
+        return True
+
+    def __str__(self):
+        return self.name + " " + assumed_type_str(self.assumed_type)
+
+
+class PackedVariable(AssumedExpression):
+    # view into one byte of a domain buffer, the buffer itself holds the state so that copying
+    # the assumptions is just a slice of the buffer
+    __slots__ = ('domains', 'index', 'name', 'trail', 'coeffs')
+
+    def __init__(self, domains, index, name, trail=None, coeffs=()):
+        self.domains = domains
+        self.index = index
+        self.name = name
+        self.trail = trail
+        self.coeffs = coeffs
+
+    @property
+    def assumed_type(self):
+        return DOMAIN_TO_ASSUMED[self.domains[self.index]]
+
+    @assumed_type.setter
+    def assumed_type(self, assumed_type):
+        self.domains[self.index] = ASSUMED_TO_DOMAIN[assumed_type]
+
+    def adjust(self, new_assumed_type, level, proof):
+        if not ASSUMED_CLOSED_INTERVAL_0_TO_1 <= new_assumed_type <= ASSUMED_0_OR_1:
+            raise Exception("Unknown new assumption type")
+
+        domain = self.domains[self.index]
+        new_domain = domain & ASSUMED_TO_DOMAIN[new_assumed_type]
+        if new_domain == domain:
+            return False
+
+        if not new_domain:
+            proof.report(level, lambda: f"Since {self} = > contradiction")
+            raise Contradiction()
+
+        if self.trail is not None:
+            self.trail.append((self, DOMAIN_TO_ASSUMED[domain]))
+        self.domains[self.index] = new_domain
+        proof.report(level, lambda: f"Then {self.name} {assumed_type_str(new_assumed_type)}")
         return True
 
     def __str__(self):
         return self.name + " " + assumed_type_str(self.assumed_type)
 
 
+def packed_variables(domains, prefix, trail=None, coeffs=None):
+    return [PackedVariable(domains, i, f"{prefix}_{i}", trail, coeffs[i] if coeffs else ())
+            for i in range(len(domains))]
+
+
+def relink_packed_variables(variables, domains, trail=None):
+    # views of the same coefficients over a copied buffer
+    return [PackedVariable(domains, variable.index, variable.name, trail, variable.coeffs) for variable in variables]
+
+
 class Multiplication(AssumedExpression):
+    # assumptions keep one for each a_i*b_j (see PolynomialProductAssumptions.products), the name is only made
+    # when it is reported or used as a key
+    __slots__ = ('a', 'b', '_name')
 
     def __init__(self, a, b):
         self.a = a
         self.b = b
-        self.name = f"{a.name}*{b.name}"
+        self._name = None
+
+    @property
+    def name(self):
+        if self._name is None:
+            self._name = f"{self.a.name}*{self.b.name}"
+        return self._name
 
     def adjust(self, product, level, proof):
         # this function propagates product assumption into multiplicands if possible
-        # e.g. 1*a in (0,1) implies that a in (0,1)
-        if product == ASSUMED_OPEN_INTERVAL_0_TO_1:
-            if self.a.assumed_type in (ASSUMED_0, ASSUMED_1, ASSUMED_0_OR_1) \
-                    and self.b.assumed_type in (ASSUMED_0, ASSUMED_1, ASSUMED_0_OR_1):
-                # a in {0,1} * b in {0,1} cannot give c in (0,1)
-                proof.report(level, f"{self.name} in (0,1), but {self.a} and {self.b} => contradiction")
-                raise Contradiction()
+        # e.g. 1*a in (0,1) implies that a in (0,1), see reference_multiplication_adjust for the case analysis
+        if not ASSUMED_CLOSED_INTERVAL_0_TO_1 <= product <= ASSUMED_0_OR_1:
+            raise Exception("Unsupported multiplication output type")
+        report, outcome, a_type, b_type = PRODUCT_ADJUST[product][self.a.assumed_type][self.b.assumed_type]
+        if report is not None:
+            proof.report(level, lambda: report.format(a=self.a, b=self.b))
+        if outcome is not None:
+            raise outcome()
 
-            if ASSUMED_0 in (self.a.assumed_type, self.b.assumed_type):
-                proof.report(level, f"{self.name} in (0,1), but {self.a} and {self.b} => contradiction")
-                raise Contradiction()
+        changed = False
+        if a_type is not None and self.a.adjust(a_type, level + 1, proof):
+            changed = True
+        if b_type is not None and self.b.adjust(b_type, level + 1, proof):
+            changed = True
+        return changed
 
-            if self.a.assumed_type == ASSUMED_0_OR_1 and self.b.assumed_type == ASSUMED_0_OR_1:
-                proof.report(level, f"{self.name} in (0,1), but {self.a} and {self.b} => contradiction")
-                raise Contradiction()
+    @property
+    def assumed_type(self):
+        return product_assumed_type(self.a.assumed_type, self.b.assumed_type)
 
-            if self.a.assumed_type not in (ASSUMED_OPEN_INTERVAL_0_TO_1, ASSUMED_CLOSED_INTERVAL_0_TO_1) \
-                    or self.b.assumed_type not in (ASSUMED_OPEN_INTERVAL_0_TO_1, ASSUMED_CLOSED_INTERVAL_0_TO_1):
-                proof.report(level, f"{self.name} in (0,1), but {self.a} and {self.b} =>")
-                if self.a.assumed_type == ASSUMED_1:
-                    # 1*b in (0,1) implies that b in (0,1)
-                    return self.b.adjust(ASSUMED_OPEN_INTERVAL_0_TO_1, level + 1, proof)
-                elif self.b.assumed_type == ASSUMED_1:
-                    # a*1 in (0,1) implies that a in (0,1)
-                    return self.a.adjust(ASSUMED_OPEN_INTERVAL_0_TO_1, level + 1, proof)
-                elif self.a.assumed_type in (ASSUMED_0, ASSUMED_1, ASSUMED_0_OR_1) \
-                        and self.b.assumed_type == ASSUMED_OPEN_INTERVAL_0_TO_1:
-                    # {0,1} * (0,1) in (0,1) implies first coefficient must be 1
-                    return self.a.adjust(ASSUMED_1, level + 1, proof)
-                elif self.a.assumed_type == ASSUMED_OPEN_INTERVAL_0_TO_1 \
-                        and self.b.assumed_type in (ASSUMED_0, ASSUMED_1, ASSUMED_0_OR_1):
-                    # (0,1) * {0,1} in (0,1) implies second coefficient must be 1
-                    return self.b.adjust(ASSUMED_1, level + 1, proof)
-                elif self.a.assumed_type == ASSUMED_CLOSED_INTERVAL_0_TO_1 \
-                        and self.b.assumed_type == ASSUMED_0_OR_1:
-                    # [0,1] * {0,1} in (0,1) implies second coefficient must be 1 and first in (0,1)
-                    changed_a = self.a.adjust(ASSUMED_OPEN_INTERVAL_0_TO_1, level + 1, proof)
-                    changed_b = self.b.adjust(ASSUMED_1, level + 1, proof)
-                    return changed_a or changed_b
-                elif self.a.assumed_type == ASSUMED_0_OR_1 \
-                        and self.b.assumed_type == ASSUMED_CLOSED_INTERVAL_0_TO_1:
-                    # {0,1} * [0,1] in (0,1) implies first coefficient must be 1 and second in (0,1)
-                    changed_a = self.a.adjust(ASSUMED_1, level + 1, proof)
-                    changed_b = self.b.adjust(ASSUMED_OPEN_INTERVAL_0_TO_1, level + 1, proof)
-                    return changed_a or changed_b
-                else:
-                    raise Exception("Unhandled product (0,1) assumption combination")
-        elif product == ASSUMED_0:
-            # one of multiplicands must be 0, couple contradictions here
-            if ASSUMED_0 in (self.a.assumed_type, self.b.assumed_type):
-                return False
+    def __str__(self):
+        return self.name + " " + assumed_type_str(self.assumed_type)
 
-            if self.a.assumed_type in (ASSUMED_CLOSED_INTERVAL_0_TO_1, ASSUMED_0_OR_1) and \
-                self.b.assumed_type in (ASSUMED_CLOSED_INTERVAL_0_TO_1, ASSUMED_0_OR_1):
-                return False
 
-            if self.a.assumed_type in (ASSUMED_OPEN_INTERVAL_0_TO_1, ASSUMED_1) \
-                    and self.b.assumed_type in (ASSUMED_OPEN_INTERVAL_0_TO_1, ASSUMED_1):
-                proof.report(level, f"{self.name} = 0, but {self.a} and {self.b} => contradiction")
-                raise Contradiction()
+def reference_multiplication_adjust(multiplication, product, level, proof):
+    # this function propagates product assumption into multiplicands if possible
+    # e.g. 1*a in (0,1) implies that a in (0,1)
+    if product == ASSUMED_OPEN_INTERVAL_0_TO_1:
+        if multiplication.a.assumed_type in (ASSUMED_0, ASSUMED_1, ASSUMED_0_OR_1) \
+                and multiplication.b.assumed_type in (ASSUMED_0, ASSUMED_1, ASSUMED_0_OR_1):
+            # a in {0,1} * b in {0,1} cannot give c in (0,1)
+            proof.report(level, f"{multiplication.name} in (0,1), but {multiplication.a} and {multiplication.b} => contradiction")
+            raise Contradiction()
 
-            proof.report(level, f"{self.name} = 0, but {self.a} and {self.b} =>")
-            if self.a.assumed_type in (ASSUMED_OPEN_INTERVAL_0_TO_1, ASSUMED_1):
-                return self.b.adjust(ASSUMED_0, level + 1, proof)
-            elif self.b.assumed_type in (ASSUMED_OPEN_INTERVAL_0_TO_1, ASSUMED_1):
-                return self.a.adjust(ASSUMED_0, level + 1, proof)
-            else:
-                raise Exception("Unhandled product (0) assumption combination")
-        elif product == ASSUMED_0_OR_1:
-            if self.assumed_type in (ASSUMED_0, ASSUMED_1, ASSUMED_0_OR_1):
-                return False
-
-            if self.assumed_type in (ASSUMED_OPEN_INTERVAL_0_TO_1,):
-                proof.report(level, f"{self.name} in {{0,1}}, but {self} => contradiction")
-                raise Contradiction()
+        if ASSUMED_0 in (multiplication.a.assumed_type, multiplication.b.assumed_type):
+            proof.report(level, f"{multiplication.name} in (0,1), but {multiplication.a} and {multiplication.b} => contradiction")
+            raise Contradiction()
 
-            if self.a.assumed_type == ASSUMED_CLOSED_INTERVAL_0_TO_1 \
-                and self.b.assumed_type == ASSUMED_CLOSED_INTERVAL_0_TO_1:
-                return False
+        if multiplication.a.assumed_type == ASSUMED_0_OR_1 and multiplication.b.assumed_type == ASSUMED_0_OR_1:
+            proof.report(level, f"{multiplication.name} in (0,1), but {multiplication.a} and {multiplication.b} => contradiction")
+            raise Contradiction()
 
-            proof.report(level, f"{self.name} in {{0,1}}, but {self.a} and {self.b} =>")
-            if self.a.assumed_type == ASSUMED_1 and self.b.assumed_type == ASSUMED_CLOSED_INTERVAL_0_TO_1:
-                return self.b.adjust(ASSUMED_0_OR_1, level + 1, proof)
-            elif self.a.assumed_type == ASSUMED_CLOSED_INTERVAL_0_TO_1 and self.b.assumed_type == ASSUMED_1:
-                return self.a.adjust(ASSUMED_0_OR_1, level + 1, proof)
-            elif self.a.assumed_type == ASSUMED_OPEN_INTERVAL_0_TO_1 and self.b.assumed_type == ASSUMED_CLOSED_INTERVAL_0_TO_1:
-                return self.b.adjust(ASSUMED_0, level + 1, proof)
-            elif self.a.assumed_type == ASSUMED_CLOSED_INTERVAL_0_TO_1 and self.b.assumed_type == ASSUMED_OPEN_INTERVAL_0_TO_1:
-                return self.a.adjust(ASSUMED_0, level + 1, proof)
-            elif self.a.assumed_type == ASSUMED_0_OR_1 and self.b.assumed_type == ASSUMED_OPEN_INTERVAL_0_TO_1:
-                return self.a.adjust(ASSUMED_0, level + 1, proof)
-            elif self.a.assumed_type == ASSUMED_OPEN_INTERVAL_0_TO_1 and self.b.assumed_type == ASSUMED_0_OR_1:
-                return self.b.adjust(ASSUMED_0, level + 1, proof)
-            elif self.a.assumed_type == ASSUMED_0_OR_1 and self.b.assumed_type == ASSUMED_CLOSED_INTERVAL_0_TO_1:
-                return False
-            elif self.a.assumed_type == ASSUMED_CLOSED_INTERVAL_0_TO_1 and self.b.assumed_type == ASSUMED_0_OR_1:
-                return False
+        if multiplication.a.assumed_type not in (ASSUMED_OPEN_INTERVAL_0_TO_1, ASSUMED_CLOSED_INTERVAL_0_TO_1) \
+                or multiplication.b.assumed_type not in (ASSUMED_OPEN_INTERVAL_0_TO_1, ASSUMED_CLOSED_INTERVAL_0_TO_1):
+            proof.report(level, f"{multiplication.name} in (0,1), but {multiplication.a} and {multiplication.b} =>")
+            if multiplication.a.assumed_type == ASSUMED_1:
+                # 1*b in (0,1) implies that b in (0,1)
+                return multiplication.b.adjust(ASSUMED_OPEN_INTERVAL_0_TO_1, level + 1, proof)
+            elif multiplication.b.assumed_type == ASSUMED_1:
+                # a*1 in (0,1) implies that a in (0,1)
+                return multiplication.a.adjust(ASSUMED_OPEN_INTERVAL_0_TO_1, level + 1, proof)
+            elif multiplication.a.assumed_type in (ASSUMED_0, ASSUMED_1, ASSUMED_0_OR_1) \
+                    and multiplication.b.assumed_type == ASSUMED_OPEN_INTERVAL_0_TO_1:
+                # {0,1} * (0,1) in (0,1) implies first coefficient must be 1
+                return multiplication.a.adjust(ASSUMED_1, level + 1, proof)
+            elif multiplication.a.assumed_type == ASSUMED_OPEN_INTERVAL_0_TO_1 \
+                    and multiplication.b.assumed_type in (ASSUMED_0, ASSUMED_1, ASSUMED_0_OR_1):
+                # (0,1) * {0,1} in (0,1) implies second coefficient must be 1
+                return multiplication.b.adjust(ASSUMED_1, level + 1, proof)
+            elif multiplication.a.assumed_type == ASSUMED_CLOSED_INTERVAL_0_TO_1 \
+                    and multiplication.b.assumed_type == ASSUMED_0_OR_1:
+                # [0,1] * {0,1} in (0,1) implies second coefficient must be 1 and first in (0,1)
+                changed_a = multiplication.a.adjust(ASSUMED_OPEN_INTERVAL_0_TO_1, level + 1, proof)
+                changed_b = multiplication.b.adjust(ASSUMED_1, level + 1, proof)
+                return changed_a or changed_b
+            elif multiplication.a.assumed_type == ASSUMED_0_OR_1 \
+                    and multiplication.b.assumed_type == ASSUMED_CLOSED_INTERVAL_0_TO_1:
+                # {0,1} * [0,1] in (0,1) implies first coefficient must be 1 and second in (0,1)
+                changed_a = multiplication.a.adjust(ASSUMED_1, level + 1, proof)
+                changed_b = multiplication.b.adjust(ASSUMED_OPEN_INTERVAL_0_TO_1, level + 1, proof)
+                return changed_a or changed_b
             else:
-                raise Exception("Unhandled product {0,1} assumption combination")
+                raise Exception("Unhandled product (0,1) assumption combination")
+    elif product == ASSUMED_0:
+        # one of multiplicands must be 0, couple contradictions here
+        if ASSUMED_0 in (multiplication.a.assumed_type, multiplication.b.assumed_type):
+            return False
 
-        elif product == ASSUMED_CLOSED_INTERVAL_0_TO_1:
-            # everything is in [0,1]
+        if multiplication.a.assumed_type in (ASSUMED_CLOSED_INTERVAL_0_TO_1, ASSUMED_0_OR_1) and \
+            multiplication.b.assumed_type in (ASSUMED_CLOSED_INTERVAL_0_TO_1, ASSUMED_0_OR_1):
             return False
 
-        elif product == ASSUMED_1:
-            if ASSUMED_OPEN_INTERVAL_0_TO_1 in (self.a.assumed_type, self.b.assumed_type):
-                raise Contradiction()
-            if ASSUMED_0 in (self.a.assumed_type, self.b.assumed_type):
-                raise Contradiction()
-            if self.a.assumed_type == ASSUMED_1 and \
-                self.b.assumed_type in (ASSUMED_CLOSED_INTERVAL_0_TO_1, ASSUMED_0_OR_1):
-                self.b.adjust(ASSUMED_1, level + 1, proof)
-                return True
-            if self.b.assumed_type == ASSUMED_1 and \
-                self.a.assumed_type in (ASSUMED_CLOSED_INTERVAL_0_TO_1, ASSUMED_0_OR_1):
-                self.a.adjust(ASSUMED_1, level + 1, proof)
-                return True
+        if multiplication.a.assumed_type in (ASSUMED_OPEN_INTERVAL_0_TO_1, ASSUMED_1) \
+                and multiplication.b.assumed_type in (ASSUMED_OPEN_INTERVAL_0_TO_1, ASSUMED_1):
+            proof.report(level, f"{multiplication.name} = 0, but {multiplication.a} and {multiplication.b} => contradiction")
+            raise Contradiction()
 
+        proof.report(level, f"{multiplication.name} = 0, but {multiplication.a} and {multiplication.b} =>")
+        if multiplication.a.assumed_type in (ASSUMED_OPEN_INTERVAL_0_TO_1, ASSUMED_1):
+            return multiplication.b.adjust(ASSUMED_0, level + 1, proof)
+        elif multiplication.b.assumed_type in (ASSUMED_OPEN_INTERVAL_0_TO_1, ASSUMED_1):
+            return multiplication.a.adjust(ASSUMED_0, level + 1, proof)
         else:
-            raise Exception("Unsupported multiplication output type")
+            raise Exception("Unhandled product (0) assumption combination")
+    elif product == ASSUMED_0_OR_1:
+        if reference_product_assumed_type(multiplication.a.assumed_type, multiplication.b.assumed_type) in (ASSUMED_0, ASSUMED_1, ASSUMED_0_OR_1):
+            return False
+
+        if reference_product_assumed_type(multiplication.a.assumed_type, multiplication.b.assumed_type) in (ASSUMED_OPEN_INTERVAL_0_TO_1,):
+            proof.report(level, f"{multiplication.name} in {{0,1}}, but {multiplication} => contradiction")
+            raise Contradiction()
+
+        if multiplication.a.assumed_type == ASSUMED_CLOSED_INTERVAL_0_TO_1 \
+            and multiplication.b.assumed_type == ASSUMED_CLOSED_INTERVAL_0_TO_1:
+            return False
 
+        proof.report(level, f"{multiplication.name} in {{0,1}}, but {multiplication.a} and {multiplication.b} =>")
+        if multiplication.a.assumed_type == ASSUMED_1 and multiplication.b.assumed_type == ASSUMED_CLOSED_INTERVAL_0_TO_1:
+            return multiplication.b.adjust(ASSUMED_0_OR_1, level + 1, proof)
+        elif multiplication.a.assumed_type == ASSUMED_CLOSED_INTERVAL_0_TO_1 and multiplication.b.assumed_type == ASSUMED_1:
+            return multiplication.a.adjust(ASSUMED_0_OR_1, level + 1, proof)
+        elif multiplication.a.assumed_type == ASSUMED_OPEN_INTERVAL_0_TO_1 and multiplication.b.assumed_type == ASSUMED_CLOSED_INTERVAL_0_TO_1:
+            return multiplication.b.adjust(ASSUMED_0, level + 1, proof)
+        elif multiplication.a.assumed_type == ASSUMED_CLOSED_INTERVAL_0_TO_1 and multiplication.b.assumed_type == ASSUMED_OPEN_INTERVAL_0_TO_1:
+            return multiplication.a.adjust(ASSUMED_0, level + 1, proof)
+        elif multiplication.a.assumed_type == ASSUMED_0_OR_1 and multiplication.b.assumed_type == ASSUMED_OPEN_INTERVAL_0_TO_1:
+            return multiplication.a.adjust(ASSUMED_0, level + 1, proof)
+        elif multiplication.a.assumed_type == ASSUMED_OPEN_INTERVAL_0_TO_1 and multiplication.b.assumed_type == ASSUMED_0_OR_1:
+            return multiplication.b.adjust(ASSUMED_0, level + 1, proof)
+        elif multiplication.a.assumed_type == ASSUMED_0_OR_1 and multiplication.b.assumed_type == ASSUMED_CLOSED_INTERVAL_0_TO_1:
+            return False
+        elif multiplication.a.assumed_type == ASSUMED_CLOSED_INTERVAL_0_TO_1 and multiplication.b.assumed_type == ASSUMED_0_OR_1:
+            return False
+        else:
+            raise Exception("Unhandled product {0,1} assumption combination")
+
+    elif product == ASSUMED_CLOSED_INTERVAL_0_TO_1:
+        # everything is in [0,1]
         return False
 
-    @property
-    def assumed_type(self):
-        if ASSUMED_0 in (self.a.assumed_type, self.b.assumed_type):
-            return ASSUMED_0
-        if self.a.assumed_type == ASSUMED_1:
-            return self.b.assumed_type
-        if self.b.assumed_type == ASSUMED_1:
-            return self.a.assumed_type
-        if ASSUMED_CLOSED_INTERVAL_0_TO_1 in (self.a.assumed_type, self.b.assumed_type):
-            return ASSUMED_CLOSED_INTERVAL_0_TO_1
-        if self.a.assumed_type == ASSUMED_OPEN_INTERVAL_0_TO_1 and self.b.assumed_type == ASSUMED_OPEN_INTERVAL_0_TO_1:
-            return ASSUMED_OPEN_INTERVAL_0_TO_1
-        if self.a.assumed_type == ASSUMED_0_OR_1 and self.b.assumed_type == ASSUMED_0_OR_1:
-            return ASSUMED_0_OR_1
-        # only remaining case is {0,1} * (0,1), which can be anything in [0,1), we abuse [0,1] for it
-        return ASSUMED_CLOSED_INTERVAL_0_TO_1
+    elif product == ASSUMED_1:
+        if ASSUMED_OPEN_INTERVAL_0_TO_1 in (multiplication.a.assumed_type, multiplication.b.assumed_type):
+            raise Contradiction()
+        if ASSUMED_0 in (multiplication.a.assumed_type, multiplication.b.assumed_type):
+            raise Contradiction()
+        if multiplication.a.assumed_type == ASSUMED_1 and \
+            multiplication.b.assumed_type in (ASSUMED_CLOSED_INTERVAL_0_TO_1, ASSUMED_0_OR_1):
+            multiplication.b.adjust(ASSUMED_1, level + 1, proof)
+            return True
+        if multiplication.b.assumed_type == ASSUMED_1 and \
+            multiplication.a.assumed_type in (ASSUMED_CLOSED_INTERVAL_0_TO_1, ASSUMED_0_OR_1):
+            multiplication.a.adjust(ASSUMED_1, level + 1, proof)
+            return True
+
+    else:
+        raise Exception("Unsupported multiplication output type")
+
+    return False
+
+
+ASSUMED_TYPES = (ASSUMED_CLOSED_INTERVAL_0_TO_1, ASSUMED_OPEN_INTERVAL_0_TO_1, ASSUMED_0, ASSUMED_1, ASSUMED_0_OR_1)
+
+# PRODUCT_TYPE[a_type][b_type] is the assumed type of a*b, index 0 is unused
+PRODUCT_TYPE = tuple(tuple(reference_product_assumed_type(a_type, b_type) if a_type and b_type else None
+                           for b_type in range(len(ASSUMED_TYPES) + 1))
+                     for a_type in range(len(ASSUMED_TYPES) + 1))
+
+
+def product_assumed_type(a_type, b_type):
+    return PRODUCT_TYPE[a_type][b_type]
+
+
+class _RecordingProof:
+    def __init__(self):
+        self.messages = []
+
+    def report(self, level, msg):
+        self.messages.append((level, msg))
+
+
+class _RecordingVariable(Variable):
+    # records which adjustment is requested, without applying it
+    def __init__(self, assumed_type, name):
+        super().__init__(assumed_type, name)
+        self.requested = None
+
+    def adjust(self, new_assumed_type, level, proof):
+        self.requested = new_assumed_type
+        return True
+
+
+def _product_adjust_entry(product, a_type, b_type):
+    # run the reference case analysis on placeholder names and turn it into
+    # (report template or None, exception to raise or None, new a type or None, new b type or None)
+    a = _RecordingVariable(a_type, "\x01")
+    b = _RecordingVariable(b_type, "\x02")
+    proof = _RecordingProof()
+    outcome = None
+    try:
+        reference_multiplication_adjust(Multiplication(a, b), product, 0, proof)
+    except Contradiction:
+        outcome = Contradiction
+
+    report = None
+    assert len(proof.messages) <= 1
+    if proof.messages:
+        report = proof.messages[0][1].replace("{", "{{").replace("}", "}}") \
+            .replace("\x01", "{a.name}").replace("\x02", "{b.name}")
+    return report, outcome, a.requested, b.requested
 
-    def __str__(self):
-        return self.name + " " + assumed_type_str(self.assumed_type)
 
+# PRODUCT_ADJUST[product][a_type][b_type], what adjust of a*b to product implies for a and b
+PRODUCT_ADJUST = tuple(tuple(tuple(_product_adjust_entry(product, a_type, b_type) if product and a_type and b_type
+                                   else None
+                                   for b_type in range(len(ASSUMED_TYPES) + 1))
+                             for a_type in range(len(ASSUMED_TYPES) + 1))
+                       for product in range(len(ASSUMED_TYPES) + 1))
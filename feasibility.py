@@ -0,0 +1,138 @@
+import argparse
+import re
+from expressions import ASSUMED_0, ASSUMED_1, ASSUMED_OPEN_INTERVAL_0_TO_1, ASSUMED_CLOSED_INTERVAL_0_TO_1, \
+    ASSUMED_0_OR_1, PRODUCT_TYPE
+
+try:
+    import numpy
+    from numpy.lib.stride_tricks import sliding_window_view
+except ImportError:
+    numpy = None
+
+# numeric search for real coefficients of the templates of potential counterexamples (which a_i, b_j are 0, 1,
+# in (0,1), in {0,1} or in [0,1]) with all the coefficients of R(x)=P(x)Q(x) in {0,1}, from many random points
+# at once refined by projected gradient descent on the distance of the coefficients of R(x) from {0,1}
+# neither outcome is a proof, they only tell which templates need attention
+
+INFEASIBLE = "numerically infeasible"
+FEASIBLE = "likely feasible"
+INCONCLUSIVE = "inconclusive"
+
+# coefficients in (0,1) are kept this far from 0 and 1
+MARGIN = 1e-6
+
+
+def template_types(assumptions):
+    # assumed types of the coefficients of P and Q, and of R where known, None where in {0,1}
+    types_a = [variable.assumed_type for variable in assumptions.assumed_a[:assumptions.deg_p + 1]]
+    types_b = [variable.assumed_type for variable in assumptions.assumed_b[:assumptions.deg_q + 1]]
+    types_r = []
+    for terms in assumptions.index.terms:
+        products = {PRODUCT_TYPE[types_a[i]][types_b[j]] for i, j in terms}
+        if products == {ASSUMED_0}:
+            types_r.append(ASSUMED_0)
+        elif ASSUMED_OPEN_INTERVAL_0_TO_1 in products or ASSUMED_1 in products:
+            types_r.append(ASSUMED_1)
+        else:
+            types_r.append(None)
+    return types_a, types_b, types_r
+
+
+def parse_template(line):
+    # the same from a line of counterexamples.log, the coefficients in {0,1} are written as the ones in [0,1]
+    lists = dict(re.findall(r"(\w+)=\{([^}]*)\}", line))
+
+    def types(name):
+        open_names = set(lists[name + "o"].split(",")) if lists[name + "o"] else set()
+        return [ASSUMED_0 if item == "0" else ASSUMED_1 if item == "1" else
+                ASSUMED_OPEN_INTERVAL_0_TO_1 if item in open_names else ASSUMED_CLOSED_INTERVAL_0_TO_1
+                for item in lists[name].split(",")]
+
+    types_r = [ASSUMED_0 if item == "0" else ASSUMED_1 if item == "1" else None for item in lists["r"].split(",")]
+    return types("p"), types("q"), types_r
+
+
+def _bounds(types, points, rng):
+    # lower and upper bound of each coefficient at each point, the ones in {0,1} are fixed at random per point
+    low = numpy.empty((points, len(types)))
+    high = numpy.empty((points, len(types)))
+    for idx, assumed_type in enumerate(types):
+        if assumed_type == ASSUMED_0_OR_1:
+            low[:, idx] = high[:, idx] = rng.integers(0, 2, points)
+        else:
+            low[:, idx], high[:, idx] = {ASSUMED_0: (0, 0), ASSUMED_1: (1, 1),
+                                         ASSUMED_OPEN_INTERVAL_0_TO_1: (MARGIN, 1 - MARGIN),
+                                         ASSUMED_CLOSED_INTERVAL_0_TO_1: (0, 1)}[assumed_type]
+    return low, high
+
+
+def _product(a, b):
+    # coefficients of R(x) at each point
+    r = numpy.zeros((a.shape[0], a.shape[1] + b.shape[1] - 1))
+    for i in range(a.shape[1]):
+        r[:, i:i + b.shape[1]] += a[:, i:i + 1] * b
+    return r
+
+
+def _deviation(r, types_r):
+    # distance of each coefficient of R(x) from its value, the nearer of 0 and 1 where it is not known
+    target = (r > 0.5).astype(float)
+    for k, assumed_type in enumerate(types_r):
+        if assumed_type is not None:
+            target[:, k] = assumed_type == ASSUMED_1
+    return r - target
+
+
+def classify(types_a, types_b, types_r, points=2048, steps=400, rate=0.1, tolerance=1e-7, infeasible=1e-2, rng=None):
+    # (classification, witness (a, b) or None, relative largest deviation of a coefficient of R(x) at the best point)
+    rng = rng or numpy.random.default_rng(0)
+    low_a, high_a = _bounds(types_a, points, rng)
+    low_b, high_b = _bounds(types_b, points, rng)
+    a = rng.uniform(low_a, high_a)
+    b = rng.uniform(low_b, high_b)
+    for _ in range(steps):
+        deviation = _deviation(_product(a, b), types_r)
+        # gradient of the sum of squared deviations, correlation of the deviations with the other polynomial
+        gradient_a = numpy.einsum("pik,pk->pi", sliding_window_view(deviation, b.shape[1], axis=1), b)
+        gradient_b = numpy.einsum("pjk,pk->pj", sliding_window_view(deviation, a.shape[1], axis=1), a)
+        a = numpy.clip(a - rate * gradient_a, low_a, high_a)
+        b = numpy.clip(b - rate * gradient_b, low_b, high_b)
+    # a deviation that vanishes only as a coefficient in (0,1) goes to 0 or 1 is no solution, the deviation is
+    # measured relative to the distance of the coefficients in (0,1) from 0 and 1
+    largest = numpy.abs(_deviation(_product(a, b), types_r)).max(axis=1) / \
+        numpy.minimum(_distance(a, types_a), _distance(b, types_b))
+    best = int(largest.argmin())
+    if largest[best] <= tolerance:
+        return FEASIBLE, (a[best].tolist(), b[best].tolist()), float(largest[best])
+    if largest[best] >= infeasible:
+        return INFEASIBLE, None, float(largest[best])
+    return INCONCLUSIVE, None, float(largest[best])
+
+
+def _distance(coefficients, types):
+    # distance of the coefficients in (0,1) from 0 and 1 at each point, at most 1
+    open_coefficients = coefficients[:, [assumed_type == ASSUMED_OPEN_INTERVAL_0_TO_1 for assumed_type in types]]
+    return numpy.minimum(open_coefficients, 1 - open_coefficients).min(axis=1, initial=1.0)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Numerically classify templates of potential counterexamples.')
+    parser.add_argument('templates', nargs='?', default='counterexamples.log',
+                        help='file with a template per line, as written by polynomial_factors.py')
+    parser.add_argument('--points', type=int, default=2048, help='number of random starting points per template')
+    parser.add_argument('--steps', type=int, default=400, help='number of gradient steps from each point')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the random starting points')
+    args = parser.parse_args()
+    if numpy is None:
+        parser.error('numpy is required')
+
+    with open(args.templates) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            classification, witness, deviation = classify(*parse_template(line), points=args.points, steps=args.steps,
+                                                          rng=numpy.random.default_rng(args.seed))
+            print(f"{line.strip()} {classification} (relative deviation {deviation:.3g})")
+            if witness is not None:
+                print(f" a={witness[0]}")
+                print(f" b={witness[1]}")
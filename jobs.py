@@ -0,0 +1,117 @@
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+
+class JobQueue:
+    # (deg R, deg P, branch) tasks shared by worker processes through a sqlite database, branch 0 for the whole
+    # case; a worker claims a pending task and keeps its heartbeat while checking it, a task whose worker stopped
+    # beating for timeout seconds is claimed again, up to max_attempts times, after that it is failed
+    # each result is a tuple (no counterexample, output, counterexamples, seconds) as in ResultStore, no
+    # counterexample is None when the task was left undecided
+
+    def __init__(self, path, timeout=120.0, max_attempts=3):
+        self.path = path
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.connection = self._connect()
+        self.connection.execute("CREATE TABLE IF NOT EXISTS jobs ("
+                                "deg_r INTEGER, deg_p INTEGER, branch INTEGER, state TEXT, worker TEXT, "
+                                "heartbeat REAL, attempts INTEGER, result INTEGER, output TEXT, "
+                                "counterexamples TEXT, seconds REAL, PRIMARY KEY (deg_r, deg_p, branch))")
+        self.connection.commit()
+
+    def _connect(self):
+        # autocommit, transactions are started explicitly, waiting for other workers holding the lock
+        return sqlite3.connect(self.path, timeout=60.0, isolation_level=None)
+
+    def add(self, tasks):
+        # tasks already in the queue keep their state
+        self.connection.execute("BEGIN IMMEDIATE")
+        self.connection.executemany("INSERT OR IGNORE INTO jobs (deg_r, deg_p, branch, state, attempts) "
+                                    "VALUES (?, ?, ?, 'pending', 0)",
+                                    [(deg_r, deg_p, branch or 0) for deg_r, deg_p, branch in tasks])
+        self.connection.execute("COMMIT")
+
+    def claim(self, worker):
+        # the next task to check as (deg R, deg P, branch), None when no task can be claimed now
+        now = time.time()
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            self.connection.execute("UPDATE jobs SET state='failed' WHERE state='running' AND heartbeat<? "
+                                    "AND attempts>=?", (now - self.timeout, self.max_attempts))
+            row = self.connection.execute("SELECT deg_r, deg_p, branch FROM jobs WHERE state='pending' "
+                                          "OR (state='running' AND heartbeat<?) "
+                                          "ORDER BY deg_r, deg_p, branch LIMIT 1",
+                                          (now - self.timeout,)).fetchone()
+            if row is not None:
+                self.connection.execute("UPDATE jobs SET state='running', worker=?, heartbeat=?, "
+                                        "attempts=attempts+1 WHERE deg_r=? AND deg_p=? AND branch=?",
+                                        (worker, now) + row)
+        finally:
+            self.connection.execute("COMMIT")
+        if row is None:
+            return None
+        deg_r, deg_p, branch = row
+        return deg_r, deg_p, branch or None
+
+    @contextmanager
+    def heartbeat(self, task, worker, interval=None):
+        # keep the heartbeat of the claimed task from a background thread while the block runs
+        deg_r, deg_p, branch = task
+        stop = threading.Event()
+
+        def beat():
+            connection = self._connect()
+            try:
+                while not stop.wait(interval or self.timeout / 4):
+                    connection.execute("UPDATE jobs SET heartbeat=? WHERE deg_r=? AND deg_p=? AND branch=? "
+                                       "AND worker=? AND state='running'",
+                                       (time.time(), deg_r, deg_p, branch or 0, worker))
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=beat, daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+    def complete(self, task, result):
+        # also when the task was claimed again meanwhile, any worker's result is as good
+        deg_r, deg_p, branch = task
+        found, output, counterexamples, seconds = result
+        self.connection.execute("UPDATE jobs SET state='done', result=?, output=?, counterexamples=?, seconds=? "
+                                "WHERE deg_r=? AND deg_p=? AND branch=?",
+                                (None if found is None else int(found), output, counterexamples, seconds, deg_r,
+                                 deg_p, branch or 0))
+
+    def release(self, task, worker):
+        # give up a claimed task so that it can be claimed again right away, unless it was already claimed
+        # max_attempts times, then it is failed
+        deg_r, deg_p, branch = task
+        self.connection.execute("UPDATE jobs SET state=CASE WHEN attempts>=? THEN 'failed' ELSE 'pending' END "
+                                "WHERE deg_r=? AND deg_p=? AND branch=? AND worker=? AND state='running'",
+                                (self.max_attempts, deg_r, deg_p, branch or 0, worker))
+
+    def unfinished(self, tasks=None):
+        # number of the tasks (all in the queue by default) not done nor failed yet
+        if tasks is None:
+            return self.connection.execute("SELECT COUNT(*) FROM jobs "
+                                           "WHERE state IN ('pending', 'running')").fetchone()[0]
+        return sum(self.get(*task)[0] in ("pending", "running") for task in tasks)
+
+    def get(self, deg_r, deg_p, branch=None):
+        # (state, attempts, result), result as in complete or None when not done
+        state, attempts, found, output, counterexamples, seconds = self.connection.execute(
+            "SELECT state, attempts, result, output, counterexamples, seconds FROM jobs "
+            "WHERE deg_r=? AND deg_p=? AND branch=?", (deg_r, deg_p, branch or 0)).fetchone()
+        if state != "done":
+            return state, attempts, None
+        return state, attempts, (None if found is None else bool(found), output, counterexamples, seconds)
+
+    def close(self):
+        self.connection.close()
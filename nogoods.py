@@ -0,0 +1,97 @@
+from collections import OrderedDict
+from expressions import ASSUMED_TO_DOMAIN, ASSUMED_CLOSED_INTERVAL_0_TO_1
+
+# domain of a coefficient not constrained by a nogood
+UNCONSTRAINED = ASSUMED_TO_DOMAIN[ASSUMED_CLOSED_INTERVAL_0_TO_1]
+
+
+class NogoodStore:
+    # combinations of coefficient domains known to lead to contradiction, learned from contradictions of probes
+    # a nogood is a tuple of (position, domain) pairs, positions index assumed_a + assumed_b, and any state with
+    # each of these coefficients within its domain is contradictory; holds at most size nogoods of a single
+    # (deg P, deg Q) case, least recently used are evicted first
+
+    def __init__(self, size):
+        self.size = size
+        self.case = None
+        self.nogoods = OrderedDict()
+        # position -> nogoods constraining it
+        self.watches = {}
+        self.assumptions = None
+        self.variables = None
+        self.positions = None
+        self.learned = 0
+        self.pruned = 0
+
+    def _use(self, assumptions):
+        if self.case != (assumptions.deg_p, assumptions.deg_q):
+            self.case = (assumptions.deg_p, assumptions.deg_q)
+            self.nogoods.clear()
+            self.watches = {}
+        if self.assumptions is not assumptions:
+            self.assumptions = assumptions
+            self.variables = assumptions.assumed_a + assumptions.assumed_b
+            self.positions = {id(variable): position for position, variable in enumerate(self.variables)}
+
+    def clear(self):
+        self.case = None
+        self.nogoods.clear()
+        self.watches = {}
+
+    def learn(self, assumptions, checkpoint, explanation):
+        # the coefficients at positions in explanation imply contradiction by their current domains, go back through
+        # the trail to checkpoint and replace coefficients narrowed by coefficient rules by the coefficients of
+        # the rule, the ones narrowed otherwise (e.g. by the probed assumption) are taken as they were narrowed
+        self._use(assumptions)
+        trail = assumptions.trail
+        reasons = assumptions.reasons
+        positions = self.positions
+        coefficient_positions = assumptions.index.positions
+        domains = [ASSUMED_TO_DOMAIN[variable.assumed_type] for variable in self.variables]
+        pending = set(explanation)
+        nogood = {}
+        r = len(reasons) - 1
+        for idx in range(len(trail) - 1, checkpoint - 1, -1):
+            variable, assumed_type = trail[idx]
+            position = positions[id(variable)]
+            while r >= 0 and reasons[r][0] > idx:
+                r -= 1
+            if position in pending:
+                if r >= 0 and idx < reasons[r][1]:
+                    pending.update(coefficient_positions[reasons[r][2]])
+                else:
+                    nogood[position] = nogood.get(position, UNCONSTRAINED) & domains[position]
+                    pending.discard(position)
+            domains[position] = ASSUMED_TO_DOMAIN[assumed_type]
+        for position in pending:
+            nogood[position] = nogood.get(position, UNCONSTRAINED) & domains[position]
+
+        nogood = tuple(sorted((position, domain) for position, domain in nogood.items()
+                              if domain != UNCONSTRAINED))
+        if not nogood or nogood in self.nogoods:
+            return
+        self.learned += 1
+        self.nogoods[nogood] = None
+        for position, _ in nogood:
+            self.watches.setdefault(position, set()).add(nogood)
+        if len(self.nogoods) > self.size:
+            evicted, _ = self.nogoods.popitem(last=False)
+            for position, _ in evicted:
+                self.watches[position].discard(evicted)
+
+    def violated(self, assumptions, checkpoint):
+        # whether a nogood constraining a coefficient changed since checkpoint holds in the current state
+        self._use(assumptions)
+        variables = self.variables
+        positions = self.positions
+        changed = {positions[id(variable)] for variable, _ in assumptions.trail[checkpoint:]}
+        for position in changed:
+            for nogood in self.watches.get(position, ()):
+                for other, domain in nogood:
+                    if ASSUMED_TO_DOMAIN[variables[other].assumed_type] & ~domain:
+                        break
+                else:
+                    self.nogoods.move_to_end(nogood)
+                    self.pruned += 1
+                    return True
+        return False
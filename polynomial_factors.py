@@ -1,28 +1,68 @@
 import argparse
-from copy import deepcopy
+import io
+import multiprocessing
+import os
+import socket
+import sys
+import time
+from functools import partial
+from itertools import chain
+from contextlib import redirect_stdout
 from expressions import Variable, Multiplication, ASSUMED_0, ASSUMED_1, ASSUMED_OPEN_INTERVAL_0_TO_1, ASSUMED_CLOSED_INTERVAL_0_TO_1, \
-    ASSUMED_0_OR_1
-from rules import basic_rules, check_remaining_coeffs, check_01_coeffs, check_terms
+    ASSUMED_0_OR_1, ASSUMED_TO_DOMAIN, DOMAIN_TO_ASSUMED, packed_variables, relink_packed_variables, product_assumed_type
+from convolution import convolution_index
+from transpositions import TranspositionTable
+from results import ResultStore
+from jobs import JobQueue
+from stats import RuleStats
+from nogoods import NogoodStore
+import classification
+import sat
+import search
+from rules import propagate, check_remaining_coeffs, check_01_coeffs, check_terms
 from contradiction import Contradiction
-from proof import Proof
+from budget import Budget, BudgetExceeded, limited
+from proof import new_proof
 import proof
-
-counterexamples = open('counterexamples.log','w')
+import rules
+
+counterexamples = None
+packed = False
+# whether proofs are written to proof.output instead of standard output
+proof_file = False
+# ResultStore of cases checked in earlier runs, None to check every case
+results = None
+# assume also the coefficients mirroring the smaller ones than the smallest a_i in (0,1) are in {0,1}
+symmetry = False
+# SAT solver ("builtin" or command of an external one) tried on the states the rules could not rule out,
+# None to not try it
+sat_solver = None
+# directory the CNF of the states the rules could not rule out is written to, None to not write them
+cnf_dir = None
+# heuristic of the depth first search continuing the branches the rules could not rule out, None to not search,
+# and the maximal number of coefficients it branches on, None for no limit
+search_heuristic = None
+search_depth = None
+# (seconds, probes, fixpoints) limits of checking one case and one smallest a_i in (0,1) branch, after which
+# it is left undecided, None for no limits
+case_limits = None
+branch_limits = None
 
 
 class PolynomialProductAssumptions:
 
-    def __init__(self, deg_p, deg_q):
+    def __init__(self, deg_p, deg_q, report=True):
         self.deg_p = deg_p
         self.deg_q = deg_q
         self.deg_r = deg_p + deg_q
-        self.assumed_a = []
-        self.assumed_b = []
-        for i in range(self.deg_p + 1 + 1):
-            self.assumed_a.append(Variable(ASSUMED_CLOSED_INTERVAL_0_TO_1, f"a_{i}"))
-        for i in range(self.deg_q + 1 + 1):
-            self.assumed_b.append(Variable(ASSUMED_CLOSED_INTERVAL_0_TO_1, f"b_{i}"))
-        init_proof = Proof()
+        self.index = convolution_index(deg_p, deg_q)
+        self.trail = []
+        # (start, end, k) trail ranges made by coefficient rules of [x^k]R(x), kept only when learning nogoods
+        self.reasons = []
+        self._create_coefficients()
+        # products[i][j] is a_i*b_j once used, see product
+        self.products = self._create_products()
+        init_proof = new_proof()
         # monic polynomials
         self.assumed_a[self.deg_p].adjust(ASSUMED_1, 2, init_proof)
         self.assumed_b[self.deg_q].adjust(ASSUMED_1, 2, init_proof)
@@ -32,9 +72,62 @@ class PolynomialProductAssumptions:
         # also by pencil/paper argument we have following
         self.assumed_b[self.deg_p].adjust(ASSUMED_0, 2, init_proof)
         self.assumed_b[self.deg_q - self.deg_p].adjust(ASSUMED_0, 2, init_proof)
-        init_proof.print()
+        if report:
+            init_proof.print()
         self.additional_assumptions = []
 
+    def checkpoint(self):
+        return len(self.trail)
+
+    def rollback(self, checkpoint):
+        # undo all the adjustments made since checkpoint, in reverse order
+        trail = self.trail
+        while len(trail) > checkpoint:
+            variable, assumed_type = trail.pop()
+            variable.assumed_type = assumed_type
+        reasons = self.reasons
+        while reasons and reasons[-1][0] >= checkpoint:
+            reasons.pop()
+
+    def state(self):
+        # domains of all the coefficients as a hashable snapshot
+        return bytes(ASSUMED_TO_DOMAIN[variable.assumed_type] for variable in chain(self.assumed_a, self.assumed_b))
+
+    def mirror_state(self, state):
+        # state of the reversed polynomials x^deg_p P(1/x) and x^deg_q Q(1/x), the extra coefficients stay
+        a = self.deg_p + 1
+        b = a + 1 + self.deg_q + 1
+        return state[a - 1::-1] + state[a:a + 1] + state[b - 1:a:-1] + state[b:]
+
+    def restore_state(self, state):
+        # narrow the coefficients to a state reached from the current one, the changes can be rolled back
+        for variable, domain in zip(chain(self.assumed_a, self.assumed_b), state):
+            assumed_type = DOMAIN_TO_ASSUMED[domain]
+            if variable.assumed_type != assumed_type:
+                self.trail.append((variable, variable.assumed_type))
+                variable.assumed_type = assumed_type
+
+    def _create_coefficients(self):
+        self.assumed_a = []
+        self.assumed_b = []
+        for i in range(self.deg_p + 1 + 1):
+            self.assumed_a.append(Variable(ASSUMED_CLOSED_INTERVAL_0_TO_1, f"a_{i}", self.trail,
+                                           self.index.coeffs_a[i]))
+        for i in range(self.deg_q + 1 + 1):
+            self.assumed_b.append(Variable(ASSUMED_CLOSED_INTERVAL_0_TO_1, f"b_{i}", self.trail,
+                                           self.index.coeffs_b[i]))
+
+    def _create_products(self):
+        return [[None] * len(self.assumed_b) for _ in self.assumed_a]
+
+    def product(self, i, j):
+        # a_i*b_j, the same expression every time it is used by the rules
+        row = self.products[i]
+        product = row[j]
+        if product is None:
+            product = row[j] = Multiplication(self.assumed_a[i], self.assumed_b[j])
+        return product
+
     def __str__(self):
         # # print all the non-trivial assumptions
         # res = ""
@@ -104,19 +197,18 @@ class PolynomialProductAssumptions:
             ones_idxs = []
             zeroes_idxs = []
             zero_or_one_idxs = []
-            for i in range(max(0, k - self.deg_q), min(self.deg_p, k) + 1):
+            for i, j in self.index.terms[k]:
                 # a_i * b_j
-                j = k - i
-                ab_assumption = Multiplication(self.assumed_a[i], self.assumed_b[j])
-                if ab_assumption.assumed_type == ASSUMED_0:
+                ab_type = product_assumed_type(self.assumed_a[i].assumed_type, self.assumed_b[j].assumed_type)
+                if ab_type == ASSUMED_0:
                     zeroes_idxs.append(i)
-                elif ab_assumption.assumed_type == ASSUMED_1:
+                elif ab_type == ASSUMED_1:
                     ones_idxs.append(i)
-                elif ab_assumption.assumed_type == ASSUMED_OPEN_INTERVAL_0_TO_1:
+                elif ab_type == ASSUMED_OPEN_INTERVAL_0_TO_1:
                     open_idxs.append(i)
-                elif ab_assumption.assumed_type == ASSUMED_CLOSED_INTERVAL_0_TO_1:
+                elif ab_type == ASSUMED_CLOSED_INTERVAL_0_TO_1:
                     closed_idxs.append(i)
-                elif ab_assumption.assumed_type == ASSUMED_0_OR_1:
+                elif ab_type == ASSUMED_0_OR_1:
                     zero_or_one_idxs.append(i)
                 else:
                     raise Exception("Unknown assumed type")
@@ -136,11 +228,68 @@ class PolynomialProductAssumptions:
         return res
 
 
-
-
-
-def check_factorization(a, b):
-    proof = Proof()
+class PackedPolynomialProductAssumptions(PolynomialProductAssumptions):
+    # same assumptions, but the domain of each coefficient is a bitmask byte in one buffer per polynomial,
+    # so that a copy of the whole state is two slices instead of deepcopy of all the Variable objects
+
+    def _create_coefficients(self):
+        self.domains_a = bytearray([ASSUMED_TO_DOMAIN[ASSUMED_CLOSED_INTERVAL_0_TO_1]]) * (self.deg_p + 1 + 1)
+        self.domains_b = bytearray([ASSUMED_TO_DOMAIN[ASSUMED_CLOSED_INTERVAL_0_TO_1]]) * (self.deg_q + 1 + 1)
+        self.assumed_a = packed_variables(self.domains_a, "a", self.trail, self.index.coeffs_a)
+        self.assumed_b = packed_variables(self.domains_b, "b", self.trail, self.index.coeffs_b)
+
+    def state(self):
+        return bytes(self.domains_a) + bytes(self.domains_b)
+
+    def __deepcopy__(self, memo):
+        copied = object.__new__(type(self))
+        copied.__dict__.update(self.__dict__)
+        copied.domains_a = self.domains_a[:]
+        copied.domains_b = self.domains_b[:]
+        # the copy starts its own undo log, it cannot be rolled back past the point of copying
+        copied.trail = []
+        copied.reasons = []
+        copied.assumed_a = relink_packed_variables(self.assumed_a, copied.domains_a, copied.trail)
+        copied.assumed_b = relink_packed_variables(self.assumed_b, copied.domains_b, copied.trail)
+        copied.products = copied._create_products()
+        variables = {id(self.domains_a): copied.assumed_a, id(self.domains_b): copied.assumed_b}
+
+        def relink(expression):
+            # point additional assumptions at the copied coefficients
+            if isinstance(expression, Multiplication):
+                return copied.product(expression.a.index, expression.b.index)
+            return variables[id(expression.domains)][expression.index]
+
+        copied.additional_assumptions = [([relink(expression) for expression in assumed_list], assumed)
+                                         for assumed_list, assumed in self.additional_assumptions]
+        return copied
+
+
+def check_factorization(a, b, branch=None):
+    # branch selects a single smallest a_i in (0,1) branch, so that a case can be split between processes,
+    # the header and initial deductions are then reported by the first branch only
+    # returns None when the case was left undecided as it exceeded its budget
+    if not limited(case_limits):
+        return _check_factorization(a, b, branch)
+    case_budget = Budget("case", case_limits)
+    rules.budgets.append(case_budget)
+    try:
+        return _check_factorization(a, b, branch)
+    except BudgetExceeded as exceeded:
+        if rules.stats is not None:
+            rules.stats.count("budget exceeded")
+        print(f" Undecided (budget exceeded) for n={a + b},a={a},b={b}" + (f" branch a_{branch}" if branch else "") +
+              f", {exceeded}, no further branches checked")
+        return None
+    finally:
+        rules.budgets.remove(case_budget)
+
+
+def _check_factorization(a, b, branch):
+    first = branch in (None, 1)
+    if rules.stats is not None:
+        rules.stats.start_case(a, b)
+    proof = new_proof()
     proof.report(1, f"Assuming R(x)=P(x)Q(x) with deg P={a}, deg Q={b}")
     poly_str = ""
     for i in range(a + 1):
@@ -158,57 +307,32 @@ def check_factorization(a, b):
         if i != b:
             poly_str += "+"
     proof.report(1, f"Q(x)={poly_str}")
-    proof.print()
-    assumptions = PolynomialProductAssumptions(a, b)
-
-    contradiction_proof = Proof()
+    if first:
+        proof.print()
+    if packed:
+        assumptions = PackedPolynomialProductAssumptions(a, b, report=first)
+    else:
+        assumptions = PolynomialProductAssumptions(a, b, report=first)
+
+    contradiction_proof = new_proof()
     try:
-        while basic_rules(assumptions, recursive=False, level=2, proof=contradiction_proof):
-            pass
+        propagate(assumptions, level=2, proof=contradiction_proof, recursive=False)
     except Contradiction:
-        contradiction_proof.print()
+        if first:
+            contradiction_proof.print()
         return True
 
-    contradiction_proof.print()
+    if first:
+        contradiction_proof.print()
 
+    decided = True
     for i in range(1, a // 2 + 1):
         # assume a_i in (0,1) for each i is the smallest with this property (hence smaller coefficients in {0,1}
         # and try to reach contradiction for EACH ONE
-        tmp_proof = Proof()
-        try:
-            tmp_assumptions = deepcopy(assumptions)
-            tmp_proof.report(2, f"Assuming {i} is the smallest with a_{i} in (0,1)")
-            tmp_assumptions.assumed_a[i].adjust(ASSUMED_OPEN_INTERVAL_0_TO_1, 3, tmp_proof)
-
-            changed = True
-            while changed:
-                changed = False
-
-                while basic_rules(tmp_assumptions, level=3, proof=tmp_proof):
-                    pass
-
-                # Failed to find contradiction, try separate (0,1) vs {0,1} cases for the other coefficients
-                if check_remaining_coeffs(tmp_assumptions, i, proof=tmp_proof):
-                    changed = True
-
-                while basic_rules(tmp_assumptions, level=3, proof=tmp_proof):
-                    pass
-
-                # still no contradiction... iterate over a_i/b_i which must be in {0,1} and
-                # check where the both possibilities lead to
-                if check_01_coeffs(tmp_assumptions, proof=tmp_proof):
-                    changed = True
-
-                if check_terms(tmp_assumptions, proof=tmp_proof):
-                    changed = True
-
-            print(f" Failed to find contradiction for n={n},a={a},b={b} when assuming"
-                  f" a_{i} in (0,1) is smallest with this property")
-            counterexamples.write(str(tmp_assumptions)+'\n')
-            counterexamples.flush()
-            # return False  # comment this to see all fails for given degree
-        except Contradiction:
-            pass
+        tmp_proof = new_proof()
+        if branch is None or i == branch:
+            if check_branch(assumptions, i, tmp_proof) is None:
+                decided = False
 
         if i != a // 2:
             try:
@@ -217,11 +341,117 @@ def check_factorization(a, b):
             except Contradiction:
                 # probably b_i cannot be 0 or 1, which means we can end it here
                 # all higher a_i's will cause the same contradiction
-                return True
+                if branch is None or i == branch:
+                    tmp_proof.print()
+                return True if decided else None
+
+        if branch is None or i == branch:
+            tmp_proof.print()
+        if i == branch:
+            break
+
+    return True if decided else None
+
+
+def check_branch(assumptions, i, proof):
+    # try to reach contradiction assuming a_i is the smallest coefficient in (0,1), returns whether it was reached,
+    # otherwise the remaining assumptions are reported as potential counterexample, None when the budget was
+    # exceeded before either, the assumptions reached by then are reported too
+    a = assumptions.deg_p
+    b = assumptions.deg_q
+    checkpoint = assumptions.checkpoint()
+    branch_budget = None
+    if limited(branch_limits):
+        branch_budget = Budget("branch", branch_limits)
+        rules.budgets.append(branch_budget)
+    try:
+        proof.report(2, f"Assuming {i} is the smallest with a_{i} in (0,1)")
+        assumptions.assumed_a[i].adjust(ASSUMED_OPEN_INTERVAL_0_TO_1, 3, proof)
+        if symmetry and i > 1:
+            # reversed x^a P(1/x), x^b Q(1/x) are a factorization of x^n R(1/x) too, so the smallest j with
+            # a_j in (0,1) can be assumed to be at most the smallest j with a_{a-j} in (0,1), and as with a_j, b_j
+            # the top coefficients with smaller j have to be in {0,1} as well
+            proof.report(2, f"By symmetry assuming also a_{a}-j, b_{b}-j in {{0,1}} for 0 < j < {i}")
+            for j in range(1, i):
+                assumptions.assumed_a[a - j].adjust(ASSUMED_0_OR_1, 3, proof)
+                assumptions.assumed_b[b - j].adjust(ASSUMED_0_OR_1, 3, proof)
+
+        if search_heuristic is None:
+            sweep(assumptions, i, proof)
+        else:
+            branch_search = search.Search(assumptions, lambda node_proof: sweep(assumptions, i, node_proof),
+                                          search_heuristic, search_depth)
+            try:
+                if branch_search.run(proof):
+                    raise Contradiction()
+                if branch_search.leaf:
+                    proof.report(3, lambda: "Search reached no contradiction assuming also " +
+                                 ", ".join(branch_search.leaf))
+            finally:
+                if rules.stats is not None:
+                    rules.stats.count("search nodes", branch_search.nodes)
+                    rules.stats.count("backjumps", branch_search.backjumps)
+
+        if sat_solver is not None or cnf_dir is not None:
+            cnf = sat.encode(assumptions)
+            if cnf_dir is not None:
+                cnf.comments.append(f"assuming {i} is the smallest with a_{i} in (0,1)")
+                with open(os.path.join(cnf_dir, f"n{a + b}_p{a}_a{i}.cnf"), "w") as f:
+                    cnf.write_dimacs(f)
+            if sat_solver is not None and sat.solve(cnf, sat_solver) is False:
+                proof.report(3, "No values of the coefficients within the assumptions make all terms of all "
+                                "coeffs of R(x) consistent (SAT) => contradiction")
+                raise Contradiction()
+
+        print(f" Failed to find contradiction for n={a + b},a={a},b={b} when assuming"
+              f" a_{i} in (0,1) is smallest with this property")
+        counterexamples.write(str(assumptions)+'\n')
+        counterexamples.flush()
+        return False
+    except Contradiction:
+        return True
+    except BudgetExceeded as exceeded:
+        # any counterexample of this branch fits the assumptions reached so far
+        print(f" Undecided (budget exceeded) for n={a + b},a={a},b={b} when assuming"
+              f" a_{i} in (0,1) is smallest with this property, {exceeded}")
+        counterexamples.write(str(assumptions)+'\n')
+        counterexamples.flush()
+        if exceeded.budget is not branch_budget:
+            # the case budget, no other branch can be checked either
+            raise
+        if rules.stats is not None:
+            rules.stats.count("budget exceeded")
+        return None
+    finally:
+        assumptions.rollback(checkpoint)
+        if branch_budget is not None:
+            rules.budgets.remove(branch_budget)
+
+
+def sweep(assumptions, i, proof):
+    # probe the coefficients of the smallest a_i in (0,1) branch until nothing changes
+    changed = True
+    while changed:
+        changed = False
+
+        propagate(assumptions, level=3, proof=proof)
+
+        # Failed to find contradiction, try separate (0,1) vs {0,1} cases for the other coefficients
+        if check_remaining_coeffs(assumptions, i, proof=proof):
+            changed = True
 
-        tmp_proof.print()
+        propagate(assumptions, level=3, proof=proof)
 
-    return True
+        # still no contradiction... iterate over a_i/b_i which must be in {0,1} and
+        # check where the both possibilities lead to
+        if check_01_coeffs(assumptions, proof=proof):
+            changed = True
+
+        if check_terms(assumptions, proof=proof):
+            changed = True
+
+        # everything reported so far stays in the proof, do not hold it in memory
+        proof.flush()
 
 
 def check_degree(deg_r):
@@ -229,27 +459,334 @@ def check_degree(deg_r):
     # degree of any counterexample >= 5 by paper/pencil proof
     for deg_a in range(6, (deg_r - 1) // 2 + 1):
         deg_b = deg_r - deg_a
-        if not check_factorization(deg_a, deg_b):
+        if not check_case(deg_a, deg_b):
             result = False
             # break  # comment this to see all fails for given degree
     return result
 
 
+def degree_tasks(deg_r, split_branches=False):
+    # independent (deg_r, deg_a, branch) tasks covering check_degree(deg_r), branch None is the whole case
+    tasks = []
+    for deg_a in range(6, (deg_r - 1) // 2 + 1):
+        if split_branches:
+            tasks.extend((deg_r, deg_a, i) for i in range(1, deg_a // 2 + 1))
+        else:
+            tasks.append((deg_r, deg_a, None))
+    return tasks
+
+
+def check_case(deg_a, deg_b, branch=None):
+    # check_factorization, taking the outcome from the result store when the case was checked before
+    if results is None:
+        return check_factorization(deg_a, deg_b, branch)
+    stored = stored_result(deg_a, deg_b, branch)
+    if stored is None:
+        stored = run_case(deg_a, deg_b, branch)
+        store_result(deg_a, deg_b, branch, stored)
+    result, output, lines = stored[:3]
+    sys.stdout.write(output)
+    sys.stdout.flush()
+    counterexamples.write(lines)
+    counterexamples.flush()
+    return result
+
+
+def stored_result(deg_a, deg_b, branch=None):
+    stored = results.get(deg_a, deg_b, branch)
+    if stored is not None:
+        proof_location = stored[4]
+        cached_proof = new_proof()
+        cached_proof.report(1, f"Case deg P={deg_a}, deg Q={deg_b}" + (f", branch a_{branch}" if branch else "") +
+                            " was checked before" + (f", see {proof_location}" if proof_location else ""))
+        cached_proof.print()
+    return stored
+
+
+def store_result(deg_a, deg_b, branch, case_result):
+    if case_result[0] is None:
+        # undecided within the budget, to be checked again
+        return
+    proof_location = os.path.abspath(proof.output_path) if proof.output_path else None
+    results.put(deg_a, deg_b, branch, case_result[:4] + (proof_location,))
+
+
+def run_case(deg_a, deg_b, branch=None):
+    # check_factorization with its output and counterexamples returned instead of written, also the time it took
+    global counterexamples
+    written = counterexamples
+    output = io.StringIO()
+    counterexamples = io.StringIO()
+    start = time.perf_counter()
+    try:
+        with redirect_stdout(output):
+            result = check_factorization(deg_a, deg_b, branch)
+        return result, output.getvalue(), counterexamples.getvalue(), time.perf_counter() - start
+    finally:
+        counterexamples = written
+
+
+def run_task(task):
+    # run one task in a worker process, its output and counterexamples are returned instead of written
+    # so that the parent can merge them in deterministic order
+    deg_r, deg_a, branch = task
+    proof_output = None
+    if proof_file:
+        # proofs go to their own file, collect them separately from the rest of the output
+        proof_output = proof.capture_output()
+    if rules.stats is not None:
+        # stats of this task only, the parent adds them to its own
+        rules.stats = RuleStats()
+    return run_case(deg_a, deg_r - deg_a, branch) + (proof_output and proof_output.getvalue(), rules.stats)
+
+
+def configure(*, report_enabled=False, packed_assumptions=False, incremental=False, proofs_to_file=False,
+              transpositions=0, collect_stats=False, nogoods=0, probe_fixpoints=0, symmetric=False,
+              classification_backend="python", solver=None, cnf_directory=None, heuristic=None, max_search_depth=0,
+              case_budget=None, branch_budget=None):
+    # the defaults turn everything off, worker processes are configured with the same keyword arguments
+    global packed, proof_file, symmetry, sat_solver, cnf_dir, search_heuristic, search_depth, case_limits, \
+        branch_limits
+    proof.report_enabled = report_enabled
+    packed = packed_assumptions
+    rules.incremental = incremental
+    proof_file = proofs_to_file
+    rules.transpositions = TranspositionTable(transpositions) if transpositions > 0 else None
+    rules.stats = RuleStats() if collect_stats else None
+    rules.nogoods = NogoodStore(nogoods) if nogoods > 0 else None
+    rules.explain = nogoods > 0 or heuristic is not None
+    rules.probe_fixpoints = TranspositionTable(probe_fixpoints) if probe_fixpoints > 0 else None
+    symmetry = rules.symmetry = symmetric
+    rules.term_counts = classification.BACKENDS[classification_backend]
+    sat_solver = solver
+    cnf_dir = cnf_directory
+    search_heuristic = heuristic
+    search_depth = max_search_depth or None
+    case_limits = case_budget
+    branch_limits = branch_budget
+
+
+def outcome_settings():
+    # the settings changing which cases are ruled out, results are reused only from runs with the same ones
+    settings = []
+    if symmetry:
+        settings.append("symmetry")
+    if rules.nogoods is not None:
+        settings.append(f"nogoods={rules.nogoods.size}")
+    if sat_solver is not None:
+        settings.append(f"sat-solver={sat_solver}")
+    if search_heuristic is not None:
+        settings.append(f"search={search_heuristic}")
+        if search_depth is not None:
+            settings.append(f"search-depth={search_depth}")
+    return " ".join(settings)
+
+
+def check_degrees_parallel(min_n, max_n, jobs, settings, split_branches=False):
+    tasks = {n: degree_tasks(n, split_branches) for n in range(min_n, max_n + 1)}
+    # cases in the result store are not checked again, the results of the others come in the same order
+    stored = {}
+    if results is not None:
+        for n in tasks:
+            for deg_r, deg_a, branch in tasks[n]:
+                stored[deg_r, deg_a, branch] = results.get(deg_a, deg_r - deg_a, branch)
+    with multiprocessing.Pool(jobs, initializer=partial(configure, **settings)) as pool:
+        checked = pool.imap(run_task, [task for n in tasks for task in tasks[n] if stored.get(task) is None])
+        for n in tasks:
+            print(f"Checking deg R={n}")
+            result = True
+            for task in tasks[n]:
+                deg_r, deg_a, branch = task
+                if stored.get(task) is not None:
+                    task_result, output, lines = stored_result(deg_a, deg_r - deg_a, branch)[:3]
+                    proof_text = None
+                else:
+                    task_result, output, lines, seconds, proof_text, task_stats = next(checked)
+                    if task_stats is not None:
+                        rules.stats.merge(task_stats)
+                    if results is not None:
+                        store_result(deg_a, deg_r - deg_a, branch, (task_result, output, lines, seconds))
+                sys.stdout.write(output)
+                counterexamples.write(lines)
+                if proof_text:
+                    proof.output.write(proof_text)
+                    proof.output.flush()
+                if not task_result:
+                    result = False
+            sys.stdout.flush()
+            counterexamples.flush()
+            if not result:
+                print("Counterexample not ruled out for n =", n)
+
+
+def check_degrees_queued(min_n, max_n, queue, split_branches=False, poll=5.0):
+    # check tasks claimed from the queue shared with other workers until none is left, then report the results
+    # of deg R in min_n..max_n (none when not given, the worker only helps with the tasks already in the queue)
+    tasks = {}
+    if min_n is not None:
+        tasks = {n: degree_tasks(n, split_branches) for n in range(min_n, max_n + 1)}
+        queue.add([task for n in tasks for task in tasks[n]])
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    while True:
+        task = queue.claim(worker)
+        if task is None:
+            if not queue.unfinished():
+                break
+            # the rest is being checked by other workers, their tasks are claimed again if they stop
+            time.sleep(poll)
+            continue
+        deg_r, deg_a, branch = task
+        try:
+            with queue.heartbeat(task, worker):
+                case_result = run_case(deg_a, deg_r - deg_a, branch)
+        except BaseException:
+            queue.release(task, worker)
+            raise
+        queue.complete(task, case_result)
+
+    for n in tasks:
+        print(f"Checking deg R={n}")
+        result = True
+        for deg_r, deg_a, branch in tasks[n]:
+            state, attempts, case_result = queue.get(deg_r, deg_a, branch)
+            if case_result is None:
+                print(f" Checking n={deg_r},a={deg_a},b={deg_r - deg_a}" + (f" branch a_{branch}" if branch else "") +
+                      f" failed in all {attempts} attempts")
+                result = False
+                continue
+            task_result, output, lines = case_result[:3]
+            sys.stdout.write(output)
+            counterexamples.write(lines)
+            if not task_result:
+                result = False
+        sys.stdout.flush()
+        counterexamples.flush()
+        if not result:
+            print("Counterexample not ruled out for n =", n)
+
+
 if __name__ == '__main__':
 
     parser = argparse.ArgumentParser(description='Find polynomials 0,1 factors contradiction.')
     parser.add_argument('--min', type=int, help='minimal degree of R(x)')
     parser.add_argument('--max', type=int, help='maximal degree of R(x)')
     parser.add_argument('-v', '--verbose', action='store_true', default=False, help='detailed report')
+    parser.add_argument('--proof-file', help='stream the detailed report to this file (compressed if it ends '
+                                             'with .gz) instead of standard output, implies --verbose')
+    parser.add_argument('--packed', action='store_true', default=False,
+                        help='keep coefficient domains in packed byte buffers')
+    parser.add_argument('--incremental', action='store_true', default=False,
+                        help='after a pass of basic rules re-check only the coefficients of R(x) whose variables '
+                             'changed instead of rescanning all of them')
+    parser.add_argument('--transpositions', type=int, default=65536,
+                        help='number of propagated states remembered to skip repeated propagation, 0 to disable')
+    parser.add_argument('--classification', choices=classification.available_backends(), default='python',
+                        help='how terms of the coefficients are classified, numpy and bitset classify all of them '
+                             'at once and skip the coefficients no rule applies to')
+    parser.add_argument('--symmetry', action='store_true', default=False,
+                        help='break the symmetry of reversing the polynomials, in the branches and in the '
+                             'transposition table')
+    parser.add_argument('--probe-fixpoints', type=int, default=65536,
+                        help='number of states reached by viable probes remembered to skip probes whose outcome '
+                             'cannot have changed, 0 to disable')
+    parser.add_argument('--nogoods', type=int, default=0,
+                        help='number of contradictory coefficient domain combinations learned from probes and '
+                             'checked before further probes, 0 to disable')
+    parser.add_argument('--sat-solver',
+                        help='"builtin" or the command of an external DIMACS solver (given the CNF file as its last '
+                             'argument) tried on the cases the rules could not rule out')
+    parser.add_argument('--cnf-dir', help='write the CNF of the cases the rules could not rule out to this directory')
+    parser.add_argument('--search', choices=search.HEURISTICS,
+                        help='continue the branches the rules could not rule out by depth first search over the '
+                             'values of the undecided coefficients, branching on the one chosen by this heuristic')
+    parser.add_argument('--search-depth', type=int, default=0,
+                        help='maximal number of coefficients the search branches on, 0 for no limit')
+    for scope in ('case', 'branch'):
+        parser.add_argument(f'--{scope}-seconds', type=float, default=0,
+                            help=f'wall time after which a {scope} is left undecided, 0 for no limit')
+        parser.add_argument(f'--{scope}-probes', type=int, default=0,
+                            help=f'number of probes after which a {scope} is left undecided, 0 for no limit')
+        parser.add_argument(f'--{scope}-fixpoints', type=int, default=0,
+                            help=f'number of propagations to fixpoint after which a {scope} is left undecided, '
+                                 f'0 for no limit')
+    parser.add_argument('--cache', help='sqlite database with the results of already checked cases, '
+                                        'cases found in it are not checked again')
+    parser.add_argument('--queue', help='sqlite database of tasks shared by workers on any number of machines, the tasks '
+                                        'of --min..--max are added to it, without them the worker only checks the '
+                                        'tasks already in it')
+    parser.add_argument('--heartbeat-timeout', type=float, default=120.0,
+                        help='seconds after which a queued task of a worker that stopped is checked again')
+    parser.add_argument('--max-attempts', type=int, default=3,
+                        help='number of times a queued task is checked again before it is given up')
+    parser.add_argument('--stats', action='store_true', default=False,
+                        help='print calls, contradictions and time of each rule at the end')
+    parser.add_argument('--stats-json', help='write calls, contradictions and time of each rule per case to this file')
+    parser.add_argument('-j', '--jobs', type=int, default=1, help='number of worker processes')
+    parser.add_argument('--split-branches', action='store_true', default=False,
+                        help='with --jobs, distribute also the smallest a_i in (0,1) branches of each case')
+    parser.add_argument('--probe-jobs', type=int, default=1,
+                        help='number of worker processes evaluating hypothesis probes of a single case')
     args = parser.parse_args()
+    if args.jobs > 1 and args.probe_jobs > 1:
+        parser.error('--jobs and --probe-jobs cannot be combined')
+    if args.cache and args.verbose and not args.proof_file:
+        parser.error('--cache cannot reproduce the detailed report, use --proof-file instead of --verbose')
+    if args.queue and (args.jobs > 1 or args.cache or args.proof_file):
+        parser.error('--queue cannot be combined with --jobs, --cache or --proof-file')
+    if args.sat_solver is not None and sat.solver_missing(args.sat_solver):
+        parser.error(f'--sat-solver {args.sat_solver!r} is neither "builtin" nor a command that can be found')
+    if (args.min is None) != (args.max is None) or (args.queue is None and args.min is None):
+        parser.error('--min and --max are required, except for a --queue worker not adding tasks')
 
     min_n = args.min
     max_n = args.max
-    proof.report_enabled = args.verbose
-
-    for n in range(min_n, max_n + 1):
-        print(f"Checking deg R={n}")
-        if not check_degree(n):
-            print("Counterexample not ruled out for n =", n)
-        # print()
-        # report(0, "")
+    settings = dict(report_enabled=args.verbose or bool(args.proof_file), packed_assumptions=args.packed,
+                    incremental=args.incremental, proofs_to_file=bool(args.proof_file),
+                    transpositions=args.transpositions, collect_stats=args.stats or bool(args.stats_json),
+                    nogoods=args.nogoods, probe_fixpoints=args.probe_fixpoints, symmetric=args.symmetry,
+                    classification_backend=args.classification, solver=args.sat_solver, cnf_directory=args.cnf_dir,
+                    heuristic=args.search, max_search_depth=args.search_depth,
+                    case_budget=(args.case_seconds, args.case_probes, args.case_fixpoints),
+                    branch_budget=(args.branch_seconds, args.branch_probes, args.branch_fixpoints))
+    configure(**settings)
+    if args.cnf_dir:
+        os.makedirs(args.cnf_dir, exist_ok=True)
+    if min_n is not None:
+        # a --queue worker without --min/--max reports nothing, it must not truncate the log of the one that does
+        counterexamples = open('counterexamples.log', 'w')
+    if args.proof_file:
+        proof.open_output(args.proof_file)
+    if args.cache:
+        results = ResultStore(args.cache, rules.RULES_VERSION, outcome_settings())
+
+    if args.probe_jobs > 1:
+        rules.probe_pool = multiprocessing.Pool(args.probe_jobs, initializer=partial(configure, **settings))
+        rules.probe_jobs = args.probe_jobs
+
+    if args.queue:
+        queue = JobQueue(args.queue, args.heartbeat_timeout, args.max_attempts)
+        check_degrees_queued(min_n, max_n, queue, args.split_branches)
+        queue.close()
+    elif args.jobs > 1:
+        check_degrees_parallel(min_n, max_n, args.jobs, settings, args.split_branches)
+    else:
+        for n in range(min_n, max_n + 1):
+            print(f"Checking deg R={n}")
+            if not check_degree(n):
+                print("Counterexample not ruled out for n =", n)
+            # print()
+            # report(0, "")
+
+    if rules.probe_pool is not None:
+        rules.probe_pool.close()
+        rules.probe_pool.join()
+
+    if args.stats:
+        print(rules.stats.summary())
+    if args.stats_json:
+        rules.stats.write_json(args.stats_json)
+
+    if proof.output is not None:
+        proof.output.close()
+    if results is not None:
+        results.close()
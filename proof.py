@@ -1,20 +1,115 @@
+import gzip
+import io
+import sys
+
 report_enabled = True
+# stream the printed proofs go to, None for standard output
+output = None
+output_path = None
+
+
+def open_output(path):
+    # proofs can get large, .gz files are compressed
+    global output, output_path
+    output_path = path
+    if path.endswith(".gz"):
+        output = gzip.open(path, "wt")
+    else:
+        output = open(path, "w")
+    return output
+
+
+# outputs inherited by forked worker processes and replaced there, never closed or collected in them, as that
+# would write into the file of the parent (the gzip trailer at least)
+_inherited = []
+
+
+def capture_output():
+    # in a worker process, collect the proofs in memory instead of the output inherited from the parent
+    global output
+    if output is not None and not isinstance(output, io.StringIO):
+        _inherited.append(output)
+    output = io.StringIO()
+    return output
+
+
+def _write(text):
+    stream = sys.stdout if output is None else output
+    stream.write(text)
+    stream.flush()
 
 
 class Proof:
+    enabled = True
+
     def __init__(self):
-        self.msg = ""
+        self.lines = []
+        self.flushed = False
 
     def report(self, level, msg):
-        self.msg += level * " " + msg + "\n"
+        # msg can be a callable producing the message, so that callers do not format it for a NullProof
+        if callable(msg):
+            msg = msg()
+        self.lines.append(level * " " + msg + "\n")
 
     def append(self, proof):
-        self.msg += proof.msg
+        self.lines.extend(proof.lines)
 
     def append_str(self, str):
-        self.msg += str
+        self.lines.append(str)
+
+    @property
+    def msg(self):
+        return "".join(self.lines)
+
+    def flush(self):
+        # write out the lines so far, they are final once the branch they belong to is resolved; only done when the
+        # proofs have their own file, on standard output they are kept so they still follow the messages printed
+        # about the branch
+        global report_enabled
+        if output is None:
+            return
+        if report_enabled and self.lines:
+            _write(self.msg)
+            self.flushed = True
+        self.lines = []
 
     def print(self):
         global report_enabled
         if report_enabled:
-            print(self.msg.rstrip())
+            msg = self.msg.rstrip()
+            if msg or not self.flushed:
+                _write(msg + "\n")
+        self.lines = []
+
+
+class NullProof:
+    # proof sink for runs without detailed report, discards everything
+    enabled = False
+    lines = ()
+    msg = ""
+
+    def report(self, level, msg):
+        pass
+
+    def append(self, proof):
+        pass
+
+    def append_str(self, str):
+        pass
+
+    def flush(self):
+        pass
+
+    def print(self):
+        pass
+
+
+NULL_PROOF = NullProof()
+
+
+def new_proof():
+    # proofs are only collected when they are going to be reported
+    if report_enabled:
+        return Proof()
+    return NULL_PROOF
@@ -0,0 +1,41 @@
+import sqlite3
+
+
+class ResultStore:
+    # outcomes of already checked cases kept across runs in a sqlite database, keyed by degrees, branch
+    # (0 for the whole case), version of the rules and the settings changing which cases are ruled out, so that
+    # results of older rules or other settings are not reused
+    # each result is a tuple (no counterexample, output, counterexamples, seconds, proof location)
+
+    def __init__(self, path, rules_version, settings=""):
+        self.rules_version = rules_version
+        self.settings = settings
+        self.connection = sqlite3.connect(path)
+        columns = [row[1] for row in self.connection.execute("PRAGMA table_info(results)")]
+        if columns and "settings" not in columns:
+            # results stored before the settings were part of the key, they cannot be told apart
+            self.connection.execute("DROP TABLE results")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS results ("
+                                "deg_p INTEGER, deg_q INTEGER, branch INTEGER, rules_version INTEGER, settings TEXT, "
+                                "result INTEGER, output TEXT, counterexamples TEXT, seconds REAL, proof TEXT, "
+                                "PRIMARY KEY (deg_p, deg_q, branch, rules_version, settings))")
+        self.connection.commit()
+
+    def get(self, deg_p, deg_q, branch=None):
+        row = self.connection.execute("SELECT result, output, counterexamples, seconds, proof FROM results "
+                                      "WHERE deg_p=? AND deg_q=? AND branch=? AND rules_version=? AND settings=?",
+                                      (deg_p, deg_q, branch or 0, self.rules_version, self.settings)).fetchone()
+        if row is None:
+            return None
+        result, output, counterexamples, seconds, proof = row
+        return bool(result), output, counterexamples, seconds, proof
+
+    def put(self, deg_p, deg_q, branch, result):
+        found, output, counterexamples, seconds, proof = result
+        self.connection.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                (deg_p, deg_q, branch or 0, self.rules_version, self.settings, int(found), output,
+                                 counterexamples, seconds, proof))
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
@@ -1,170 +1,431 @@
-from copy import deepcopy
+from functools import wraps
 from itertools import chain
-from expressions import Multiplication, assumed_type_str
+from time import perf_counter
+from expressions import assumed_type_str, PRODUCT_TYPE
 from expressions import ASSUMED_0, ASSUMED_1, ASSUMED_OPEN_INTERVAL_0_TO_1, ASSUMED_CLOSED_INTERVAL_0_TO_1, \
     ASSUMED_0_OR_1
 from contradiction import Contradiction
-from proof import Proof
+from budget import Budget
+from proof import new_proof
 
 
 # following are rules that adjust the assumptions (and eventually should reach contradiction)
-# - each rule should create assumptions copy as necessary, and should eventually output additional possible assumptions
+# - each rule should undo its hypothetical adjustments (see probe), and should eventually output additional possible assumptions
 # - rules should not ideally recursively call any of the other rules, instead they should put their potential assumptions out
 #   and let the outer engine try to find the contradictions
 
-def basic_rules(assumptions, level, proof, recursive=True):
+# version of what the rules can deduce, stored results of older versions are not reused, increase it whenever
+# a rule is added or changed so that it can reach a different outcome
+RULES_VERSION = 2
+
+# re-check only coefficients whose variables changed instead of rescanning all of them on every pass, it does not
+# pay off as every propagation ends with full passes anyway and a change marks most of the coefficients
+incremental = False
+# TranspositionTable of already propagated states, None to always propagate
+transpositions = None
+# share the transpositions of states with the ones of the reversed polynomials
+symmetry = False
+# RuleStats collecting what the rules do, None to not collect them
+stats = None
+# NogoodStore learning from contradictions of probes, None to not learn
+nogoods = None
+# record what coefficient rules changed and which coefficients their contradictions depend on, for learning
+# nogoods and backjumping
+explain = False
+# TranspositionTable of states reached by viable probes, probe -> state, None to always run the probes
+probe_fixpoints = None
+# term_counts backend of classification classifying all the coefficients at once, so that the coefficients
+# no rule applies to are skipped, None to classify each coefficient in the rules
+term_counts = None
+# Budgets of the case and of the branch being checked, charged by each probe and each propagation to fixpoint
+budgets = []
+
+
+def instrumented(name):
+    # with stats, count calls, contradictions raised first in the rule (not in a rule it called) and wall time
+    # of the rule under name
+    def decorate(rule):
+        @wraps(rule)
+        def run(*args, **kwargs):
+            if stats is None:
+                return rule(*args, **kwargs)
+            entry = stats.rule(name)
+            entry[0] += 1
+            start = perf_counter()
+            try:
+                return rule(*args, **kwargs)
+            except Contradiction as contradiction:
+                if getattr(contradiction, "rule", None) is None:
+                    contradiction.rule = name
+                    entry[1] += 1
+                raise
+            finally:
+                entry[2] += perf_counter() - start
+        return run
+    return decorate
+
+
+@instrumented("propagate")
+def propagate(assumptions, level, proof, recursive=True):
+    # run basic rules until nothing changes, same as `while basic_rules(...): pass`, returns whether the reached
+    # state is settled, i.e. the last pass did not narrow anything by the additional assumptions either (basic_rules
+    # does not count that as a change, so another propagation from the reached state could still narrow it)
+    # the rules are deterministic, so a state already propagated leads to the same contradiction or fixpoint,
+    # which is then taken from the table, unless the proof is being reported as it would be missing from it
+    for budget in budgets:
+        budget.charge(fixpoints=1)
+    if transpositions is None or proof.enabled:
+        return _propagate(assumptions, level, proof, recursive)
+
+    # reversing both polynomials maps propagation from a state to propagation from the reversed state,
+    # with symmetry the smaller of the two is looked up and the reached state is reversed back if needed
+    state = assumptions.state()
+    mirrored = False
+    if symmetry:
+        mirrored_state = assumptions.mirror_state(state)
+        if mirrored_state < state:
+            state = mirrored_state
+            mirrored = True
+    key = (assumptions.deg_p, assumptions.deg_q, recursive, state)
+    if key in transpositions:
+        if stats is not None:
+            stats.count("transposition hits")
+        entry = transpositions[key]
+        if entry is None:
+            raise Contradiction()
+        reached, settled = entry
+        assumptions.restore_state(assumptions.mirror_state(reached) if mirrored else reached)
+        assumptions.additional_assumptions = []
+        return settled
+
+    try:
+        settled = _propagate(assumptions, level, proof, recursive)
+    except Contradiction:
+        transpositions[key] = None
+        raise
+    reached = assumptions.state()
+    transpositions[key] = (assumptions.mirror_state(reached) if mirrored else reached, settled)
+    return settled
+
+
+def _propagate(assumptions, level, proof, recursive):
+    trail = assumptions.trail
+    if not incremental:
+        last_pass = len(trail)
+        while basic_rules(assumptions, recursive=recursive, level=level, proof=proof):
+            last_pass = len(trail)
+        return len(trail) == last_pass
+
+    # after a full pass changed something, sweep only over the dirty coefficients in increasing order, a change
+    # marks all the coefficients containing the changed variable, the ones not yet reached in this sweep are handled
+    # in it, the others in the next one, once all are settled another full pass collects additional assumptions
+    # and runs the global rules
+    seen = last_pass = len(trail)
+    while basic_rules(assumptions, recursive=recursive, level=level, proof=proof):
+        # coefficient rules collect additional assumptions too, but only the ones from the full pass are complete
+        assumptions.additional_assumptions = []
+        dirty = bytearray(assumptions.deg_r + 1)
+        seen = _mark_changed(trail, seen, dirty)
+        seen = last_pass = _check_dirty(assumptions, dirty, seen, level, proof)
+    return len(trail) == last_pass
+
+
+@instrumented("dirty_coefficients")
+def _check_dirty(assumptions, dirty, seen, level, proof):
+    # run coefficient rules on dirty coefficients until none is left, returns the new trail position
+    trail = assumptions.trail
+    while any(dirty):
+        for k in range(assumptions.deg_r + 1):
+            if dirty[k]:
+                dirty[k] = 0
+                start = len(trail)
+                try:
+                    coefficient_rules(assumptions, k, level, proof)
+                except Contradiction as contradiction:
+                    if explain:
+                        _explain(assumptions, start, k, contradiction)
+                    raise
+                if explain:
+                    _explain(assumptions, start, k)
+                seen = _mark_changed(trail, seen, dirty)
+    return seen
+
+
+def _mark_changed(trail, seen, dirty):
+    # mark coefficients containing the variables changed since trail position seen
+    for variable, _ in trail[seen:]:
+        for k in variable.coeffs:
+            dirty[k] = 1
+    return len(trail)
+
+
+def probe(assumptions, expression, assumed, level, proof, recursive=True):
+    # assume expression is as said "assumed" and run basic rules until nothing changes, then undo all
+    # the changes (including additional assumptions), returns whether no contradiction was reached
+    if stats is not None:
+        stats.count("probes")
+    for budget in budgets:
+        budget.charge(probes=1)
+    # assumptions only narrow and the rules are monotone, so a probe that reached a settled state without
+    # contradiction still does so from any state containing the reached one, i.e. when nothing it depended on
+    # changed since (the proof of a viable probe is never reported, so it does not matter that it is missing);
+    # a state that is not settled can still be narrowed by the rules, even to contradiction, so it is not remembered
+    key = None
+    if probe_fixpoints is not None:
+        key = (assumptions.deg_p, assumptions.deg_q, expression.name, assumed, recursive)
+        if key in probe_fixpoints and not probe_fixpoints[key] & ~int.from_bytes(assumptions.state(), "little"):
+            if stats is not None:
+                stats.count("reused probes")
+            return True
+    checkpoint = assumptions.checkpoint()
+    additional_assumptions = assumptions.additional_assumptions
+    try:
+        expression.adjust(assumed, level, proof)
+        # a learned nogood is not part of the proof, so it can be used only when no proof is reported
+        if nogoods is not None and not proof.enabled and nogoods.violated(assumptions, checkpoint):
+            if stats is not None:
+                stats.count("nogood prunes")
+            return False
+        settled = propagate(assumptions, level, proof, recursive=recursive)
+        if key is not None and settled:
+            probe_fixpoints[key] = int.from_bytes(assumptions.state(), "little")
+        return True
+    except Contradiction as contradiction:
+        if nogoods is not None and contradiction.explanation is not None:
+            nogoods.learn(assumptions, checkpoint, contradiction.explanation)
+        return False
+    finally:
+        assumptions.rollback(checkpoint)
+        assumptions.additional_assumptions = additional_assumptions
+
+
+# worker processes evaluating independent probes concurrently, None to evaluate them one after another
+probe_pool = None
+probe_jobs = 1
+
+
+def _probes(expression, name, assumed_types):
+    return [(expression, assumed, name) for assumed in assumed_types]
+
+
+def probe_outcomes(assumptions, probes):
+    # evaluate (expression, assumed, name) probes, returns (no contradiction reached, proof) for each
+    outcomes = []
+    for expression, assumed, name in probes:
+        tmp_proof = new_proof()
+        tmp_proof.report(3, lambda: f"Assuming {name} {assumed_type_str(assumed)}")
+        outcomes.append((probe(assumptions, expression, assumed, 3, tmp_proof), tmp_proof))
+    return outcomes
+
+
+def _probe_outcomes_chunk(assumptions, chunk):
+    # runs in a worker on an unpickled copy of the assumptions, the expressions are pickled together with it
+    # so they still refer to its coefficients; also returns the probes and fixpoints of each candidate, so that
+    # the parent can charge its budgets for them
+    outcomes = []
+    for candidate, probes in chunk:
+        counted = Budget("worker", (0, 0, 0))
+        budgets.append(counted)
+        try:
+            outcomes.append((candidate, (probe_outcomes(assumptions, probes), counted.probes, counted.fixpoints)))
+        finally:
+            budgets.remove(counted)
+    return outcomes
+
+
+def probe_candidates(assumptions, candidates, make_probes):
+    # yields (candidate, outcomes) for each candidate in order, make_probes(candidate) gives the probes of candidate
+    # in the current assumptions or None if it is no longer a candidate
+    # with probe_pool the probes of all the remaining candidates are evaluated concurrently in advance, and again
+    # whenever the caller changed the assumptions in between, so the outcomes are the same as when done in order
+    speculated = None
+    state = None
+    for idx, candidate in enumerate(candidates):
+        probes = make_probes(candidate)
+        if probes is None:
+            continue
+        if probe_pool is None:
+            yield candidate, probe_outcomes(assumptions, probes)
+            continue
+
+        if state != assumptions.checkpoint():
+            state = assumptions.checkpoint()
+            remaining = [(candidate, probes)]
+            for later in candidates[idx + 1:]:
+                later_probes = make_probes(later)
+                if later_probes is not None:
+                    remaining.append((later, later_probes))
+            chunks = [(assumptions, remaining[start::probe_jobs]) for start in range(min(probe_jobs, len(remaining)))]
+            speculated = {}
+            for outcomes in probe_pool.starmap(_probe_outcomes_chunk, chunks):
+                speculated.update(outcomes)
+        outcomes, probes_done, fixpoints_done = speculated[candidate]
+        # charged as if done here, only for the candidates the caller gets to
+        for budget in budgets:
+            budget.charge(probes=probes_done, fixpoints=fixpoints_done)
+        yield candidate, outcomes
+
+
+def coefficient_rules(assumptions, k, level, proof):
+    # rules looking only at the terms of coefficient [x^k]R(x)
     changed = False
-    # additional assumptions need to be kept in side assumptions, so that deepcopy will correctly
-    # link all references in temporary instances
-    assumptions.additional_assumptions = []
-    for k in range(assumptions.deg_r + 1):
-        open_idxs = []
-        closed_idxs = []
-        ones_idxs = []
-        zeroes_idxs = []
-        zero_or_one_idxs = []
-        for i in range(max(0, k - assumptions.deg_q), min(assumptions.deg_p, k) + 1):
-            # a_i * b_j
-            j = k - i
-            ab_assumption = Multiplication(assumptions.assumed_a[i], assumptions.assumed_b[j])
-            if ab_assumption.assumed_type == ASSUMED_0:
-                zeroes_idxs.append(i)
-            elif ab_assumption.assumed_type == ASSUMED_1:
-                ones_idxs.append(i)
-            elif ab_assumption.assumed_type == ASSUMED_OPEN_INTERVAL_0_TO_1:
-                open_idxs.append(i)
-            elif ab_assumption.assumed_type == ASSUMED_CLOSED_INTERVAL_0_TO_1:
-                closed_idxs.append(i)
-            elif ab_assumption.assumed_type == ASSUMED_0_OR_1:
-                zero_or_one_idxs.append(i)
-            else:
-                raise Exception("Unknown assumed type")
+    terms = assumptions.index.terms
+    assumed_a = assumptions.assumed_a
+    assumed_b = assumptions.assumed_b
+    open_idxs = []
+    closed_idxs = []
+    ones_idxs = []
+    zeroes_idxs = []
+    zero_or_one_idxs = []
+    for i, j in terms[k]:
+        # a_i * b_j
+        ab_type = PRODUCT_TYPE[assumed_a[i].assumed_type][assumed_b[j].assumed_type]
+        if ab_type == ASSUMED_0:
+            zeroes_idxs.append(i)
+        elif ab_type == ASSUMED_1:
+            ones_idxs.append(i)
+        elif ab_type == ASSUMED_OPEN_INTERVAL_0_TO_1:
+            open_idxs.append(i)
+        elif ab_type == ASSUMED_CLOSED_INTERVAL_0_TO_1:
+            closed_idxs.append(i)
+        elif ab_type == ASSUMED_0_OR_1:
+            zero_or_one_idxs.append(i)
+        else:
+            raise Exception("Unknown assumed type")
+
+    if len(closed_idxs) == 1 and len(open_idxs) == 0 and len(ones_idxs) == 0 and len(zero_or_one_idxs) == 0:
+        # exactly one term, it must be in {0,1}
+        i = closed_idxs[0]
+        j = k - i
+        proof.report(level, lambda:
+                     f"At coeff [x^{k}](R(x)), term a_{i}*b_{j} in [0,1] is the only non-zero term "
+                     f"=> a_{i}*b_{j} in {{0,1}}")
+        product = assumptions.product(i, j)
+        if product.adjust(ASSUMED_0_OR_1, level + 1, proof):
+            changed = True
+
+    if len(open_idxs) == 1:
+        if len(zero_or_one_idxs) > 0:
+            # all of these muse be zero
+            for i in zero_or_one_idxs:
+                j = k - i
+                product = assumptions.product(i, j)
+                if product.adjust(ASSUMED_0, level + 1, proof):
+                    changed = True
 
-        if len(closed_idxs) == 1 and len(open_idxs) == 0 and len(ones_idxs) == 0 and len(zero_or_one_idxs) == 0:
-            # exactly one term, it must be in {0,1}
+        if len(closed_idxs) == 0:
+            # exactly one of summands is in (0,1) and rest gives an integer together
+            i = open_idxs[0]
+            j = k - i
+            proof.report(level, lambda:
+                         f"Term a_{i}*b_{j} is the only non-integer term at coeff [x^{k}](R(x)) => contradiction")
+            raise Contradiction()
+        elif len(closed_idxs) == 1:
+            # exactly one of summands is in (0,1),  rest gives an integer together EXCEPT for one coefficient
+            # then that coefficients must be in (0,1) too, which means both a_i and b_j in it must be (0,1) or 1
             i = closed_idxs[0]
             j = k - i
-            proof.report(level,
-                         f"At coeff [x^{k}](R(x)), term a_{i}*b_{j} in [0,1] is the only non-zero term "
-                         f"=> a_{i}*b_{j} in {{0,1}}")
-            product = Multiplication(assumptions.assumed_a[i], assumptions.assumed_b[j])
-            if product.adjust(ASSUMED_0_OR_1, level + 1, proof):
+            i_open = open_idxs[0]
+            j_open = k - i_open
+            proof.report(level, lambda:
+                         f"At coeff [x^{k}](R(x)), term a_{i_open}*b_{j_open} in (0,1) and a_{i}*b_{j} in [0,1] is the "
+                         f"only possible non-integer term  => a_{i}*b_{j} in (0,1)")
+            product = assumptions.product(i, j)
+            if product.adjust(ASSUMED_OPEN_INTERVAL_0_TO_1, level + 1, proof):
                 changed = True
-
-        if len(open_idxs) == 1:
-            if len(zero_or_one_idxs) > 0:
-                # all of these muse be zero
-                for i in zero_or_one_idxs:
-                    j = k - i
-                    product = Multiplication(assumptions.assumed_a[i], assumptions.assumed_b[j])
-                    if product.adjust(ASSUMED_0, level + 1, proof):
-                        changed = True
-
-            if len(closed_idxs) == 0:
-                # exactly one of summands is in (0,1) and rest gives an integer together
-                i = open_idxs[0]
-                j = k - i
-                proof.report(level,
-                             f"Term a_{i}*b_{j} is the only non-integer term at coeff [x^{k}](R(x)) => contradiction")
-                raise Contradiction()
-            elif len(closed_idxs) == 1:
-                # exactly one of summands is in (0,1),  rest gives an integer together EXCEPT for one coefficient
-                # then that coefficients must be in (0,1) too, which means both a_i and b_j in it must be (0,1) or 1
-                i = closed_idxs[0]
+        else:
+            # one of other summands must be in (0,1)
+            summands = []
+            for i in closed_idxs:
                 j = k - i
-                i_open = open_idxs[0]
-                j_open = k - i_open
-                proof.report(level,
-                             f"At coeff [x^{k}](R(x)), term a_{i_open}*b_{j_open} in (0,1) and a_{i}*b_{j} in [0,1] is the "
-                             f"only possible non-integer term  => a_{i}*b_{j} in (0,1)")
-                product = Multiplication(assumptions.assumed_a[i], assumptions.assumed_b[j])
-                if product.adjust(ASSUMED_OPEN_INTERVAL_0_TO_1, level + 1, proof):
-                    changed = True
-            else:
-                # one of other summands must be in (0,1)
-                summands = []
-                for i in closed_idxs:
-                    j = k - i
-                    summands.append(Multiplication(assumptions.assumed_a[i], assumptions.assumed_b[j]))
-                assumptions.additional_assumptions.append((summands, ASSUMED_OPEN_INTERVAL_0_TO_1))
-
-        if len(ones_idxs) > 1:
-            i1 = ones_idxs[0]
-            j1 = k - i1
-            i2 = ones_idxs[1]
-            j2 = k - i2
-            proof.report(level, f"Coeff [x^{k}](R(x)) >= a_{i1}*b_{j1} + a_{i2}*b_{j2} >= 1 + 1 => contradiction")
-            raise Contradiction()
+                summands.append(assumptions.product(i, j))
+            assumptions.additional_assumptions.append((summands, ASSUMED_OPEN_INTERVAL_0_TO_1))
+
+    if len(ones_idxs) > 1:
+        i1 = ones_idxs[0]
+        j1 = k - i1
+        i2 = ones_idxs[1]
+        j2 = k - i2
+        proof.report(level, lambda: f"Coeff [x^{k}](R(x)) >= a_{i1}*b_{j1} + a_{i2}*b_{j2} >= 1 + 1 => contradiction")
+        raise Contradiction()
+
+    if len(ones_idxs) == 1:
+        # there is 1 in summands, all other terms must be 0
+        if len(terms[k]) > 1:
+            tmp_proof = new_proof()
+            tmp_proof.report(level, lambda: f"Coeff [x^{k}](R(x)) = 1 + ... => all other terms must equal 0")
+            tmp_changed = False
+            try:
+                for i, j in terms[k]:
+                    if i != ones_idxs[0]:
+                        # a_i * b_j
+                        product = assumptions.product(i, j)
+                        if product.adjust(ASSUMED_0, level + 1, proof=tmp_proof):
+                            tmp_changed = True
+                        else:
+                            if assumptions.assumed_a[i].assumed_type != ASSUMED_0 \
+                                    and assumptions.assumed_b[j].assumed_type != ASSUMED_0:
+                                assumptions.additional_assumptions.append(
+                                    ((assumptions.assumed_a[i], assumptions.assumed_b[j]), ASSUMED_0))
+            except Contradiction:
+                proof.append(tmp_proof)
+                raise
 
-        if len(ones_idxs) == 1:
-            # there is 1 in summands, all other terms must be 0
-            min_i = max(0, k - assumptions.deg_q)
-            max_i = min(assumptions.deg_p, k)
-            if max_i - min_i > 0:
-                tmp_proof = Proof()
-                tmp_proof.report(level, f"Coeff [x^{k}](R(x)) = 1 + ... => all other terms must equal 0")
-                tmp_changed = False
-                try:
-                    for i in range(min_i, max_i + 1):
-                        if i != ones_idxs[0]:
-                            # a_i * b_j
-                            j = k - i
-                            product = Multiplication(assumptions.assumed_a[i], assumptions.assumed_b[j])
-                            if product.adjust(ASSUMED_0, level + 1, proof=tmp_proof):
-                                tmp_changed = True
-                            else:
-                                if assumptions.assumed_a[i].assumed_type != ASSUMED_0 \
-                                        and assumptions.assumed_b[j].assumed_type != ASSUMED_0:
-                                    assumptions.additional_assumptions.append(
-                                        ((assumptions.assumed_a[i], assumptions.assumed_b[j]), ASSUMED_0))
-                except Contradiction:
-                    proof.append(tmp_proof)
-                    raise
+            if tmp_changed:
+                proof.append(tmp_proof)
+                changed = True
 
-                if tmp_changed:
-                    proof.append(tmp_proof)
-                    changed = True
+    return changed
+
+
+def _explain(assumptions, start, k, contradiction=None):
+    # remember coefficient k as the reason of the changes its rules made since trail position start,
+    # and of the contradiction they raised, so that nogoods can be learned from them and search can backjump
+    trail = assumptions.trail
+    if len(trail) > start:
+        assumptions.reasons.append((start, len(trail), k))
+    if contradiction is not None and contradiction.explanation is None:
+        contradiction.explanation = assumptions.index.positions[k]
+
+
+def _coefficient_rules_apply(counts, k):
+    # whether coefficient_rules can change anything or collect additional assumptions at [x^k]R(x)
+    open_terms = counts[ASSUMED_OPEN_INTERVAL_0_TO_1][k]
+    ones = counts[ASSUMED_1][k]
+    return open_terms == 1 or ones > 0 or (counts[ASSUMED_CLOSED_INTERVAL_0_TO_1][k] == 1 and open_terms == 0
+                                           and counts[ASSUMED_0_OR_1][k] == 0)
+
+
+@instrumented("basic_rules")
+def basic_rules(assumptions, level, proof, recursive=True):
+    changed = False
+    # additional assumptions need to be kept in side assumptions, so that probes can restore them
+    # when undoing their changes
+    assumptions.additional_assumptions = []
+    trail = assumptions.trail
+    counts = None
+    classified = -1
+    for k in range(assumptions.deg_r + 1):
+        if term_counts is not None:
+            # classified again after every change, so that it is the same as rules classifying the coefficient
+            if classified != len(trail):
+                counts = term_counts(assumptions)
+                classified = len(trail)
+            if not _coefficient_rules_apply(counts, k):
+                continue
+        start = len(trail)
+        try:
+            if coefficient_rules(assumptions, k, level, proof):
+                changed = True
+        except Contradiction as contradiction:
+            if explain:
+                _explain(assumptions, start, k, contradiction)
+            raise
+        if explain:
+            _explain(assumptions, start, k)
 
     if not changed and recursive:
-        # try if additional assumptions fall through
-        for idx_assumptions, (assumed_list, assumed) in enumerate(assumptions.additional_assumptions):
-            # at least one of the items in assumed list must be as said "assumed", try them one by one
-            viable = []
-            msg = ""
-            for idx, assumption in enumerate(assumed_list):
-                msg += assumption.name + " "
-                msg += assumed_type_str(assumed)
-                if idx != len(assumed_list) - 1:
-                    msg += " or "
-            assumption_proof = Proof()
-            assumption_proof.report(level, msg)
-            for idx, assumption in enumerate(assumed_list):
-                tmp_assumptions = deepcopy(assumptions)
-                tmp_proof = Proof()
-                try:
-                    # since this is a copy, we need to link to its objects!
-                    assumption_copy = tmp_assumptions.additional_assumptions[idx_assumptions][0][idx]
-                    tmp_proof.report(level, f"Assuming {assumption_copy.name} {assumed_type_str(assumed)}")
-                    assumption_copy.adjust(assumed, level + 1, tmp_proof)
-                    while basic_rules(tmp_assumptions, recursive=False, level=level + 1, proof=tmp_proof):
-                        pass
-                    # proof += report(level + 1, f"No contradiction")
-                    viable.append(idx)
-                except Contradiction:
-                    assumption_proof.append(tmp_proof)
-                    pass
-            if len(viable) == 0:
-                # not possible
-                assumption_proof.report(level, "All possibilities lead to contradiction => contradiction")
-                proof.append(assumption_proof)
-                raise Contradiction()
-
-            if len(viable) == 1:
-                # that one must satisfy the assumption
-                assumption_proof.report(level, f"Exactly one possibility yields no contradiction => "
-                f"{assumed_list[viable[0]].name} {assumed_type_str(assumed)}")
-                assumed_list[viable[0]].adjust(assumed, level, assumption_proof)
-                proof.append(assumption_proof)
+        check_additional_assumptions(assumptions, level, proof)
 
     if not changed:
         # We still have not found a contradiction, try to find one of a from
@@ -175,108 +436,115 @@ def basic_rules(assumptions, level, proof, recursive=True):
     return changed
 
 
+@instrumented("additional_assumptions")
+def check_additional_assumptions(assumptions, level, proof):
+    # try if additional assumptions fall through
+    for assumed_list, assumed in assumptions.additional_assumptions:
+        # at least one of the items in assumed list must be as said "assumed", try them one by one
+        viable = []
+        assumption_proof = new_proof()
+        assumption_proof.report(level, lambda: " or ".join(f"{assumption.name} {assumed_type_str(assumed)}"
+                                                           for assumption in assumed_list))
+        for idx, assumption in enumerate(assumed_list):
+            tmp_proof = new_proof()
+            tmp_proof.report(level, lambda: f"Assuming {assumption.name} {assumed_type_str(assumed)}")
+            if probe(assumptions, assumption, assumed, level + 1, tmp_proof, recursive=False):
+                # proof += report(level + 1, f"No contradiction")
+                viable.append(idx)
+            else:
+                assumption_proof.append(tmp_proof)
+        if len(viable) == 0:
+            # not possible
+            assumption_proof.report(level, "All possibilities lead to contradiction => contradiction")
+            proof.append(assumption_proof)
+            raise Contradiction()
+
+        if len(viable) == 1:
+            # that one must satisfy the assumption
+            assumption_proof.report(level, lambda: f"Exactly one possibility yields no contradiction => "
+            f"{assumed_list[viable[0]].name} {assumed_type_str(assumed)}")
+            assumed_list[viable[0]].adjust(assumed, level, assumption_proof)
+            proof.append(assumption_proof)
+
+
+@instrumented("check_terms")
 def check_terms(assumptions, proof):
     changed = False
-    # additional assumptions need to be kept in side assumptions, so that deepcopy will correctly
-    # link all references in temporary instances
+    # additional assumptions need to be kept in side assumptions, so that probes can restore them
+    # when undoing their changes
     assumptions.additional_assumptions = []
+    terms = assumptions.index.terms
+    assumed_a = assumptions.assumed_a
+    assumed_b = assumptions.assumed_b
+    trail = assumptions.trail
+    counts = None
+    classified = -1
     for k in range(assumptions.deg_r + 1):
+        if term_counts is not None:
+            if classified != len(trail):
+                counts = term_counts(assumptions)
+                classified = len(trail)
+            if counts[ASSUMED_CLOSED_INTERVAL_0_TO_1][k] == 0 and counts[ASSUMED_0_OR_1][k] == 0:
+                # no term to probe
+                continue
         open_idxs = []
         closed_idxs = []
         ones_idxs = []
         zeroes_idxs = []
         zero_or_one_idxs = []
-        for i in range(max(0, k - assumptions.deg_q), min(assumptions.deg_p, k) + 1):
+        for i, j in terms[k]:
             # a_i * b_j
-            j = k - i
-            ab_assumption = Multiplication(assumptions.assumed_a[i], assumptions.assumed_b[j])
-            if ab_assumption.assumed_type == ASSUMED_0:
+            ab_type = PRODUCT_TYPE[assumed_a[i].assumed_type][assumed_b[j].assumed_type]
+            if ab_type == ASSUMED_0:
                 zeroes_idxs.append(i)
-            elif ab_assumption.assumed_type == ASSUMED_1:
+            elif ab_type == ASSUMED_1:
                 ones_idxs.append(i)
-            elif ab_assumption.assumed_type == ASSUMED_OPEN_INTERVAL_0_TO_1:
+            elif ab_type == ASSUMED_OPEN_INTERVAL_0_TO_1:
                 open_idxs.append(i)
-            elif ab_assumption.assumed_type == ASSUMED_CLOSED_INTERVAL_0_TO_1:
+            elif ab_type == ASSUMED_CLOSED_INTERVAL_0_TO_1:
                 closed_idxs.append(i)
-            elif ab_assumption.assumed_type == ASSUMED_0_OR_1:
+            elif ab_type == ASSUMED_0_OR_1:
                 zero_or_one_idxs.append(i)
             else:
                 raise Exception("Unknown assumed type")
 
-        for i in chain(closed_idxs, zero_or_one_idxs):
+        for i, ((can_be_open, proof1), (can_be_zero, proof2), (can_be_one, proof3)) in probe_candidates(
+                assumptions, list(chain(closed_idxs, zero_or_one_idxs)),
+                lambda i: _probes(assumptions.product(i, k - i), f"a_{i}b_{k - i}",
+                                  (ASSUMED_OPEN_INTERVAL_0_TO_1, ASSUMED_0, ASSUMED_1))):
             j = k - i
 
-            can_be_open = False
-            can_be_zero = False
-            can_be_one = False
-
-            proof1 = Proof()
-            proof2 = Proof()
-            proof3 = Proof()
-            try:
-                tmp_assumptions2 = deepcopy(assumptions)
-                proof1.report(3, f"Assuming a_{i}b_{j} in (0,1)")
-                ab_assumption = Multiplication(tmp_assumptions2.assumed_a[i], tmp_assumptions2.assumed_b[j])
-                ab_assumption.adjust(ASSUMED_OPEN_INTERVAL_0_TO_1, 3, proof1)
-                while basic_rules(tmp_assumptions2, level=3, proof=proof1):
-                    pass
-                can_be_open = True
-            except Contradiction:
-                pass
-
-            try:
-                tmp_assumptions2 = deepcopy(assumptions)
-                proof2.report(3, f"Assuming a_{i}b_{j} = 0")
-                ab_assumption = Multiplication(tmp_assumptions2.assumed_a[i], tmp_assumptions2.assumed_b[j])
-                ab_assumption.adjust(ASSUMED_0, 3, proof2)
-                while basic_rules(tmp_assumptions2, level=3, proof=proof2):
-                    pass
-                can_be_zero = True
-            except Contradiction:
-                pass
-
-            try:
-                tmp_assumptions2 = deepcopy(assumptions)
-                proof3.report(3, f"Assuming a_{i}b_{j} = 1")
-                ab_assumption = Multiplication(tmp_assumptions2.assumed_a[i], tmp_assumptions2.assumed_b[j])
-                ab_assumption.adjust(ASSUMED_1, 3, proof3)
-                while basic_rules(tmp_assumptions2, level=3, proof=proof3):
-                    pass
-                can_be_one = True
-            except Contradiction:
-                pass
-
             if not can_be_open and not can_be_zero and not can_be_one:
                 proof.append(proof1)
                 proof.append(proof2)
                 proof.append(proof3)
-                proof.report(3, f"Coefficient a_{i}b_{j} cannot be in neither (0,1) nor {{0,1}} => contradiction")
+                proof.report(3, lambda: f"Coefficient a_{i}b_{j} cannot be in neither (0,1) nor {{0,1}} => contradiction")
                 raise Contradiction
             elif can_be_open and not can_be_zero and not can_be_one:
                 proof.append(proof2)
                 proof.append(proof3)
-                proof.report(3, f"Coefficient a_{i}b_{j} cannot be in {{0,1}} =>")
-                ab_assumption = Multiplication(assumptions.assumed_a[i], assumptions.assumed_b[j])
+                proof.report(3, lambda: f"Coefficient a_{i}b_{j} cannot be in {{0,1}} =>")
+                ab_assumption = assumptions.product(i, j)
                 if ab_assumption.adjust(ASSUMED_OPEN_INTERVAL_0_TO_1, 3, proof):
                     changed = True
             elif not can_be_open and can_be_zero and not can_be_one:
                 proof.append(proof1)
                 proof.append(proof3)
-                proof.report(3, f"Coefficient a_{i}b_{j} cannot be in (0,1) nor 1 =>")
-                ab_assumption = Multiplication(assumptions.assumed_a[i], assumptions.assumed_b[j])
+                proof.report(3, lambda: f"Coefficient a_{i}b_{j} cannot be in (0,1) nor 1 =>")
+                ab_assumption = assumptions.product(i, j)
                 if ab_assumption.adjust(ASSUMED_0, 3, proof):
                     changed = True
             elif not can_be_open and not can_be_zero and can_be_one:
                 proof.append(proof1)
                 proof.append(proof2)
-                proof.report(3, f"Coefficient a_{i}b_{j} cannot be in (0,1) nor 0 =>")
-                ab_assumption = Multiplication(assumptions.assumed_a[i], assumptions.assumed_b[j])
+                proof.report(3, lambda: f"Coefficient a_{i}b_{j} cannot be in (0,1) nor 0 =>")
+                ab_assumption = assumptions.product(i, j)
                 if ab_assumption.adjust(ASSUMED_1, 3, proof):
                     changed = True
             elif not can_be_open and can_be_zero and can_be_one:
                 proof.append(proof1)
-                proof.report(3, f"Coefficient a_{i}b_{j} cannot be in (0,1) =>")
-                ab_assumption = Multiplication(assumptions.assumed_a[i], assumptions.assumed_b[j])
+                proof.report(3, lambda: f"Coefficient a_{i}b_{j} cannot be in (0,1) =>")
+                ab_assumption = assumptions.product(i, j)
                 if ab_assumption.adjust(ASSUMED_0_OR_1, 3, proof):
                     changed = True
             else:
@@ -285,143 +553,76 @@ def check_terms(assumptions, proof):
     return changed
 
 
+@instrumented("check_remaining_coeffs")
 def check_remaining_coeffs(assumptions, i, proof):
     changed = False
-    for j in range(i + 1, assumptions.deg_p):
-        can_be_open = False
-        can_be_zero = False
-        can_be_one = False
-
-        proof1 = Proof()
-        proof2 = Proof()
-        proof3 = Proof()
-        try:
-            tmp_assumptions2 = deepcopy(assumptions)
-            proof1.report(3, f"Assuming a_{j} in (0,1)")
-            tmp_assumptions2.assumed_a[j].adjust(ASSUMED_OPEN_INTERVAL_0_TO_1, 3, proof1)
-            while basic_rules(tmp_assumptions2, level=3, proof=proof1):
-                pass
-            can_be_open = True
-        except Contradiction:
-            pass
-
-        try:
-            tmp_assumptions2 = deepcopy(assumptions)
-            proof2.report(3, f"Assuming a_{j} = 0")
-            tmp_assumptions2.assumed_a[j].adjust(ASSUMED_0, 3, proof2)
-            while basic_rules(tmp_assumptions2, level=3, proof=proof2):
-                pass
-            can_be_zero = True
-        except Contradiction:
-            pass
-
-        try:
-            tmp_assumptions2 = deepcopy(assumptions)
-            proof3.report(3, f"Assuming a_{j} = 1")
-            tmp_assumptions2.assumed_a[j].adjust(ASSUMED_1, 3, proof3)
-            while basic_rules(tmp_assumptions2, level=3, proof=proof3):
-                pass
-            can_be_one = True
-        except Contradiction:
-            pass
-
+    for j, ((can_be_open, proof1), (can_be_zero, proof2), (can_be_one, proof3)) in probe_candidates(
+            assumptions, range(i + 1, assumptions.deg_p),
+            lambda j: _probes(assumptions.assumed_a[j], f"a_{j}",
+                              (ASSUMED_OPEN_INTERVAL_0_TO_1, ASSUMED_0, ASSUMED_1))):
         if not can_be_open and not can_be_zero and not can_be_one:
             proof.append(proof1)
             proof.append(proof2)
             proof.append(proof3)
-            proof.report(3, f"Coefficient a_{j} cannot be in neither (0,1) nor {{0,1}} => contradiction")
+            proof.report(3, lambda: f"Coefficient a_{j} cannot be in neither (0,1) nor {{0,1}} => contradiction")
             raise Contradiction
         elif can_be_open and not can_be_zero and not can_be_one:
             proof.append(proof2)
             proof.append(proof3)
-            proof.report(3, f"Coefficient a_{j} cannot be in {{0,1}} =>")
+            proof.report(3, lambda: f"Coefficient a_{j} cannot be in {{0,1}} =>")
             if assumptions.assumed_a[j].adjust(ASSUMED_OPEN_INTERVAL_0_TO_1, 3, proof):
                 changed = True
         elif not can_be_open and can_be_zero and not can_be_one:
             proof.append(proof1)
             proof.append(proof3)
-            proof.report(3, f"Coefficient a_{j} cannot be in (0,1) nor 1 =>")
+            proof.report(3, lambda: f"Coefficient a_{j} cannot be in (0,1) nor 1 =>")
             if assumptions.assumed_a[j].adjust(ASSUMED_0, 3, proof):
                 changed = True
         elif not can_be_open and not can_be_zero and can_be_one:
             proof.append(proof1)
             proof.append(proof2)
-            proof.report(3, f"Coefficient a_{j} cannot be in (0,1) nor 0 =>")
+            proof.report(3, lambda: f"Coefficient a_{j} cannot be in (0,1) nor 0 =>")
             if assumptions.assumed_a[j].adjust(ASSUMED_1, 3, proof):
                 changed = True
         elif not can_be_open and can_be_zero and can_be_one:
             proof.append(proof1)
-            proof.report(3, f"Coefficient a_{j} cannot be in (0,1) =>")
+            proof.report(3, lambda: f"Coefficient a_{j} cannot be in (0,1) =>")
             if assumptions.assumed_a[j].adjust(ASSUMED_0_OR_1, 3, proof):
                 changed = True
         else:
             pass
 
-    for j in range(i + 1, assumptions.deg_q):
-        can_be_open = False
-        can_be_zero = False
-        can_be_one = False
-
-        proof1 = Proof()
-        proof2 = Proof()
-        proof3 = Proof()
-        try:
-            tmp_assumptions2 = deepcopy(assumptions)
-            proof1.report(3, f"Assuming b_{j} in (0,1)")
-            tmp_assumptions2.assumed_b[j].adjust(ASSUMED_OPEN_INTERVAL_0_TO_1, 3, proof1)
-            while basic_rules(tmp_assumptions2, level=3, proof=proof1):
-                pass
-            can_be_open = True
-        except Contradiction:
-            pass
-
-        try:
-            tmp_assumptions2 = deepcopy(assumptions)
-            proof2.report(3, f"Assuming b_{j} = 0")
-            tmp_assumptions2.assumed_b[j].adjust(ASSUMED_0, 3, proof2)
-            while basic_rules(tmp_assumptions2, level=3, proof=proof2):
-                pass
-            can_be_zero = True
-        except Contradiction:
-            pass
-
-        try:
-            tmp_assumptions2 = deepcopy(assumptions)
-            proof3.report(3, f"Assuming b_{j} = 1")
-            tmp_assumptions2.assumed_b[j].adjust(ASSUMED_1, 3, proof3)
-            while basic_rules(tmp_assumptions2, level=3, proof=proof3):
-                pass
-            can_be_one = True
-        except Contradiction:
-            pass
-
+    for j, ((can_be_open, proof1), (can_be_zero, proof2), (can_be_one, proof3)) in probe_candidates(
+            assumptions, range(i + 1, assumptions.deg_q),
+            lambda j: _probes(assumptions.assumed_b[j], f"b_{j}",
+                              (ASSUMED_OPEN_INTERVAL_0_TO_1, ASSUMED_0, ASSUMED_1))):
         if not can_be_open and not can_be_zero and not can_be_one:
             proof.append(proof1)
             proof.append(proof2)
             proof.append(proof3)
-            proof.report(3, f"Coefficient b_{j} cannot be in neither (0,1) nor {{0,1}} => contradiction")
+            proof.report(3, lambda: f"Coefficient b_{j} cannot be in neither (0,1) nor {{0,1}} => contradiction")
             raise Contradiction
         elif can_be_open and not can_be_zero and not can_be_one:
             proof.append(proof2)
             proof.append(proof3)
-            proof.report(3, f"Coefficient b_{j} cannot be in {{0,1}} =>")
+            proof.report(3, lambda: f"Coefficient b_{j} cannot be in {{0,1}} =>")
             if assumptions.assumed_b[j].adjust(ASSUMED_OPEN_INTERVAL_0_TO_1, 3, proof):
                 changed = True
         elif not can_be_open and can_be_zero and not can_be_one:
             proof.append(proof1)
             proof.append(proof3)
-            proof.report(3, f"Coefficient b_{j} cannot be in (0,1) nor 1 =>")
+            proof.report(3, lambda: f"Coefficient b_{j} cannot be in (0,1) nor 1 =>")
             if assumptions.assumed_b[j].adjust(ASSUMED_0, 3, proof):
                 changed = True
         elif not can_be_open and not can_be_zero and can_be_one:
             proof.append(proof1)
             proof.append(proof2)
-            proof.report(3, f"Coefficient b_{j} cannot be in (0,1) nor 0 =>")
+            proof.report(3, lambda: f"Coefficient b_{j} cannot be in (0,1) nor 0 =>")
             if assumptions.assumed_b[j].adjust(ASSUMED_1, 3, proof):
                 changed = True
         elif not can_be_open and can_be_zero and can_be_one:
             proof.append(proof1)
-            proof.report(3, f"Coefficient b_{j} cannot be in (0,1) =>")
+            proof.report(3, lambda: f"Coefficient b_{j} cannot be in (0,1) =>")
             if assumptions.assumed_b[j].adjust(ASSUMED_0_OR_1, 3, proof):
                 changed = True
         else:
@@ -430,111 +631,117 @@ def check_remaining_coeffs(assumptions, i, proof):
     return changed
 
 
+@instrumented("check_01_coeffs")
 def check_01_coeffs(assumptions, proof):
     changed = False
-    for j in range(1, assumptions.deg_p):
-        if assumptions.assumed_a[j].assumed_type == ASSUMED_0_OR_1:
-            can_be_one = False
-            can_be_zero = False
-
-            proof1 = Proof()
-            proof2 = Proof()
-            try:
-                tmp_assumptions2 = deepcopy(assumptions)
-                proof1.report(3, f"Assuming a_{j} = 0")
-                tmp_assumptions2.assumed_a[j].adjust(ASSUMED_0, 3, proof1)
-                while basic_rules(tmp_assumptions2, level=3, proof=proof1):
-                    pass
-                can_be_zero = True
-            except Contradiction:
-                pass
-
-            try:
-                tmp_assumptions2 = deepcopy(assumptions)
-                proof2.report(3, f"Assuming_a_{j} = 1")
-                tmp_assumptions2.assumed_a[j].adjust(ASSUMED_1, 3, proof2)
-                while basic_rules(tmp_assumptions2, level=3, proof=proof2):
-                    pass
-                can_be_one = True
-            except Contradiction:
-                pass
-
-            if not can_be_one and not can_be_zero:
-                proof.append(proof1)
-                proof.append(proof2)
-                proof.report(3, f"Coefficient a_{j} in {{0,1}} cannot be in neither 0 nor 1 => contradiction")
-                raise Contradiction
-            elif can_be_one and not can_be_zero:
-                proof.append(proof2)
-                proof.report(3, f"oefficient a_{j} in {{0,1}} cannot be 0 =>")
-                if assumptions.assumed_a[j].adjust(ASSUMED_1, 3, proof):
-                    changed = True
-            elif not can_be_one and can_be_zero:
-                proof.append(proof1)
-                proof.report(3, f"Coefficient a_{j} in {{0,1}} cannot be 1 =>")
-                if assumptions.assumed_a[j].adjust(ASSUMED_0, 3, proof):
-                    changed = True
-            else:
-                pass
-
-    for j in range(1, assumptions.deg_q):
-        if assumptions.assumed_b[j].assumed_type == ASSUMED_0_OR_1:
-            can_be_one = False
-            can_be_zero = False
-
-            proof1 = Proof()
-            proof2 = Proof()
-            try:
-                tmp_assumptions2 = deepcopy(assumptions)
-                proof1.report(3, f"Assuming b_{j} = 0")
-                tmp_assumptions2.assumed_b[j].adjust(ASSUMED_0, 3, proof1)
-                while basic_rules(tmp_assumptions2, level=3, proof=proof1):
-                    pass
-                can_be_zero = True
-            except Contradiction:
-                pass
-
-            try:
-                tmp_assumptions2 = deepcopy(assumptions)
-                proof2.report(3, f"Assuming b_{j} = 1")
-                tmp_assumptions2.assumed_b[j].adjust(ASSUMED_1, 3, proof2)
-                while basic_rules(tmp_assumptions2, level=3, proof=proof2):
-                    pass
-                can_be_one = True
-            except Contradiction:
-                pass
+    for j, ((can_be_zero, proof1), (can_be_one, proof2)) in probe_candidates(
+            assumptions, range(1, assumptions.deg_p),
+            lambda j: _probes(assumptions.assumed_a[j], f"a_{j}", (ASSUMED_0, ASSUMED_1))
+            if assumptions.assumed_a[j].assumed_type == ASSUMED_0_OR_1 else None):
+        if not can_be_one and not can_be_zero:
+            proof.append(proof1)
+            proof.append(proof2)
+            proof.report(3, lambda: f"Coefficient a_{j} in {{0,1}} cannot be in neither 0 nor 1 => contradiction")
+            raise Contradiction
+        elif can_be_one and not can_be_zero:
+            proof.append(proof2)
+            proof.report(3, lambda: f"Coefficient a_{j} in {{0,1}} cannot be 0 =>")
+            if assumptions.assumed_a[j].adjust(ASSUMED_1, 3, proof):
+                changed = True
+        elif not can_be_one and can_be_zero:
+            proof.append(proof1)
+            proof.report(3, lambda: f"Coefficient a_{j} in {{0,1}} cannot be 1 =>")
+            if assumptions.assumed_a[j].adjust(ASSUMED_0, 3, proof):
+                changed = True
+        else:
+            pass
 
-            if not can_be_one and not can_be_zero:
-                proof.append(proof1)
-                proof.append(proof2)
-                proof.report(3, f"Coefficient b_{j} in {{0,1}} cannot be in neither 0 nor 1 => contradiction")
-                raise Contradiction
-            elif can_be_one and not can_be_zero:
-                proof.append(proof2)
-                proof.report(3, f"Coefficient b_{j} in {{0,1}} cannot be 0 =>")
-                if assumptions.assumed_b[j].adjust(ASSUMED_1, 3, proof):
-                    changed = True
-            elif not can_be_one and can_be_zero:
-                proof.append(proof1)
-                proof.report(3, f"Coefficient b_{j} in {{0,1}} cannot be 1 =>")
-                if assumptions.assumed_b[j].adjust(ASSUMED_0, 3, proof):
-                    changed = True
-            else:
-                pass
+    for j, ((can_be_zero, proof1), (can_be_one, proof2)) in probe_candidates(
+            assumptions, range(1, assumptions.deg_q),
+            lambda j: _probes(assumptions.assumed_b[j], f"b_{j}", (ASSUMED_0, ASSUMED_1))
+            if assumptions.assumed_b[j].assumed_type == ASSUMED_0_OR_1 else None):
+        if not can_be_one and not can_be_zero:
+            proof.append(proof1)
+            proof.append(proof2)
+            proof.report(3, lambda: f"Coefficient b_{j} in {{0,1}} cannot be in neither 0 nor 1 => contradiction")
+            raise Contradiction
+        elif can_be_one and not can_be_zero:
+            proof.append(proof2)
+            proof.report(3, lambda: f"Coefficient b_{j} in {{0,1}} cannot be 0 =>")
+            if assumptions.assumed_b[j].adjust(ASSUMED_1, 3, proof):
+                changed = True
+        elif not can_be_one and can_be_zero:
+            proof.append(proof1)
+            proof.report(3, lambda: f"Coefficient b_{j} in {{0,1}} cannot be 1 =>")
+            if assumptions.assumed_b[j].adjust(ASSUMED_0, 3, proof):
+                changed = True
+        else:
+            pass
 
     return changed
 
 
+@instrumented("check_inequalities")
 def check_inequalities(assumptions, proof):
+    # if [x^k]R(x) = a_i1*b_j1 + ... + a_im*b_jm, m >= 2, with all of these in (0,1) and other terms zero,
+    # it must be 1 and it is less than any sum of one factor of each term, so no coefficient [x^k2]R(x) can
+    # have one factor of each term as lone terms (multiplied by 1), it would be > 1
+    terms = assumptions.index.terms
+    positions = assumptions.index.positions
+    types_a = [variable.assumed_type for variable in assumptions.assumed_a]
+    types_b = [variable.assumed_type for variable in assumptions.assumed_b]
+    lone_a = {}  # i -> coefficients having a_i in (0,1) as lone term a_i*1
+    lone_b = {}  # j -> coefficients having b_j in (0,1) as lone term 1*b_j
+    pairs_idxs = []  # (k, pairs (i, j)) for coefficients of form a_i1*b_j1 + ... + a_im*b_jm all from (0,1)
+    for k in range(assumptions.deg_r + 1):
+        pairs = []
+        non_zero = 0
+        for i, j in terms[k]:
+            a_type = types_a[i]
+            b_type = types_b[j]
+            if a_type == ASSUMED_0 or b_type == ASSUMED_0:
+                continue
+            non_zero += 1
+            if a_type == ASSUMED_1:
+                if b_type == ASSUMED_OPEN_INTERVAL_0_TO_1:
+                    lone_b.setdefault(j, set()).add(k)
+            elif a_type == ASSUMED_OPEN_INTERVAL_0_TO_1:
+                if b_type == ASSUMED_1:
+                    lone_a.setdefault(i, set()).add(k)
+                elif b_type == ASSUMED_OPEN_INTERVAL_0_TO_1:
+                    pairs.append((i, j))
+        if len(pairs) >= 2 and non_zero == len(pairs):
+            pairs_idxs.append((k, pairs))
+
+    for k, pairs in pairs_idxs:
+        # coefficients having a factor of each of the terms as lone term
+        candidates = None
+        for i, j in pairs:
+            lone = lone_a.get(i, _NO_COEFFS) | lone_b.get(j, _NO_COEFFS)
+            candidates = lone if candidates is None else candidates & lone
+            if not candidates:
+                break
+        if candidates:
+            k2 = min(candidates)
+            factors = [f"a_{i}" if k2 in lone_a.get(i, _NO_COEFFS) else f"b_{j}" for i, j in pairs]
+            proof.report(3, lambda: f"1=[x^{k}]R(x) = {'+'.join(f'a_{i}b_{j}' for i, j in pairs)} < "
+                                    f"{'+'.join(factors)} + ... = [x^{k2}]R(x) = 1 => contradiction")
+            raise Contradiction(positions[k] + positions[k2])
+
+
+_NO_COEFFS = frozenset()
+
+
+def reference_check_inequalities(assumptions, proof):
+    # original version of check_inequalities for two terms only, kept to test against
     lone_idxs = {}  # list of R(x) coeffs' lone terms, such as a_1+b_3
     two_pairs_idxs = {}  # list of R(x) coeffs that have exactly two terms in form a*b+c*d all from (0,1)
     for k in range(assumptions.deg_r + 1):
         lone_idxs[k] = []
         pairs = []
         non_zero = 0
-        for i in range(max(0, k - assumptions.deg_q), min(assumptions.deg_p, k) + 1):
+        for i, j in assumptions.index.terms[k]:
             # a_i * b_j
-            j = k - i
             if assumptions.assumed_a[i].assumed_type == ASSUMED_1 and \
                     assumptions.assumed_b[j].assumed_type == ASSUMED_OPEN_INTERVAL_0_TO_1:
                 lone_idxs[k].append(('b', j))
@@ -563,19 +770,20 @@ def check_inequalities(assumptions, proof):
 
         for k2 in lone_idxs:
             idxs = lone_idxs[k2]
+            explanation = assumptions.index.positions[k] + assumptions.index.positions[k2]
             if ('a', a) in idxs and ('a', c) in idxs:
-                proof.report(3,
+                proof.report(3, lambda:
                              f"1=[x^{k}]R(x) = a_{a}b_{b}+a_{c}b_{d} < a_{a}+a_{c} + ... = [x^{k2}]R(x) = 1 => contradiction")
-                raise Contradiction()
+                raise Contradiction(explanation)
             elif ('a', a) in idxs and ('b', d) in idxs:
-                proof.report(3,
+                proof.report(3, lambda:
                              f"1=[x^{k}]R(x) = a_{a}b_{b}+a_{c}b_{d} < a_{a}+b_{d} + ... = [x^{k2}]R(x) = 1 => contradiction")
-                raise Contradiction()
+                raise Contradiction(explanation)
             elif ('b', b) in idxs and ('a', c) in idxs:
-                proof.report(3,
+                proof.report(3, lambda:
                              f"1=[x^{k}]R(x) = a_{a}b_{b}+a_{c}b_{d} < b_{b}+a_{c} + ... = [x^{k2}]R(x) = 1 => contradiction")
-                raise Contradiction()
+                raise Contradiction(explanation)
             elif ('b', b) in idxs and ('b', d) in idxs:
-                proof.report(3,
+                proof.report(3, lambda:
                              f"1=[x^{k}]R(x) = a_{a}b_{b}+a_{c}b_{d} < b_{b}+b_{d} + ... = [x^{k2}]R(x) = 1 => contradiction")
-                raise Contradiction()
+                raise Contradiction(explanation)
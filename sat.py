@@ -0,0 +1,95 @@
+import os
+import shlex
+import shutil
+import subprocess
+import tempfile
+from expressions import ASSUMED_TO_DOMAIN, DOMAIN_0, DOMAIN_OPEN_INTERVAL_0_TO_1, DOMAIN_1
+from cdcl import CdclSolver
+
+# the assumptions as a CNF formula, for each coefficient and each term a_i*b_j a boolean variable per value
+# it can take (0, in (0,1), 1), exactly one of them true; the formula keeps the coefficients within their domains,
+# gives the value of each term from the values of its factors and requires of each [x^k]R(x) in {0,1} that
+# - a term = 1 makes all the other terms 0
+# - a term in (0,1) is not the only one, as the rest would be an integer
+# so it is a relaxation of the rules on coefficients: unsatisfiable means contradiction, satisfiable means nothing
+
+VALUES = ((DOMAIN_0, "= 0"), (DOMAIN_OPEN_INTERVAL_0_TO_1, "in (0,1)"), (DOMAIN_1, "= 1"))
+
+
+class Cnf:
+    def __init__(self, comments=()):
+        self.comments = list(comments)
+        self.names = []
+        self.clauses = []
+
+    def values(self, name):
+        # variables of name = 0, in (0,1), = 1, exactly one of them holds
+        first = len(self.names) + 1
+        self.names.extend(f"{name} {value}" for _, value in VALUES)
+        zero, open_interval, one = first, first + 1, first + 2
+        self.clauses.extend(([zero, open_interval, one], [-zero, -open_interval], [-zero, -one],
+                             [-open_interval, -one]))
+        return zero, open_interval, one
+
+    def write_dimacs(self, f):
+        for comment in self.comments:
+            f.write(f"c {comment}\n")
+        for variable, name in enumerate(self.names, 1):
+            f.write(f"c {variable} {name}\n")
+        f.write(f"p cnf {len(self.names)} {len(self.clauses)}\n")
+        for clause in self.clauses:
+            f.write(" ".join(map(str, clause)) + " 0\n")
+
+
+def encode(assumptions):
+    cnf = Cnf([f"R(x)=P(x)Q(x) with deg P={assumptions.deg_p}, deg Q={assumptions.deg_q}"])
+    coefficients = []
+    for variable in assumptions.assumed_a[:assumptions.deg_p + 1] + assumptions.assumed_b[:assumptions.deg_q + 1]:
+        values = cnf.values(variable.name)
+        domain = ASSUMED_TO_DOMAIN[variable.assumed_type]
+        cnf.clauses.extend([-literal] for (value, _), literal in zip(VALUES, values) if not domain & value)
+        coefficients.append(values)
+    a = coefficients[:assumptions.deg_p + 1]
+    b = coefficients[assumptions.deg_p + 1:]
+
+    for k, terms_k in enumerate(assumptions.index.terms):
+        terms = []
+        for i, j in terms_k:
+            zero, open_interval, one = term = cnf.values(f"a_{i}*b_{j}")
+            a_zero, _, a_one = a[i]
+            b_zero, _, b_one = b[j]
+            # 0 iff a factor is 0, 1 iff both are 1, otherwise in (0,1)
+            cnf.clauses.extend(([-zero, a_zero, b_zero], [zero, -a_zero], [zero, -b_zero],
+                                [-one, a_one], [-one, b_one], [one, -a_one, -b_one]))
+            terms.append(term)
+        for n, (_, open_interval, one) in enumerate(terms):
+            others = terms[:n] + terms[n + 1:]
+            cnf.clauses.extend([-one, other[0]] for other in others)
+            cnf.clauses.append([-open_interval] + [other[1] for other in others])
+    return cnf
+
+
+def solver_missing(solver):
+    # whether the external solver command cannot be found, so that it can be reported before any case is checked
+    command = shlex.split(solver)
+    return solver != "builtin" and (not command or shutil.which(command[0]) is None)
+
+
+def solve(cnf, solver="builtin"):
+    # whether cnf is satisfiable, by the bundled CdclSolver or an external DIMACS solver command which gets
+    # the path of the formula as its last argument and reports by exit code 10/20 or an "s ..." line,
+    # None when the external solver does not tell
+    if solver == "builtin":
+        return CdclSolver(len(cnf.names), cnf.clauses).solve() is not None
+    with tempfile.NamedTemporaryFile("w", suffix=".cnf", delete=False) as f:
+        cnf.write_dimacs(f)
+    try:
+        completed = subprocess.run(shlex.split(solver) + [f.name], capture_output=True, text=True)
+    except OSError as error:
+        raise RuntimeError(f"SAT solver {solver!r} could not be run: {error}") from error
+    finally:
+        os.remove(f.name)
+    for line in completed.stdout.splitlines():
+        if line.startswith("s "):
+            return {"SATISFIABLE": True, "UNSATISFIABLE": False}.get(line[2:].strip())
+    return {10: True, 20: False}.get(completed.returncode)
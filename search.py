@@ -0,0 +1,203 @@
+from bisect import bisect_right
+from expressions import ASSUMED_0, ASSUMED_1, ASSUMED_OPEN_INTERVAL_0_TO_1, ASSUMED_CLOSED_INTERVAL_0_TO_1, \
+    ASSUMED_0_OR_1, ASSUMED_TO_DOMAIN, PRODUCT_TYPE, assumed_type_str
+from contradiction import Contradiction
+from proof import new_proof
+
+# values a coefficient is branched on, in the order they are tried
+VALUES = (ASSUMED_0, ASSUMED_1, ASSUMED_OPEN_INTERVAL_0_TO_1)
+UNDECIDED = (ASSUMED_CLOSED_INTERVAL_0_TO_1, ASSUMED_0_OR_1)
+
+
+def undecided_terms(search, undecided):
+    # position -> number of terms a_i*b_j of R(x) it is in which are not known to be 0, 1 or in (0,1)
+    assumptions = search.assumptions
+    deg_p = assumptions.deg_p
+    assumed_a = assumptions.assumed_a
+    assumed_b = assumptions.assumed_b
+    counts = dict.fromkeys(undecided, 0)
+    for terms in assumptions.index.terms:
+        for i, j in terms:
+            if PRODUCT_TYPE[assumed_a[i].assumed_type][assumed_b[j].assumed_type] in UNDECIDED:
+                for position in (i, deg_p + 2 + j):
+                    if position in counts:
+                        counts[position] += 1
+    return counts
+
+
+def in_order(search, undecided):
+    return undecided[0]
+
+
+def most_constrained(search, undecided):
+    # fewest values left, then most undecided terms
+    counts = undecided_terms(search, undecided)
+    return min(undecided, key=lambda position: (bin(ASSUMED_TO_DOMAIN[search.variables[position].assumed_type])
+                                                .count("1"), -counts[position]))
+
+
+def most_terms(search, undecided):
+    counts = undecided_terms(search, undecided)
+    return max(undecided, key=lambda position: counts[position])
+
+
+def fail_first(search, undecided):
+    # most often contradictory when branched on so far in this search, then most undecided terms
+    counts = undecided_terms(search, undecided)
+
+    def score(position):
+        tries, failures = search.failures.get(position, (0, 0))
+        return (failures + 1) / (tries + 2), counts[position]
+
+    return max(undecided, key=score)
+
+
+# name -> heuristic(search, undecided positions) choosing the coefficient to branch on
+HEURISTICS = {
+    "order": in_order,
+    "most-constrained": most_constrained,
+    "most-terms": most_terms,
+    "fail-first": fail_first,
+}
+
+
+class Search:
+    # depth first search over the values of the coefficients still not known to be 0, 1 or in (0,1), each node
+    # runs fixpoint(proof) and branches on the coefficient chosen by heuristic; a subtree fails with the decision
+    # levels its contradiction depends on, {level: depends on more than the decision of level}, and when these
+    # do not include the decision of a node its other values are skipped (backjumping)
+
+    def __init__(self, assumptions, fixpoint, heuristic, max_depth=None):
+        self.assumptions = assumptions
+        self.fixpoint = fixpoint
+        self.choose = HEURISTICS[heuristic]
+        self.max_depth = max_depth
+        self.variables = assumptions.assumed_a + assumptions.assumed_b
+        self.positions = {id(variable): position for position, variable in enumerate(self.variables)}
+        self.candidates = list(range(1, assumptions.deg_p)) + \
+            list(range(assumptions.deg_p + 3, assumptions.deg_p + 2 + assumptions.deg_q))
+        self.root = assumptions.checkpoint()
+        # trail position of the decision of each level
+        self.levels = []
+        # decided coefficient of each level
+        self.decisions = []
+        # "name value" of the decisions of the state without contradiction the search reached, if it did
+        self.leaf = None
+        # position -> (tries, failures) of branching on it
+        self.failures = {}
+        self.nodes = 0
+        self.backjumps = 0
+
+    def run(self, proof):
+        # whether the search reached contradiction, otherwise the assumptions are left as the root node narrowed
+        # them and the decisions of the state without contradiction are kept in leaf, a single leaf does not cover
+        # all the values the searched state allows
+        try:
+            if self._node(0, proof) is not None:
+                return True
+            self.leaf = [f"{variable.name} {assumed_type_str(variable.assumed_type)}" for variable in self.decisions]
+            return False
+        finally:
+            # the decisions are not assumptions of the searched state
+            if self.levels:
+                self.assumptions.rollback(self.levels[0])
+                del self.levels[:]
+                del self.decisions[:]
+
+    def _node(self, depth, proof):
+        # None when a state without contradiction was reached, otherwise the levels the contradiction depends on
+        self.nodes += 1
+        try:
+            self.fixpoint(proof)
+        except Contradiction as contradiction:
+            return self._dependencies(contradiction)
+        undecided = [position for position in self.candidates
+                     if self.variables[position].assumed_type in UNDECIDED]
+        if not undecided or depth == self.max_depth:
+            return None
+
+        assumptions = self.assumptions
+        position = self.choose(self, undecided)
+        variable = self.variables[position]
+        level = 4 + depth
+        domain = ASSUMED_TO_DOMAIN[variable.assumed_type]
+        dependencies = self._narrowed(variable)
+        for value in VALUES:
+            if not ASSUMED_TO_DOMAIN[value] & domain:
+                continue
+            checkpoint = assumptions.checkpoint()
+            self.levels.append(checkpoint)
+            self.decisions.append(variable)
+            # the fixpoint flushes the proof of the child, what came before has to be written out first
+            proof.flush()
+            child_proof = new_proof()
+            child_proof.report(level, lambda: f"Assuming {variable.name} {assumed_type_str(value)}")
+            variable.adjust(value, level, child_proof)
+            child = self._node(depth + 1, child_proof)
+            proof.append(child_proof)
+            if child is None:
+                return None
+            self.levels.pop()
+            self.decisions.pop()
+            assumptions.rollback(checkpoint)
+            tries, failures = self.failures.get(position, (0, 0))
+            self.failures[position] = (tries + 1, failures + 1)
+
+            if not self._depends(child, depth + 1):
+                # the other values would lead to the same contradiction
+                self.backjumps += 1
+                proof.report(level, lambda: f"Contradiction does not depend on {variable.name} => contradiction")
+                return child
+            for child_level, more in child.items():
+                if child_level == depth + 1:
+                    if more:
+                        # something else narrowed at this level, it may depend on any of the levels above
+                        dependencies[depth] = True
+                else:
+                    dependencies[child_level] = dependencies.get(child_level, False) or more
+        proof.report(level, lambda: f"All values of {variable.name} lead to contradiction => contradiction")
+        return dependencies
+
+    def _level(self, idx):
+        return bisect_right(self.levels, idx)
+
+    @staticmethod
+    def _depends(dependencies, level):
+        return any(dependency_level == level or (more and dependency_level > level)
+                   for dependency_level, more in dependencies.items())
+
+    def _narrowed(self, variable):
+        # dependencies of the current domain of variable, the level it was last narrowed at
+        trail = self.assumptions.trail
+        for idx in range(len(trail) - 1, self.root - 1, -1):
+            if trail[idx][0] is variable:
+                return {self._level(idx): True}
+        return {}
+
+    def _dependencies(self, contradiction):
+        # levels of the changes the contradiction follows from, going back through the changes made by
+        # coefficient rules as nogoods are learned, any contradiction without explanation depends on everything
+        assumptions = self.assumptions
+        trail = assumptions.trail
+        if contradiction.explanation is None:
+            return {self._level(len(trail)): True}
+        reasons = assumptions.reasons
+        coefficient_positions = assumptions.index.positions
+        pending = set(contradiction.explanation)
+        dependencies = {}
+        r = len(reasons) - 1
+        for idx in range(len(trail) - 1, self.root - 1, -1):
+            while r >= 0 and reasons[r][0] > idx:
+                r -= 1
+            position = self.positions[id(trail[idx][0])]
+            if position not in pending:
+                continue
+            if r >= 0 and idx < reasons[r][1]:
+                pending.update(coefficient_positions[reasons[r][2]])
+                continue
+            pending.discard(position)
+            level = self._level(idx)
+            if level:
+                decision = self.levels[level - 1] == idx
+                dependencies[level] = dependencies.get(level, False) or not decision
+        return dependencies
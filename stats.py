@@ -0,0 +1,71 @@
+import json
+
+
+class RuleStats:
+    # what the rules did per (deg P, deg Q) case: for each rule its calls, contradictions it raised first
+    # and wall time including the rules it called, and other named counters (probes, passes, ...)
+
+    def __init__(self):
+        self.cases = {}
+        self.rules = None
+        self.counters = None
+        self.start_case(0, 0)
+
+    def start_case(self, deg_p, deg_q):
+        rules, counters = self.cases.setdefault((deg_p, deg_q), ({}, {}))
+        self.rules = rules
+        self.counters = counters
+
+    def rule(self, name):
+        # [calls, contradictions, seconds] of rule name in the current case
+        entry = self.rules.get(name)
+        if entry is None:
+            entry = self.rules[name] = [0, 0, 0.0]
+        return entry
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def merge(self, other):
+        # add stats of other (e.g. collected by a worker process)
+        for (deg_p, deg_q), (rules, counters) in other.cases.items():
+            self.start_case(deg_p, deg_q)
+            for name, (calls, contradictions, seconds) in rules.items():
+                entry = self.rule(name)
+                entry[0] += calls
+                entry[1] += contradictions
+                entry[2] += seconds
+            for name, n in counters.items():
+                self.count(name, n)
+
+    def total(self):
+        # stats of all the cases together
+        total = RuleStats()
+        for (deg_p, deg_q), (rules, counters) in self.cases.items():
+            single = RuleStats()
+            single.cases = {(0, 0): (rules, counters)}
+            total.merge(single)
+        return total.cases[0, 0]
+
+    def as_dict(self):
+        def case_dict(rules, counters):
+            return {"rules": {name: {"calls": calls, "contradictions": contradictions, "seconds": seconds}
+                              for name, (calls, contradictions, seconds) in rules.items()},
+                    "counters": dict(counters)}
+
+        cases = [dict(deg_p=deg_p, deg_q=deg_q, **case_dict(rules, counters))
+                 for (deg_p, deg_q), (rules, counters) in sorted(self.cases.items()) if rules or counters]
+        return {"cases": cases, "total": case_dict(*self.total())}
+
+    def write_json(self, path):
+        with open(path, "w") as f:
+            json.dump(self.as_dict(), f, indent=2)
+
+    def summary(self):
+        rules, counters = self.total()
+        lines = [f"{'rule':24} {'calls':>10} {'contradictions':>15} {'seconds':>10}"]
+        for name, (calls, contradictions, seconds) in sorted(rules.items(), key=lambda item: -item[1][2]):
+            lines.append(f"{name:24} {calls:10} {contradictions:15} {seconds:10.3f}")
+        for name, n in sorted(counters.items()):
+            lines.append(f"{name:24} {n:10}")
+        return "\n".join(lines)
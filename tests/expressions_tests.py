@@ -72,6 +72,39 @@ class RawAssumptionsTestCase(unittest.TestCase):
             self.assertEqual(type, assumption.assumed_type)
             self.assertEqual(expected_name, str(assumption))
 
+class PackedAssumptionsTestCase(unittest.TestCase):
+    def test_adjust_same_as_variable(self):
+        proof = DummyProof()
+        types = [ASSUMED_CLOSED_INTERVAL_0_TO_1, ASSUMED_OPEN_INTERVAL_0_TO_1, ASSUMED_0, ASSUMED_1, ASSUMED_0_OR_1]
+
+        for input_type in types:
+            for output_type in types:
+                variable = Variable(input_type, 'test1')
+                packed = PackedVariable(bytearray([ASSUMED_TO_DOMAIN[input_type]]), 0, 'test1')
+                try:
+                    expected = variable.adjust(output_type, 1, proof)
+                except Contradiction:
+                    with self.assertRaises(Contradiction):
+                        packed.adjust(output_type, 1, proof)
+                    continue
+                self.assertEqual(expected, packed.adjust(output_type, 1, proof))
+                self.assertEqual(variable.assumed_type, packed.assumed_type)
+                self.assertEqual(str(variable), str(packed))
+
+    def test_views_share_buffer(self):
+        proof = DummyProof()
+        domains = bytearray([ASSUMED_TO_DOMAIN[ASSUMED_CLOSED_INTERVAL_0_TO_1]]) * 3
+        variables = packed_variables(domains, 'a')
+        self.assertEqual("a_2", variables[2].name)
+        variables[1].adjust(ASSUMED_0_OR_1, 1, proof)
+
+        copied = domains[:]
+        copied_variables = relink_packed_variables(variables, copied)
+        copied_variables[1].adjust(ASSUMED_1, 1, proof)
+        self.assertEqual(ASSUMED_0_OR_1, variables[1].assumed_type)
+        self.assertEqual(ASSUMED_1, copied_variables[1].assumed_type)
+
+
 class MultipliedAssumptionsTestCase(unittest.TestCase):
     def test_assumed_type_correct(self):
         test_combs = [
@@ -255,5 +288,40 @@ class MultipliedAssumptionsTestCase(unittest.TestCase):
                             self.assertEqual(op2, assumption2.assumed_type)
 
 
+class RecordingProof:
+    def __init__(self):
+        self.messages = []
+
+    def report(self, level, msg):
+        if callable(msg):
+            msg = msg()
+        self.messages.append((level, msg))
+
+
+class ProductTablesTestCase(unittest.TestCase):
+    def test_product_type_table_matches_reference(self):
+        for type1 in ASSUMED_TYPES:
+            for type2 in ASSUMED_TYPES:
+                self.assertEqual(reference_product_assumed_type(type1, type2), PRODUCT_TYPE[type1][type2])
+                product = Multiplication(Variable(type1, 'test1'), Variable(type2, 'test2'))
+                self.assertEqual(reference_product_assumed_type(type1, type2), product.assumed_type)
+
+    def test_adjust_table_matches_reference(self):
+        for new_product_type in ASSUMED_TYPES:
+            for type1 in ASSUMED_TYPES:
+                for type2 in ASSUMED_TYPES:
+                    results = []
+                    for adjust in (reference_multiplication_adjust, Multiplication.adjust):
+                        proof = RecordingProof()
+                        assumption1 = Variable(type1, 'test1')
+                        assumption2 = Variable(type2, 'test2')
+                        try:
+                            ret = adjust(Multiplication(assumption1, assumption2), new_product_type, 1, proof)
+                        except Contradiction:
+                            ret = Contradiction
+                        results.append((ret, assumption1.assumed_type, assumption2.assumed_type, proof.messages))
+                    self.assertEqual(results[0], results[1])
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,37 @@
+import unittest
+from expressions import *
+from polynomial_factors import PolynomialProductAssumptions
+import feasibility
+
+
+@unittest.skipUnless(feasibility.numpy is not None, "numpy is not installed")
+class ClassifyTestCase(unittest.TestCase):
+    def test_integer_factorization_feasible(self):
+        # (1 + a_1 x)(1 + b_1 x) with a_1, b_1 in [0,1] has the coefficients of R(x) in {0,1} for a_1 b_1 = 0
+        classification, witness, _ = feasibility.classify([ASSUMED_1, ASSUMED_CLOSED_INTERVAL_0_TO_1],
+                                                          [ASSUMED_1, ASSUMED_CLOSED_INTERVAL_0_TO_1],
+                                                          [ASSUMED_1, None, None])
+        self.assertEqual(feasibility.FEASIBLE, classification)
+        a, b = witness
+        self.assertAlmostEqual(0, a[1] * b[1])
+
+    def test_open_coefficient_infeasible(self):
+        # a_1 + b_1 in {0,1} and a_1 b_1 in {0,1} only as a_1 goes to 0
+        classification, witness, _ = feasibility.classify([ASSUMED_1, ASSUMED_OPEN_INTERVAL_0_TO_1],
+                                                          [ASSUMED_1, ASSUMED_CLOSED_INTERVAL_0_TO_1],
+                                                          [ASSUMED_1, None, None])
+        self.assertEqual(feasibility.INFEASIBLE, classification)
+        self.assertIsNone(witness)
+
+    def test_parse_template_same_as_assumptions(self):
+        assumptions = PolynomialProductAssumptions(6, 14, report=False)
+        assumptions.assumed_a[1].assumed_type = ASSUMED_0
+        assumptions.assumed_a[2].assumed_type = ASSUMED_OPEN_INTERVAL_0_TO_1
+        assumptions.assumed_b[3].assumed_type = ASSUMED_1
+        types_a, types_b, types_r = feasibility.template_types(assumptions)
+        self.assertEqual((types_a, types_b, types_r), feasibility.parse_template(str(assumptions)))
+        self.assertEqual(ASSUMED_1, types_r[2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import os
+import tempfile
+import time
+import unittest
+from jobs import JobQueue
+
+
+class JobQueueTestCase(unittest.TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".db")
+        os.close(handle)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_claim_complete_release(self):
+        queue = JobQueue(self.path)
+        queue.add([(20, 6, None), (20, 7, 1)])
+        queue.add([(20, 6, None)])
+        self.assertEqual((20, 6, None), queue.claim("w1"))
+        self.assertEqual((20, 7, 1), queue.claim("w2"))
+        self.assertIsNone(queue.claim("w3"))
+        queue.complete((20, 6, None), (True, "output", "", 0.5))
+        self.assertEqual(("done", 1, (True, "output", "", 0.5)), queue.get(20, 6))
+        self.assertEqual(1, queue.unfinished())
+        queue.release((20, 7, 1), "w2")
+        self.assertEqual((20, 7, 1), queue.claim("w3"))
+        queue.close()
+
+    def test_stopped_worker(self):
+        queue = JobQueue(self.path, timeout=0, max_attempts=2)
+        queue.add([(20, 6, None)])
+        self.assertEqual((20, 6, None), queue.claim("w1"))
+        time.sleep(0.01)
+        self.assertEqual((20, 6, None), queue.claim("w2"))
+        time.sleep(0.01)
+        self.assertIsNone(queue.claim("w3"))
+        self.assertEqual(("failed", 2, None), queue.get(20, 6))
+        self.assertEqual(0, queue.unfinished())
+        queue.close()
+
+    def test_released_too_often(self):
+        # a task given up by every worker that claims it is failed after max_attempts claims
+        queue = JobQueue(self.path, max_attempts=3)
+        queue.add([(20, 6, None)])
+        for i in range(3):
+            self.assertEqual((20, 6, None), queue.claim(f"w{i}"))
+            queue.release((20, 6, None), f"w{i}")
+        self.assertIsNone(queue.claim("w3"))
+        self.assertEqual(("failed", 3, None), queue.get(20, 6))
+        self.assertEqual(0, queue.unfinished())
+        queue.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+from expressions import *
+from polynomial_factors import PolynomialProductAssumptions
+from nogoods import NogoodStore
+from proof import NULL_PROOF
+
+
+def narrowed_by_rule(assumptions, k, variable, assumed_type):
+    # as when a coefficient rule of [x^k]R(x) narrows variable
+    start = assumptions.checkpoint()
+    variable.adjust(assumed_type, 3, NULL_PROOF)
+    assumptions.reasons.append((start, assumptions.checkpoint(), k))
+
+
+class NogoodStoreTestCase(unittest.TestCase):
+    def setUp(self):
+        # positions of a_0, a_1, a_3 are 0, 1, 3 and of b_0, b_1 are 8, 9
+        self.assumptions = PolynomialProductAssumptions(6, 14, report=False)
+        self.nogoods = NogoodStore(16)
+
+    def learn_from_probe(self):
+        # probe a_1 in (0,1), [x^1]R(x) = a_1b_0 + a_0b_1 narrows b_1 and b_1 alone is contradictory then
+        assumptions = self.assumptions
+        checkpoint = assumptions.checkpoint()
+        assumptions.assumed_a[1].adjust(ASSUMED_OPEN_INTERVAL_0_TO_1, 3, NULL_PROOF)
+        assumptions.assumed_a[3].adjust(ASSUMED_0, 3, NULL_PROOF)
+        narrowed_by_rule(assumptions, 1, assumptions.assumed_b[1], ASSUMED_OPEN_INTERVAL_0_TO_1)
+        self.nogoods.learn(assumptions, checkpoint, (9,))
+        assumptions.rollback(checkpoint)
+
+    def test_learn_through_reasons(self):
+        self.learn_from_probe()
+        # b_1 is replaced by the coefficients of [x^1]R(x) as they were before the probe, except for the probed a_1,
+        # the unrelated a_3 and the unconstrained b_1 are left out
+        self.assertEqual([((0, DOMAIN_1), (1, DOMAIN_OPEN_INTERVAL_0_TO_1), (8, DOMAIN_1))],
+                         list(self.nogoods.nogoods))
+        self.assertEqual(1, self.nogoods.learned)
+
+    def test_violated_by_watched_change(self):
+        self.learn_from_probe()
+        assumptions = self.assumptions
+        checkpoint = assumptions.checkpoint()
+        assumptions.assumed_a[1].adjust(ASSUMED_0_OR_1, 3, NULL_PROOF)
+        self.assertFalse(self.nogoods.violated(assumptions, checkpoint))
+        assumptions.rollback(checkpoint)
+        assumptions.assumed_a[1].adjust(ASSUMED_OPEN_INTERVAL_0_TO_1, 3, NULL_PROOF)
+        self.assertTrue(self.nogoods.violated(assumptions, checkpoint))
+        # only the nogoods watching the coefficients changed since checkpoint are checked
+        checkpoint = assumptions.checkpoint()
+        assumptions.assumed_a[3].adjust(ASSUMED_0, 3, NULL_PROOF)
+        self.assertFalse(self.nogoods.violated(assumptions, checkpoint))
+        self.assertEqual(1, self.nogoods.pruned)
+
+    def test_evicted_not_watched(self):
+        self.nogoods = NogoodStore(1)
+        self.learn_from_probe()
+        assumptions = self.assumptions
+        checkpoint = assumptions.checkpoint()
+        assumptions.assumed_a[2].adjust(ASSUMED_OPEN_INTERVAL_0_TO_1, 3, NULL_PROOF)
+        self.nogoods.learn(assumptions, checkpoint, (2,))
+        assumptions.rollback(checkpoint)
+        self.assertEqual([((2, DOMAIN_OPEN_INTERVAL_0_TO_1),)], list(self.nogoods.nogoods))
+        assumptions.assumed_a[1].adjust(ASSUMED_OPEN_INTERVAL_0_TO_1, 3, NULL_PROOF)
+        self.assertFalse(self.nogoods.violated(assumptions, checkpoint))
+
+    def test_other_case_clears(self):
+        self.learn_from_probe()
+        self.nogoods.violated(PolynomialProductAssumptions(7, 13, report=False), 0)
+        self.assertEqual([], list(self.nogoods.nogoods))
+
+
+if __name__ == '__main__':
+    unittest.main()
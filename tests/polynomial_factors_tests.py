@@ -0,0 +1,115 @@
+import gzip
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+import zlib
+from unittest import mock
+from expressions import *
+from jobs import JobQueue
+from proof import NULL_PROOF
+import polynomial_factors
+import proof
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "polynomial_factors.py")
+
+
+def run_script(directory, *args):
+    # standard output and counterexamples.log of polynomial_factors.py run in directory
+    completed = subprocess.run([sys.executable, SCRIPT] + list(args), cwd=directory, capture_output=True, text=True,
+                               check=True)
+    with open(os.path.join(directory, "counterexamples.log")) as f:
+        return completed.stdout, f.read()
+
+
+class EarlyEndAssumptions(polynomial_factors.PolynomialProductAssumptions):
+    # b_2 in (0,1), so that assuming a_2, b_2 in {0,1} after the smallest a_2 in (0,1) branch fails
+    # and no later branch is checked
+    def __init__(self, deg_p, deg_q, report=True):
+        super().__init__(deg_p, deg_q, report)
+        self.assumed_b[2].adjust(ASSUMED_OPEN_INTERVAL_0_TO_1, 2, NULL_PROOF)
+
+
+class SplitBranchesTestCase(unittest.TestCase):
+    def check_split(self, deg_p, deg_q):
+        # the branches of a case one by one give the same as the whole case
+        whole = polynomial_factors.run_case(deg_p, deg_q)
+        branches = [polynomial_factors.run_case(deg_p, deg_q, i) for i in range(1, deg_p // 2 + 1)]
+        self.assertEqual(whole[1], "".join(branch[1] for branch in branches))
+        self.assertEqual(whole[2], "".join(branch[2] for branch in branches))
+        self.assertEqual(bool(whole[0]), all(branch[0] for branch in branches))
+        return whole
+
+    def test_same_as_whole_case(self):
+        for report_enabled in (False, True):
+            proof.report_enabled = report_enabled
+            try:
+                for deg_p, deg_q in ((7, 17), (8, 16), (6, 14)):
+                    self.check_split(deg_p, deg_q)
+            finally:
+                proof.report_enabled = False
+
+    def test_branches_after_failed_adjustment(self):
+        proof.report_enabled = True
+        try:
+            with mock.patch.object(polynomial_factors, "PolynomialProductAssumptions", EarlyEndAssumptions):
+                whole = self.check_split(8, 16)
+        finally:
+            proof.report_enabled = False
+        self.assertIn("Assuming 2 is the smallest with a_2 in (0,1)", whole[1])
+        self.assertNotIn("Assuming 3 is the smallest with a_3 in (0,1)", whole[1])
+
+    def test_split_branches_run(self):
+        with tempfile.TemporaryDirectory() as serial, tempfile.TemporaryDirectory() as split:
+            self.assertEqual(run_script(serial, "--min", "20", "--max", "24"),
+                             run_script(split, "--min", "20", "--max", "24", "--jobs", "2", "--split-branches"))
+
+
+    def test_failed_message_before_branch_proof(self):
+        # with the proofs on standard output, the proof of a branch follows the message that it failed
+        proof.report_enabled = True
+        try:
+            output = polynomial_factors.run_case(7, 17)[1]
+        finally:
+            proof.report_enabled = False
+        self.assertIn("when assuming a_2 in (0,1) is smallest with this property\n"
+                      "  Assuming 2 is the smallest with a_2 in (0,1)\n", output)
+
+
+class ProofFileTestCase(unittest.TestCase):
+    def test_jobs_gzip_proof_file(self):
+        # the workers do not write into the compressed proof file of the parent
+        args = ["--min", "20", "--max", "23", "--proof-file", "proofs.gz"]
+        with tempfile.TemporaryDirectory() as serial, tempfile.TemporaryDirectory() as jobs:
+            self.assertEqual(run_script(serial, *args), run_script(jobs, *args, "--jobs", "2"))
+            with gzip.open(os.path.join(serial, "proofs.gz"), "rt") as f:
+                expected = f.read()
+            with gzip.open(os.path.join(jobs, "proofs.gz"), "rt") as f:
+                self.assertEqual(expected, f.read())
+            # a single gzip member, with nothing after it
+            decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            with open(os.path.join(jobs, "proofs.gz"), "rb") as f:
+                self.assertEqual(expected, decompressor.decompress(f.read()).decode())
+            self.assertTrue(decompressor.eof)
+            self.assertEqual(b"", decompressor.unused_data)
+
+
+class QueuedTestCase(unittest.TestCase):
+    def test_task_keeps_raising(self):
+        # a task that fails every worker is not claimed again after max_attempts
+        with tempfile.TemporaryDirectory() as directory:
+            queue = JobQueue(os.path.join(directory, "jobs.db"), max_attempts=2)
+            queue.add([(20, 6, None)])
+            with mock.patch.object(polynomial_factors, "run_case", side_effect=RuntimeError) as run_case:
+                for i in range(2):
+                    with self.assertRaises(RuntimeError):
+                        polynomial_factors.check_degrees_queued(None, None, queue, poll=0)
+                polynomial_factors.check_degrees_queued(None, None, queue, poll=0)
+            self.assertEqual(2, run_case.call_count)
+            self.assertEqual(("failed", 2, None), queue.get(20, 6))
+            queue.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
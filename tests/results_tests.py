@@ -0,0 +1,88 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from results import ResultStore
+import polynomial_factors
+
+
+class ResultStoreTestCase(unittest.TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".db")
+        os.close(handle)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_round_trip(self):
+        store = ResultStore(self.path, 2)
+        self.assertIsNone(store.get(7, 17))
+        store.put(7, 17, None, (True, "output", "counterexample\n", 0.5, "proof.gz"))
+        store.put(7, 17, 2, (False, "branch output", "", 0.25, None))
+        store.close()
+        store = ResultStore(self.path, 2)
+        self.assertEqual((True, "output", "counterexample\n", 0.5, "proof.gz"), store.get(7, 17))
+        self.assertEqual((False, "branch output", "", 0.25, None), store.get(7, 17, 2))
+        self.assertIsNone(store.get(7, 17, 1))
+        store.close()
+
+    def test_rules_version_isolated(self):
+        store = ResultStore(self.path, 2)
+        store.put(7, 17, None, (True, "output", "", 0.5, None))
+        store.close()
+        store = ResultStore(self.path, 3)
+        self.assertIsNone(store.get(7, 17))
+        store.close()
+
+    def test_undecided_not_stored(self):
+        polynomial_factors.results = ResultStore(self.path, 2)
+        try:
+            polynomial_factors.store_result(7, 17, None, (None, "undecided output", "", 0.5))
+            self.assertIsNone(polynomial_factors.results.get(7, 17))
+            polynomial_factors.store_result(7, 17, None, (True, "output", "", 0.5))
+            self.assertEqual((True, "output", "", 0.5, None), polynomial_factors.results.get(7, 17))
+        finally:
+            polynomial_factors.results.close()
+            polynomial_factors.results = None
+
+    def test_settings_isolated(self):
+        store = ResultStore(self.path, 2, "symmetry")
+        store.put(7, 17, None, (True, "symmetric output", "", 0.5, None))
+        store.close()
+        store = ResultStore(self.path, 2)
+        self.assertIsNone(store.get(7, 17))
+        store.close()
+        store = ResultStore(self.path, 2, "symmetry")
+        self.assertEqual((True, "symmetric output", "", 0.5, None), store.get(7, 17))
+        store.close()
+
+    def test_results_without_settings_dropped(self):
+        connection = sqlite3.connect(self.path)
+        connection.execute("CREATE TABLE results (deg_p INTEGER, deg_q INTEGER, branch INTEGER, "
+                           "rules_version INTEGER, result INTEGER, output TEXT, counterexamples TEXT, seconds REAL, "
+                           "proof TEXT, PRIMARY KEY (deg_p, deg_q, branch, rules_version))")
+        connection.execute("INSERT INTO results VALUES (7, 17, 0, 2, 1, '', '', 0.5, NULL)")
+        connection.commit()
+        connection.close()
+        store = ResultStore(self.path, 2)
+        self.assertIsNone(store.get(7, 17))
+        store.put(7, 17, None, (True, "", "", 0.5, None))
+        self.assertIsNotNone(store.get(7, 17))
+        store.close()
+
+    def test_outcome_settings(self):
+        def settings(**changed):
+            polynomial_factors.configure(**changed)
+            return polynomial_factors.outcome_settings()
+
+        try:
+            found = [settings(), settings(symmetric=True), settings(nogoods=100), settings(solver="builtin"),
+                     settings(heuristic="order"), settings(heuristic="order", max_search_depth=2)]
+        finally:
+            settings()
+        self.assertEqual("", found[0])
+        self.assertEqual(len(found), len(set(found)))
+
+
+if __name__ == '__main__':
+    unittest.main()
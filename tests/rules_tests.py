@@ -0,0 +1,343 @@
+import multiprocessing
+import random
+import unittest
+from copy import deepcopy
+from expressions import *
+from polynomial_factors import PolynomialProductAssumptions, PackedPolynomialProductAssumptions
+from rules import check_inequalities, reference_check_inequalities
+from budget import Budget, BudgetExceeded
+from transpositions import TranspositionTable
+from stats import RuleStats
+from proof import NULL_PROOF
+import rules
+import classification
+
+
+class RecordingProof:
+    def __init__(self):
+        self.messages = []
+
+    def report(self, level, msg):
+        if callable(msg):
+            msg = msg()
+        self.messages.append((level, msg))
+
+
+def random_assumptions(rnd, deg_p, deg_q, assumed_types=(ASSUMED_OPEN_INTERVAL_0_TO_1, ASSUMED_OPEN_INTERVAL_0_TO_1,
+                                                          ASSUMED_0, ASSUMED_0, ASSUMED_0, ASSUMED_1),
+                       assumptions_type=PolynomialProductAssumptions):
+    assumptions = assumptions_type(deg_p, deg_q, report=False)
+    for variable in assumptions.assumed_a[1:deg_p] + assumptions.assumed_b[1:deg_q]:
+        variable.assumed_type = rnd.choice(assumed_types)
+    return assumptions
+
+
+def run_check(check, assumptions):
+    proof = RecordingProof()
+    try:
+        check(assumptions, proof)
+    except Contradiction:
+        return proof.messages
+    return None
+
+
+class CheckInequalitiesTestCase(unittest.TestCase):
+    def test_same_as_reference_for_two_terms(self):
+        rnd = random.Random(1)
+        checked = 0
+        while checked < 200:
+            assumptions = random_assumptions(rnd, 7, 12)
+            expected = run_check(reference_check_inequalities, assumptions)
+            found = run_check(check_inequalities, assumptions)
+            if found is not None and found[0][1].split("<")[0].count("+") > 1:
+                # coefficient with more than two terms, not handled by the reference
+                continue
+            self.assertEqual(expected, found)
+            if expected is not None:
+                checked += 1
+
+    def test_more_terms(self):
+        # [x^6]R(x) = a_1b_5 + a_2b_4 + a_3b_3 and [x^10]R(x) = a_1*1 + a_2*1 + a_3*1 + ...
+        assumptions = PolynomialProductAssumptions(11, 13, report=False)
+        for variable in assumptions.assumed_a[1:11] + assumptions.assumed_b[1:13]:
+            variable.assumed_type = ASSUMED_0
+        for i in (1, 2, 3):
+            assumptions.assumed_a[i].assumed_type = ASSUMED_OPEN_INTERVAL_0_TO_1
+        for j in (3, 4, 5):
+            assumptions.assumed_b[j].assumed_type = ASSUMED_OPEN_INTERVAL_0_TO_1
+        for j in (7, 8, 9):
+            assumptions.assumed_b[j].assumed_type = ASSUMED_1
+        self.assertIsNone(run_check(reference_check_inequalities, assumptions))
+        self.assertEqual([(3, "1=[x^6]R(x) = a_1b_5+a_2b_4+a_3b_3 < a_1+a_2+a_3 + ... = [x^10]R(x) = 1 "
+                              "=> contradiction")],
+                         run_check(check_inequalities, assumptions))
+
+
+def propagated(assumptions):
+    # state reached by propagate or None on contradiction, from the same state each time
+    checkpoint = assumptions.checkpoint()
+    try:
+        rules.propagate(assumptions, 3, NULL_PROOF)
+        return assumptions.state()
+    except Contradiction:
+        return None
+    finally:
+        assumptions.rollback(checkpoint)
+
+
+class PropagateTestCase(unittest.TestCase):
+    def test_incremental_same_as_full_rescan(self):
+        rnd = random.Random(4)
+        contradictions = 0
+        for assumptions_type in (PolynomialProductAssumptions, PackedPolynomialProductAssumptions):
+            for _ in range(100):
+                assumptions = random_assumptions(rnd, 7, 15, ASSUMED_TYPES + (ASSUMED_CLOSED_INTERVAL_0_TO_1,) * 6,
+                                                 assumptions_type)
+                try:
+                    found = {}
+                    for incremental in (False, True):
+                        rules.incremental = incremental
+                        found[incremental] = propagated(assumptions)
+                finally:
+                    rules.incremental = False
+                self.assertEqual(found[False], found[True])
+                contradictions += found[False] is None
+        self.assertTrue(0 < contradictions < 200)
+
+
+def assigned(assumptions_type, deg_p, deg_q, state):
+    # assumptions with the coefficients in the domains of state, not on the trail
+    assumptions = assumptions_type(deg_p, deg_q, report=False)
+    for variable, domain in zip(assumptions.assumed_a + assumptions.assumed_b, state):
+        variable.assumed_type = DOMAIN_TO_ASSUMED[domain]
+    return assumptions
+
+
+class TranspositionsTestCase(unittest.TestCase):
+    def setUp(self):
+        rules.transpositions = TranspositionTable(1024)
+
+    def tearDown(self):
+        rules.transpositions = None
+        rules.symmetry = False
+
+    def test_least_recently_used_evicted(self):
+        table = TranspositionTable(2)
+        table["a"] = 1
+        table["b"] = None
+        self.assertEqual(1, table["a"])
+        table["c"] = 3
+        self.assertNotIn("b", table)
+        self.assertIn("a", table)
+        self.assertIn("c", table)
+        self.assertEqual(2, len(table))
+
+    def test_mirror_state(self):
+        for assumptions_type in (PolynomialProductAssumptions, PackedPolynomialProductAssumptions):
+            assumptions = assumptions_type(7, 15, report=False)
+            # positions of a_0..a_8 and b_0..b_16 as the values of the state
+            state = bytes(range(9 + 17))
+            mirrored = assumptions.mirror_state(state)
+            self.assertEqual(list(range(7, -1, -1)) + [8] + list(range(24, 8, -1)) + [25], list(mirrored))
+            self.assertEqual(state, assumptions.mirror_state(mirrored))
+
+    def check_states(self, check):
+        rnd = random.Random(5)
+        for assumptions_type in (PolynomialProductAssumptions, PackedPolynomialProductAssumptions):
+            for _ in range(20):
+                rules.transpositions.clear()
+                check(random_assumptions(rnd, 7, 15, ASSUMED_TYPES + (ASSUMED_CLOSED_INTERVAL_0_TO_1,) * 10,
+                                         assumptions_type))
+
+    def test_hit_restores_fixpoint(self):
+        def check(assumptions):
+            start = assumptions.state()
+            reached = propagated(assumptions)
+            checkpoint = assumptions.checkpoint()
+            hits = rules.transpositions.hits
+            try:
+                rules.propagate(assumptions, 3, NULL_PROOF)
+            except Contradiction:
+                # the contradiction is remembered too
+                self.assertIsNone(reached)
+            else:
+                self.assertEqual(reached, assumptions.state())
+            self.assertEqual(hits + 1, rules.transpositions.hits)
+            assumptions.rollback(checkpoint)
+            self.assertEqual(start, assumptions.state())
+
+        self.check_states(check)
+
+    def test_mirrored_state(self):
+        # propagating the reversed polynomials reaches the reversed state, with symmetry it is taken from the table
+        def check(assumptions):
+            mirrored = assigned(type(assumptions), 7, 15, assumptions.mirror_state(assumptions.state()))
+            rules.symmetry = False
+            rules.transpositions.clear()
+            reached = propagated(assumptions)
+            mirrored_reached = propagated(mirrored)
+            self.assertEqual(reached and assumptions.mirror_state(reached), mirrored_reached)
+            self.assertEqual(reached, mirrored_reached and assumptions.mirror_state(mirrored_reached))
+
+            rules.symmetry = True
+            rules.transpositions.clear()
+            self.assertEqual(reached, propagated(assumptions))
+            hits = rules.transpositions.hits
+            self.assertEqual(mirrored_reached, propagated(mirrored))
+            self.assertEqual(hits + 1, rules.transpositions.hits)
+
+        self.check_states(check)
+
+
+class ProbeFixpointsTestCase(unittest.TestCase):
+    def setUp(self):
+        rules.probe_fixpoints = TranspositionTable(1024)
+        rules.stats = RuleStats()
+
+    def tearDown(self):
+        rules.probe_fixpoints = None
+        rules.stats = None
+
+    def probe(self, assumptions, variable, assumed_type):
+        # outcome of the probe and whether it was reused, and the outcome without reusing
+        reused = rules.stats.counters.get("reused probes", 0)
+        viable = rules.probe(assumptions, variable, assumed_type, 3, NULL_PROOF)
+        reused = rules.stats.counters.get("reused probes", 0) > reused
+        probe_fixpoints = rules.probe_fixpoints
+        rules.probe_fixpoints = None
+        try:
+            return viable, reused, rules.probe(assumptions, variable, assumed_type, 3, NULL_PROOF)
+        finally:
+            rules.probe_fixpoints = probe_fixpoints
+
+    def test_reused_only_when_not_narrowed_past_fixpoint(self):
+        # the smallest a_2 in (0,1) branch of deg P=7, deg Q=17
+        assumptions = PolynomialProductAssumptions(7, 17, report=False)
+        rules.propagate(assumptions, 2, NULL_PROOF, recursive=False)
+        assumptions.assumed_a[1].adjust(ASSUMED_0_OR_1, 2, NULL_PROOF)
+        assumptions.assumed_b[1].adjust(ASSUMED_0_OR_1, 2, NULL_PROOF)
+        assumptions.assumed_a[2].adjust(ASSUMED_OPEN_INTERVAL_0_TO_1, 3, NULL_PROOF)
+        variables = assumptions.assumed_a + assumptions.assumed_b
+        state = assumptions.state()
+        checked = 0
+        unsettled = 0
+        for position, variable in enumerate(variables):
+            for assumed_type in (ASSUMED_OPEN_INTERVAL_0_TO_1, ASSUMED_0, ASSUMED_1):
+                domain = ASSUMED_TO_DOMAIN[assumed_type]
+                if domain == state[position] or not domain & state[position]:
+                    continue
+                rules.probe_fixpoints.clear()
+                if not rules.probe(assumptions, variable, assumed_type, 3, NULL_PROOF):
+                    continue
+                key = (7, 17, variable.name, assumed_type, True)
+                if key not in rules.probe_fixpoints.states:
+                    # the additional assumptions narrowed a coefficient in the last pass, it could go further
+                    unsettled += 1
+                    continue
+                reached = rules.probe_fixpoints[key].to_bytes(len(state), "little")
+                for other in range(len(state)):
+                    if other == position or reached[other] == state[other]:
+                        continue
+                    checkpoint = assumptions.checkpoint()
+                    # narrowed as the probe did, it is reused and still viable
+                    variables[other].adjust(DOMAIN_TO_ASSUMED[reached[other]], 3, NULL_PROOF)
+                    self.assertEqual((True, True, True), self.probe(assumptions, variable, assumed_type))
+                    assumptions.rollback(checkpoint)
+                    excluded = DOMAIN_TO_ASSUMED[state[other] & ~reached[other]]
+                    if excluded is not None:
+                        # narrowed to what the probe excluded, it has to run again
+                        variables[other].adjust(excluded, 3, NULL_PROOF)
+                        viable, reused, expected = self.probe(assumptions, variable, assumed_type)
+                        self.assertFalse(reused)
+                        self.assertEqual(expected, viable)
+                        assumptions.rollback(checkpoint)
+                    checked += 1
+                self.assertEqual(state, assumptions.state())
+        self.assertGreater(checked, 50)
+        self.assertGreater(unsettled, 0)
+
+
+class BudgetTestCase(unittest.TestCase):
+    def test_probes_exceed_budget(self):
+        assumptions = PolynomialProductAssumptions(7, 17, report=False)
+        budget = Budget("branch", (0, 2, 0))
+        rules.budgets.append(budget)
+        try:
+            checkpoint = assumptions.checkpoint()
+            for _ in range(2):
+                rules.probe(assumptions, assumptions.assumed_a[2], ASSUMED_OPEN_INTERVAL_0_TO_1, 3, NULL_PROOF,
+                            recursive=False)
+            with self.assertRaises(BudgetExceeded) as raised:
+                rules.probe(assumptions, assumptions.assumed_a[2], ASSUMED_OPEN_INTERVAL_0_TO_1, 3, NULL_PROOF,
+                            recursive=False)
+            self.assertIs(budget, raised.exception.budget)
+            self.assertEqual(checkpoint, assumptions.checkpoint())
+        finally:
+            rules.budgets.remove(budget)
+
+    def test_pool_probes_charged(self):
+        # the probes the workers evaluate are charged to the budgets of the parent as when evaluated in it
+        assumptions = PolynomialProductAssumptions(7, 17, report=False)
+        assumptions.assumed_a[2].adjust(ASSUMED_OPEN_INTERVAL_0_TO_1, 3, NULL_PROOF)
+
+        def make_probes(j):
+            return rules._probes(assumptions.assumed_b[j], f"b_{j}", (ASSUMED_OPEN_INTERVAL_0_TO_1, ASSUMED_0))
+
+        charged = []
+        for pool in (None, multiprocessing.Pool(2)):
+            budget = Budget("branch", (0, 0, 0))
+            rules.budgets.append(budget)
+            rules.probe_pool = pool
+            rules.probe_jobs = 2
+            try:
+                outcomes = [[viable for viable, _ in candidate_outcomes] for _, candidate_outcomes in
+                            rules.probe_candidates(assumptions, list(range(1, 17)), make_probes)]
+            finally:
+                rules.budgets.remove(budget)
+                rules.probe_pool = None
+                rules.probe_jobs = 1
+                if pool is not None:
+                    pool.close()
+                    pool.join()
+            charged.append((outcomes, budget.probes, budget.fixpoints))
+        self.assertEqual(charged[0], charged[1])
+        self.assertGreater(charged[0][1], 32)
+
+
+class ProductsTestCase(unittest.TestCase):
+    def test_copied_products(self):
+        assumptions = PackedPolynomialProductAssumptions(7, 17, report=False)
+        assumptions.additional_assumptions = [([assumptions.product(2, 3)], ASSUMED_0)]
+        copied = deepcopy(assumptions)
+        self.assertIs(copied.assumed_a[2], copied.product(2, 3).a)
+        self.assertIs(copied.assumed_b[3], copied.product(2, 3).b)
+        self.assertIs(copied.product(2, 3), copied.additional_assumptions[0][0][0])
+        self.assertEqual("a_2*b_3", copied.product(2, 3).name)
+
+    def test_no_instance_dict(self):
+        assumptions = PackedPolynomialProductAssumptions(7, 17, report=False)
+        for expression in (assumptions.product(2, 3), assumptions.assumed_a[2]):
+            self.assertFalse(hasattr(expression, "__dict__"))
+            with self.assertRaises(AttributeError):
+                expression.other = None
+
+
+class TermCountsTestCase(unittest.TestCase):
+    def check_backend(self, term_counts):
+        rnd = random.Random(2)
+        for assumptions_type in (PolynomialProductAssumptions, PackedPolynomialProductAssumptions):
+            for deg_p, deg_q in ((6, 14), (9, 11), (20, 31)):
+                for _ in range(20):
+                    assumptions = random_assumptions(rnd, deg_p, deg_q, ASSUMED_TYPES, assumptions_type)
+                    self.assertEqual(classification.reference_term_counts(assumptions), term_counts(assumptions))
+
+    @unittest.skipUnless(classification.numpy is not None, "numpy is not installed")
+    def test_numpy_same_as_reference(self):
+        self.check_backend(classification.numpy_term_counts)
+
+    def test_bitset_same_as_reference(self):
+        self.check_backend(classification.bitset_term_counts)
+
+
+if __name__ == '__main__':
+    unittest.main()
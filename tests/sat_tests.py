@@ -0,0 +1,65 @@
+import random
+import unittest
+from itertools import product
+from expressions import *
+from polynomial_factors import PolynomialProductAssumptions, PackedPolynomialProductAssumptions
+from cdcl import CdclSolver
+import sat
+
+
+def satisfies(model, clauses):
+    return all(any(model[abs(literal)] == (literal > 0) for literal in clause) for clause in clauses)
+
+
+class CdclSolverTestCase(unittest.TestCase):
+    def test_same_as_brute_force(self):
+        rnd = random.Random(3)
+        for _ in range(200):
+            num_vars = rnd.randint(1, 10)
+            clauses = [[rnd.choice((1, -1)) * rnd.randint(1, num_vars) for _ in range(rnd.randint(1, 3))]
+                       for _ in range(rnd.randint(1, 45))]
+            satisfiable = any(satisfies((None,) + values, clauses)
+                              for values in product((False, True), repeat=num_vars))
+            model = CdclSolver(num_vars, clauses).solve()
+            self.assertEqual(satisfiable, model is not None)
+            if model is not None:
+                self.assertTrue(satisfies(model, clauses))
+
+    def test_pigeonhole(self):
+        # 5 pigeons in 4 holes, pigeon p in hole h is variable 4*p + h + 1
+        clauses = [[4 * p + h + 1 for h in range(4)] for p in range(5)]
+        clauses += [[-(4 * p + h + 1), -(4 * q + h + 1)] for h in range(4) for p in range(5) for q in range(p)]
+        self.assertIsNone(CdclSolver(20, clauses).solve())
+
+
+class EncodeTestCase(unittest.TestCase):
+    def test_single_non_integer_term(self):
+        # [x^1]R(x) = a_1*b_0 + a_0*b_1 = a_1 + b_1
+        for assumptions_type in (PolynomialProductAssumptions, PackedPolynomialProductAssumptions):
+            assumptions = assumptions_type(6, 14, report=False)
+            assumptions.assumed_a[1].assumed_type = ASSUMED_OPEN_INTERVAL_0_TO_1
+            assumptions.assumed_b[1].assumed_type = ASSUMED_0_OR_1
+            self.assertFalse(sat.solve(sat.encode(assumptions)))
+
+    def test_factorization_satisfies(self):
+        # (1 + x + x^6)(1 + x^9) has coefficients in {0,1}
+        assumptions = PolynomialProductAssumptions(6, 9, report=False)
+        for i in range(7):
+            assumptions.assumed_a[i].assumed_type = ASSUMED_1 if i in (0, 1, 6) else ASSUMED_0
+        for j in range(10):
+            assumptions.assumed_b[j].assumed_type = ASSUMED_1 if j in (0, 9) else ASSUMED_0
+        self.assertTrue(sat.solve(sat.encode(assumptions)))
+        assumptions.assumed_b[1].assumed_type = ASSUMED_1
+        self.assertFalse(sat.solve(sat.encode(assumptions)))
+
+
+class ExternalSolverTestCase(unittest.TestCase):
+    def test_missing_solver(self):
+        self.assertFalse(sat.solver_missing("builtin"))
+        self.assertTrue(sat.solver_missing("no-such-sat-solver --verbose"))
+        with self.assertRaises(RuntimeError):
+            sat.solve(sat.encode(PolynomialProductAssumptions(6, 14, report=False)), "no-such-sat-solver")
+
+
+if __name__ == '__main__':
+    unittest.main()
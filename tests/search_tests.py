@@ -0,0 +1,46 @@
+import unittest
+from expressions import *
+from polynomial_factors import PolynomialProductAssumptions
+from proof import NULL_PROOF
+from search import Search
+
+
+class SearchTestCase(unittest.TestCase):
+    def test_backjumps_over_unrelated_decision(self):
+        # a_1 = 0 alone is contradictory, but it is noticed only once a_2 is decided too
+        assumptions = PolynomialProductAssumptions(6, 14, report=False)
+        tried = []
+        checkpoint = assumptions.checkpoint()
+
+        def fixpoint(proof):
+            a_1 = assumptions.assumed_a[1].assumed_type
+            a_2 = assumptions.assumed_a[2].assumed_type
+            if a_2 != ASSUMED_CLOSED_INTERVAL_0_TO_1:
+                tried.append((a_1, a_2))
+            if a_1 == ASSUMED_0 and a_2 != ASSUMED_CLOSED_INTERVAL_0_TO_1:
+                raise Contradiction((1,))
+            if a_1 != ASSUMED_0 and a_2 != ASSUMED_CLOSED_INTERVAL_0_TO_1:
+                raise Contradiction()
+
+        search = Search(assumptions, fixpoint, "order", max_depth=2)
+        self.assertTrue(search.run(NULL_PROOF))
+        self.assertEqual(1, search.backjumps)
+        self.assertEqual(1, sum(a_1 == ASSUMED_0 for a_1, _ in tried))
+        self.assertEqual(checkpoint, assumptions.checkpoint())
+
+    def test_keeps_leaf_without_contradiction(self):
+        assumptions = PolynomialProductAssumptions(6, 14, report=False)
+
+        def fixpoint(proof):
+            if assumptions.assumed_a[1].assumed_type == ASSUMED_0:
+                raise Contradiction()
+
+        search = Search(assumptions, fixpoint, "most-constrained", max_depth=1)
+        self.assertFalse(search.run(NULL_PROOF))
+        self.assertEqual(["a_1 = 1"], search.leaf)
+        # the state of the whole branch, not of the leaf
+        self.assertEqual(ASSUMED_CLOSED_INTERVAL_0_TO_1, assumptions.assumed_a[1].assumed_type)
+
+
+if __name__ == '__main__':
+    unittest.main()
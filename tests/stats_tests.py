@@ -0,0 +1,91 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+import polynomial_factors
+import rules
+from stats import RuleStats
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "polynomial_factors.py")
+
+
+class RuleStatsTestCase(unittest.TestCase):
+    def setUp(self):
+        rules.stats = RuleStats()
+
+    def tearDown(self):
+        rules.stats = None
+
+    def test_case_counts(self):
+        # the counted probes are the probes run, the failed ones included
+        outcomes = []
+        probe = rules.probe
+
+        def counted_probe(*args, **kwargs):
+            outcomes.append(probe(*args, **kwargs))
+            return outcomes[-1]
+
+        with mock.patch.object(rules, "probe", counted_probe):
+            polynomial_factors.run_case(7, 17)
+        rule_counts, counters = rules.stats.cases[7, 17]
+        self.assertEqual(len(outcomes), counters["probes"])
+        self.assertGreaterEqual(counters["probes"], outcomes.count(False))
+        self.assertGreater(outcomes.count(False), 0)
+        for name in ("propagate", "basic_rules", "check_terms"):
+            self.assertGreater(rule_counts[name][0], 0)
+        for name, (calls, contradictions, seconds) in rule_counts.items():
+            self.assertGreaterEqual(calls, contradictions, name)
+            self.assertGreaterEqual(seconds, 0.0, name)
+        self.assertGreater(rule_counts["basic_rules"][1], 0)
+        self.assertEqual((rule_counts, counters), rules.stats.total())
+
+    def test_merge(self):
+        polynomial_factors.run_case(7, 17)
+        polynomial_factors.run_case(8, 16)
+        merged = RuleStats()
+        merged.merge(rules.stats)
+        merged.merge(rules.stats)
+        rule_counts, counters = rules.stats.total()
+        merged_rules, merged_counters = merged.total()
+        self.assertEqual({name: 2 * n for name, n in counters.items()}, merged_counters)
+        self.assertEqual({name: [2 * entry[0], 2 * entry[1]] for name, entry in rule_counts.items()},
+                         {name: entry[:2] for name, entry in merged_rules.items()})
+        self.assertEqual(counters["probes"],
+                         rules.stats.cases[7, 17][1]["probes"] + rules.stats.cases[8, 16][1]["probes"])
+
+
+class StatsReportTestCase(unittest.TestCase):
+    def run_script(self, directory, *args):
+        # the printed report and the JSON one
+        completed = subprocess.run([sys.executable, SCRIPT, "--min", "20", "--max", "22", "--stats",
+                                    "--stats-json", "stats.json"] + list(args),
+                                   cwd=directory, capture_output=True, text=True, check=True)
+        with open(os.path.join(directory, "stats.json")) as f:
+            return completed.stdout, json.load(f)
+
+    def test_report(self):
+        with tempfile.TemporaryDirectory() as serial, tempfile.TemporaryDirectory() as jobs:
+            output, report = self.run_script(serial)
+            self.assertEqual(sum(case["counters"]["probes"] for case in report["cases"]),
+                             report["total"]["counters"]["probes"])
+            self.assertGreater(report["total"]["counters"]["probes"], 0)
+            # the summary is at the end of the output, after its header line
+            lines = output.splitlines()
+            start = next(i for i, line in enumerate(lines) if line.startswith("rule ")) + 1
+            printed = {line[:24].strip(): line[24:].split() for line in lines[start:]}
+            for name, rule in report["total"]["rules"].items():
+                self.assertGreater(rule["calls"], 0)
+                self.assertEqual([str(rule["calls"]), str(rule["contradictions"])], printed[name][:2])
+            self.assertEqual([str(report["total"]["counters"]["probes"])], printed["probes"])
+            # the workers count the same as a serial run
+            _, jobs_report = self.run_script(jobs, "--jobs", "2")
+            self.assertEqual(report["total"]["counters"], jobs_report["total"]["counters"])
+            self.assertEqual({name: rule["calls"] for name, rule in report["total"]["rules"].items()},
+                             {name: rule["calls"] for name, rule in jobs_report["total"]["rules"].items()})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+from collections import OrderedDict
+
+
+class TranspositionTable:
+    # remembers where propagation from already explored assumption states leads, state key -> reached state,
+    # None when it leads to contradiction; holds at most size states, least recently used are evicted first
+
+    def __init__(self, size):
+        self.size = size
+        self.states = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __contains__(self, key):
+        if key in self.states:
+            self.hits += 1
+            return True
+        self.misses += 1
+        return False
+
+    def __getitem__(self, key):
+        self.states.move_to_end(key)
+        return self.states[key]
+
+    def __setitem__(self, key, reached):
+        self.states[key] = reached
+        self.states.move_to_end(key)
+        if len(self.states) > self.size:
+            self.states.popitem(last=False)
+
+    def __len__(self):
+        return len(self.states)
+
+    def clear(self):
+        self.states.clear()